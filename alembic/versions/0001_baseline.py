@@ -0,0 +1,108 @@
+"""Baseline schema (users, resumes, resume_analyses, analysis_jobs)
+
+Databases created by earlier releases through Base.metadata.create_all()
+already have some of these tables; only the missing ones are created, so
+`alembic upgrade head` works on them as-is. Releases before background
+jobs have no analysis_jobs table.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+   existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+   if "users" not in existing:
+      _create_users()
+   if "resumes" not in existing:
+      _create_resumes()
+   if "resume_analyses" not in existing:
+      _create_resume_analyses()
+   if "analysis_jobs" not in existing:
+      _create_analysis_jobs()
+
+
+def _create_users() -> None:
+   op.create_table(
+      "users",
+      sa.Column("id", sa.Integer(), primary_key=True),
+      sa.Column("email", sa.String(), nullable=False),
+      sa.Column("full_name", sa.String(), nullable=True),
+      sa.Column("hashed_password", sa.String(), nullable=False),
+      sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+   )
+   op.create_index("ix_users_id", "users", ["id"])
+   op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+
+def _create_resumes() -> None:
+   op.create_table(
+      "resumes",
+      sa.Column("id", sa.Integer(), primary_key=True),
+      sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+      sa.Column("title", sa.String(), nullable=False),
+      sa.Column("resume_text", sa.Text(), nullable=False),
+      sa.Column("target_role", sa.String(), nullable=True),
+      sa.Column("job_description", sa.Text(), nullable=True),
+      sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+      sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+   )
+   op.create_index("ix_resumes_id", "resumes", ["id"])
+
+
+def _create_resume_analyses() -> None:
+   op.create_table(
+      "resume_analyses",
+      sa.Column("id", sa.Integer(), primary_key=True),
+      sa.Column("resume_id", sa.Integer(), sa.ForeignKey("resumes.id", ondelete="CASCADE"), nullable=True),
+      sa.Column("overall_score", sa.Integer(), nullable=True),
+      sa.Column("experience_summary", sa.Text(), nullable=True),
+      sa.Column("skills_technical", sa.Text(), nullable=True),
+      sa.Column("skills_soft", sa.Text(), nullable=True),
+      sa.Column("strengths", sa.Text(), nullable=True),
+      sa.Column("gaps", sa.Text(), nullable=True),
+      sa.Column("improvement_suggestions", sa.Text(), nullable=True),
+      sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+   )
+   op.create_index("ix_resume_analyses_id", "resume_analyses", ["id"])
+
+
+def _create_analysis_jobs() -> None:
+   op.create_table(
+      "analysis_jobs",
+      sa.Column("id", sa.String(length=36), primary_key=True),
+      sa.Column("resume_id", sa.Integer(), sa.ForeignKey("resumes.id", ondelete="CASCADE"), nullable=False),
+      sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+      sa.Column("status", sa.String(length=16), nullable=False),
+      sa.Column("force", sa.Boolean(), nullable=False),
+      sa.Column("attempts", sa.Integer(), nullable=False),
+      sa.Column("error", sa.Text(), nullable=True),
+      sa.Column(
+         "analysis_id",
+         sa.Integer(),
+         sa.ForeignKey("resume_analyses.id", ondelete="SET NULL"),
+         nullable=True,
+      ),
+      sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+      sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+   )
+   op.create_index("ix_analysis_jobs_user_id", "analysis_jobs", ["user_id"])
+   op.create_index("ix_analysis_jobs_status", "analysis_jobs", ["status"])
+
+
+def downgrade() -> None:
+   op.drop_table("analysis_jobs")
+   op.drop_table("resume_analyses")
+   op.drop_table("resumes")
+   op.drop_table("users")
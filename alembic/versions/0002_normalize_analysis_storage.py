@@ -0,0 +1,196 @@
+"""Normalize analysis skills and points into their own tables
+
+Moves the comma-joined skills and newline-joined strengths / gaps /
+suggestions out of resume_analyses into analysis_skills and analysis_points.
+Existing rows are backfilled in keyset-paginated chunks so memory stays flat
+on large tables, then the old Text columns are dropped.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CHUNK_SIZE = 1000
+
+SKILL_COLUMNS = {"skills_technical": "technical", "skills_soft": "soft"}
+POINT_COLUMNS = {"strengths": "strength", "gaps": "gap", "improvement_suggestions": "suggestion"}
+
+analyses = sa.table(
+   "resume_analyses",
+   sa.column("id", sa.Integer),
+   sa.column("resume_id", sa.Integer),
+   *(sa.column(name, sa.Text) for name in (*SKILL_COLUMNS, *POINT_COLUMNS)),
+)
+skills = sa.table(
+   "analysis_skills",
+   sa.column("analysis_id", sa.Integer),
+   sa.column("resume_id", sa.Integer),
+   sa.column("kind", sa.String),
+   sa.column("position", sa.Integer),
+   sa.column("name", sa.String),
+   sa.column("name_normalized", sa.String),
+)
+points = sa.table(
+   "analysis_points",
+   sa.column("analysis_id", sa.Integer),
+   sa.column("kind", sa.String),
+   sa.column("position", sa.Integer),
+   sa.column("text", sa.Text),
+)
+
+
+def _split(value, separator):
+   if not value:
+      return []
+   return [item.strip() for item in value.split(separator) if item.strip()]
+
+
+def _create_tables() -> None:
+   existing = set(sa.inspect(op.get_bind()).get_table_names())
+   # create_all() on app startup may already have created these
+   if "analysis_skills" not in existing:
+      op.create_table(
+         "analysis_skills",
+         sa.Column("id", sa.Integer(), primary_key=True),
+         sa.Column(
+            "analysis_id",
+            sa.Integer(),
+            sa.ForeignKey("resume_analyses.id", ondelete="CASCADE"),
+            nullable=False,
+         ),
+         sa.Column("resume_id", sa.Integer(), sa.ForeignKey("resumes.id", ondelete="CASCADE"), nullable=False),
+         sa.Column("kind", sa.String(length=16), nullable=False),
+         sa.Column("position", sa.Integer(), nullable=False),
+         sa.Column("name", sa.String(), nullable=False),
+         sa.Column("name_normalized", sa.String(), nullable=False),
+      )
+      op.create_index("ix_analysis_skills_analysis_id", "analysis_skills", ["analysis_id"])
+      op.create_index(
+         "ix_analysis_skills_kind_name_resume",
+         "analysis_skills",
+         ["kind", "name_normalized", "resume_id"],
+      )
+   if "analysis_points" not in existing:
+      op.create_table(
+         "analysis_points",
+         sa.Column("id", sa.Integer(), primary_key=True),
+         sa.Column(
+            "analysis_id",
+            sa.Integer(),
+            sa.ForeignKey("resume_analyses.id", ondelete="CASCADE"),
+            nullable=False,
+         ),
+         sa.Column("kind", sa.String(length=16), nullable=False),
+         sa.Column("position", sa.Integer(), nullable=False),
+         sa.Column("text", sa.Text(), nullable=False),
+      )
+      op.create_index("ix_analysis_points_analysis_id", "analysis_points", ["analysis_id"])
+
+
+def upgrade() -> None:
+   _create_tables()
+   bind = op.get_bind()
+
+   last_id = 0
+   while True:
+      rows = bind.execute(
+         sa.select(analyses)
+         .where(analyses.c.id > last_id)
+         .order_by(analyses.c.id)
+         .limit(CHUNK_SIZE)
+      ).mappings().all()
+      if not rows:
+         break
+
+      skill_rows, point_rows = [], []
+      for row in rows:
+         for column, kind in SKILL_COLUMNS.items():
+            for position, name in enumerate(_split(row[column], ",")):
+               skill_rows.append(
+                  {
+                     "analysis_id": row["id"],
+                     "resume_id": row["resume_id"],
+                     "kind": kind,
+                     "position": position,
+                     "name": name,
+                     "name_normalized": " ".join(name.split()).casefold(),
+                  }
+               )
+         for column, kind in POINT_COLUMNS.items():
+            for position, text in enumerate(_split(row[column], "\n")):
+               point_rows.append(
+                  {"analysis_id": row["id"], "kind": kind, "position": position, "text": text}
+               )
+
+      if skill_rows:
+         bind.execute(skills.insert(), skill_rows)
+      if point_rows:
+         bind.execute(points.insert(), point_rows)
+      last_id = rows[-1]["id"]
+
+   with op.batch_alter_table("resume_analyses") as batch:
+      for column in (*SKILL_COLUMNS, *POINT_COLUMNS):
+         batch.drop_column(column)
+      batch.create_index("ix_resume_analyses_resume_id", ["resume_id"])
+
+
+def downgrade() -> None:
+   with op.batch_alter_table("resume_analyses") as batch:
+      batch.drop_index("ix_resume_analyses_resume_id")
+      for column in (*SKILL_COLUMNS, *POINT_COLUMNS):
+         batch.add_column(sa.Column(column, sa.Text(), nullable=True))
+
+   bind = op.get_bind()
+   last_id = 0
+   while True:
+      ids = bind.execute(
+         sa.select(analyses.c.id)
+         .where(analyses.c.id > last_id)
+         .order_by(analyses.c.id)
+         .limit(CHUNK_SIZE)
+      ).scalars().all()
+      if not ids:
+         break
+
+      values = {analysis_id: {} for analysis_id in ids}
+      for column, kind in SKILL_COLUMNS.items():
+         for analysis_id, name in bind.execute(
+            sa.select(skills.c.analysis_id, skills.c.name)
+            .where(skills.c.analysis_id.in_(ids), skills.c.kind == kind)
+            .order_by(skills.c.analysis_id, skills.c.position)
+         ):
+            values[analysis_id].setdefault(column, []).append(name)
+      for column, kind in POINT_COLUMNS.items():
+         for analysis_id, text in bind.execute(
+            sa.select(points.c.analysis_id, points.c.text)
+            .where(points.c.analysis_id.in_(ids), points.c.kind == kind)
+            .order_by(points.c.analysis_id, points.c.position)
+         ):
+            values[analysis_id].setdefault(column, []).append(text)
+
+      for analysis_id, columns in values.items():
+         if not columns:
+            continue
+         bind.execute(
+            analyses.update()
+            .where(analyses.c.id == analysis_id)
+            .values(
+               {
+                  column: ("," if column in SKILL_COLUMNS else "\n").join(items)
+                  for column, items in columns.items()
+               }
+            )
+         )
+      last_id = ids[-1]
+
+   op.drop_table("analysis_points")
+   op.drop_table("analysis_skills")
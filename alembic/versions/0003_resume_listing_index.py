@@ -0,0 +1,27 @@
+"""Composite index for keyset pagination of resume listings
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+   op.create_index(
+      "ix_resumes_user_id_created_at",
+      "resumes",
+      ["user_id", "created_at", "id"],
+      if_not_exists=True,
+   )
+
+
+def downgrade() -> None:
+   op.drop_index("ix_resumes_user_id_created_at", table_name="resumes")
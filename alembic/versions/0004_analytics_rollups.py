@@ -0,0 +1,67 @@
+"""Rollup tables for the analytics endpoints
+
+Creates analytics_scores, analytics_gaps and analytics_skills_daily. They
+are filled by the application: incrementally as analyses are written, and
+in full by the compaction job, which also backfills existing analyses on
+its first run.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _user_id() -> sa.Column:
+   return sa.Column(
+      "user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+   )
+
+
+def upgrade() -> None:
+   existing = set(sa.inspect(op.get_bind()).get_table_names())
+   # create_all() on app startup may already have created these
+   if "analytics_scores" not in existing:
+      op.create_table(
+         "analytics_scores",
+         _user_id(),
+         sa.Column("target_role", sa.String(length=200), primary_key=True),
+         sa.Column("bucket", sa.Integer(), primary_key=True),
+         sa.Column("analyses", sa.Integer(), nullable=False),
+         sa.Column("score_sum", sa.Integer(), nullable=False),
+      )
+   if "analytics_gaps" not in existing:
+      op.create_table(
+         "analytics_gaps",
+         _user_id(),
+         sa.Column("target_role", sa.String(length=200), primary_key=True),
+         sa.Column("gap_key", sa.String(length=255), primary_key=True),
+         sa.Column("gap", sa.Text(), nullable=False),
+         sa.Column("analyses", sa.Integer(), nullable=False),
+      )
+      op.create_index("ix_analytics_gaps_user_analyses", "analytics_gaps", ["user_id", "analyses"])
+   if "analytics_skills_daily" not in existing:
+      op.create_table(
+         "analytics_skills_daily",
+         _user_id(),
+         sa.Column("kind", sa.String(length=16), primary_key=True),
+         sa.Column("day", sa.Date(), primary_key=True),
+         sa.Column("name_normalized", sa.String(length=255), primary_key=True),
+         sa.Column("name", sa.String(length=255), nullable=False),
+         sa.Column("analyses", sa.Integer(), nullable=False),
+      )
+
+
+def downgrade() -> None:
+   op.drop_table("analytics_skills_daily")
+   op.drop_index("ix_analytics_gaps_user_analyses", table_name="analytics_gaps")
+   op.drop_table("analytics_gaps")
+   op.drop_table("analytics_scores")
@@ -0,0 +1,34 @@
+"""Resume versions and analysis source digests
+
+Adds resumes.version, bumped on every text or job description edit, and
+resume_analyses.source_digest, the per-section digests an LLM analysis was
+computed from. Existing analyses have no digest, so each resume's next
+analysis is a full one.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+   op.add_column(
+      "resumes", sa.Column("version", sa.Integer(), nullable=False, server_default="1")
+   )
+   op.add_column("resume_analyses", sa.Column("source_digest", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+   with op.batch_alter_table("resume_analyses") as batch:
+      batch.drop_column("source_digest")
+   with op.batch_alter_table("resumes") as batch:
+      batch.drop_column("version")
@@ -0,0 +1,113 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.config import get_settings
+from app.core.metrics import service_stats
+from app.models.user import User
+
+settings = get_settings()
+
+
+class AuthCache:
+   # Two bounded LRU maps with TTL: raw token -> decoded claims (skips the JWT
+   # signature check) and user id -> detached User snapshot (skips the SQL
+   # lookup). Entries are per process; writes to a User through the ORM evict
+   # it here, other workers see the change once their TTL lapses.
+
+   def __init__(self, max_entries: int, ttl_seconds: int):
+      self.max_entries = max_entries
+      self.ttl_seconds = ttl_seconds
+      self._tokens: OrderedDict[str, tuple[float, Dict[str, Any]]] = OrderedDict()
+      self._users: OrderedDict[int, tuple[float, User]] = OrderedDict()
+      self._lock = threading.Lock()
+      self.token_hits = 0
+      self.user_hits = 0
+      self.misses = 0
+
+   def _get(self, store: OrderedDict, key) -> Optional[Any]:
+      with self._lock:
+         entry = store.get(key)
+         if entry is None:
+            return None
+         expires_at, value = entry
+         if expires_at < time.monotonic():
+            del store[key]
+            return None
+         store.move_to_end(key)
+         return value
+
+   def _put(self, store: OrderedDict, key, value, ttl: float) -> None:
+      with self._lock:
+         store[key] = (time.monotonic() + min(ttl, self.ttl_seconds), value)
+         store.move_to_end(key)
+         while len(store) > self.max_entries:
+            store.popitem(last=False)
+
+   def get_claims(self, token: str) -> Optional[Dict[str, Any]]:
+      claims = self._get(self._tokens, token)
+      if claims is not None:
+         self.token_hits += 1
+      return claims
+
+   def put_claims(self, token: str, claims: Dict[str, Any]) -> None:
+      # Never serve a token from cache past its own expiry
+      exp = claims.get("exp")
+      ttl = exp - time.time() if exp is not None else self.ttl_seconds
+      if ttl > 0:
+         self._put(self._tokens, token, claims, ttl)
+
+   def get_user(self, user_id: int) -> Optional[User]:
+      user = self._get(self._users, user_id)
+      if user is not None:
+         self.user_hits += 1
+      else:
+         self.misses += 1
+      return user
+
+   def put_user(self, user: User) -> None:
+      snapshot = User(
+         id=user.id,
+         email=user.email,
+         full_name=user.full_name,
+         hashed_password=user.hashed_password,
+         created_at=user.created_at,
+      )
+      make_transient_to_detached(snapshot)
+      self._put(self._users, user.id, snapshot, self.ttl_seconds)
+
+   def invalidate_user(self, user_id: int) -> None:
+      with self._lock:
+         self._users.pop(user_id, None)
+
+   def clear(self) -> None:
+      with self._lock:
+         self._tokens.clear()
+         self._users.clear()
+
+   def stats(self) -> Dict[str, int]:
+      return {
+         "tokens": len(self._tokens),
+         "users": len(self._users),
+         "max_entries": self.max_entries,
+         "token_hits": self.token_hits,
+         "user_hits": self.user_hits,
+         "misses": self.misses,
+      }
+
+
+auth_cache = AuthCache(
+   max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+   ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS,
+)
+service_stats.register("auth_cache", auth_cache.stats)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _evict_user(mapper, connection, target: User) -> None:
+   auth_cache.invalidate_user(target.id)
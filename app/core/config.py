@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import AnyUrl
 
@@ -10,6 +11,8 @@ class Settings(BaseSettings):
 
    # Database
    DATABASE_URL: str = "sqlite:///./app.db"
+   # Derived from DATABASE_URL (e.g. sqlite -> sqlite+aiosqlite) when unset
+   ASYNC_DATABASE_URL: str | None = None
 
    # Mongo
    MONGO_URI: str = "mongodb://localhost:27017"
@@ -20,12 +23,144 @@ class Settings(BaseSettings):
    ALGORITHM: str = "HS256"
    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
 
+   # Authenticated-user cache (decoded tokens + user rows)
+   AUTH_CACHE_ENABLED: bool = True
+   AUTH_CACHE_MAX_ENTRIES: int = 10000
+   AUTH_CACHE_TTL_SECONDS: int = 60
+
+   # Password hashing (Argon2id); existing hashes are upgraded on next login
+   ARGON2_TIME_COST: int = 3
+   ARGON2_MEMORY_COST_KIB: int = 65536
+   ARGON2_PARALLELISM: int = 4
+   PASSWORD_HASH_WORKERS: int = 2
+   PASSWORD_HASH_EXECUTOR: Literal["thread", "process"] = "thread"
+
    # Azure OpenAI
    AZURE_OPENAI_ENDPOINT: AnyUrl | None = None
    AZURE_OPENAI_API_KEY: str | None = None
    AZURE_OPENAI_DEPLOYMENT: str | None = None
    AZURE_OPENAI_API_VERSION: str = "2024-05-01-preview"
 
+   # OpenAI or any OpenAI-compatible server; base URL includes /v1
+   OPENAI_BASE_URL: AnyUrl | None = None
+   OPENAI_API_KEY: str | None = None
+   OPENAI_MODEL: str | None = None
+
+   # LLM backend routing. LLM_BACKENDS lists the backends to route between
+   # (azure, openai, local); unconfigured ones are skipped. The local
+   # rule-based backend answers only when every other backend failed if
+   # LLM_LOCAL_FALLBACK is set, or always if "local" is listed.
+   LLM_BACKENDS: str = "azure,openai"
+   LLM_LOCAL_FALLBACK: bool = False
+   LLM_ROUTER_WINDOW: int = 200
+   LLM_ROUTER_ERROR_PENALTY: float = 4.0
+   LLM_ROUTER_EXPLORE_RATIO: float = 0.05
+   # Hedging: a request slower than the backend's LLM_HEDGE_QUANTILE latency
+   # (known after LLM_HEDGE_MIN_SAMPLES requests) is sent again elsewhere;
+   # at most LLM_HEDGE_MAX_RATIO of requests are hedged
+   LLM_HEDGE_ENABLED: bool = True
+   LLM_HEDGE_QUANTILE: float = 0.95
+   LLM_HEDGE_MIN_SAMPLES: int = 20
+   LLM_HEDGE_MIN_DELAY_SECONDS: float = 1.0
+   LLM_HEDGE_MAX_RATIO: float = 0.1
+   # Follow-up requests asking the model only for fields its reply lacked
+   # (after local repair); 0 keeps incomplete results as they are
+   LLM_OUTPUT_FOLLOWUP_ATTEMPTS: int = 1
+
+   # LLM HTTP client (shared, pooled)
+   LLM_HTTP2: bool = True
+   LLM_MAX_CONNECTIONS: int = 100
+   LLM_MAX_KEEPALIVE_CONNECTIONS: int = 20
+   LLM_KEEPALIVE_EXPIRY: float = 30.0
+   LLM_CONNECT_TIMEOUT: float = 5.0
+   LLM_READ_TIMEOUT: float = 30.0
+   LLM_WRITE_TIMEOUT: float = 10.0
+   LLM_POOL_TIMEOUT: float = 5.0
+
+   # LLM call scheduling, per backend (0 disables a per-minute limit)
+   LLM_MAX_IN_FLIGHT: int = 16
+   LLM_REQUESTS_PER_MINUTE: int = 300
+   LLM_TOKENS_PER_MINUTE: int = 120000
+   LLM_COMPLETION_TOKENS_ESTIMATE: int = 800
+   LLM_MAX_RETRIES: int = 4
+   LLM_BACKOFF_BASE_SECONDS: float = 0.5
+   LLM_BACKOFF_MAX_SECONDS: float = 30.0
+   LLM_CIRCUIT_FAILURE_THRESHOLD: int = 5
+   LLM_CIRCUIT_RESET_SECONDS: float = 30.0
+
+   # Prompt budgeting (token counts use tiktoken when its encoding is available)
+   LLM_TOKENIZER_ENCODING: str = "o200k_base"
+   LLM_PROMPT_COMPACTION: bool = True
+   LLM_RESUME_TOKEN_BUDGET: int = 6000
+   LLM_JD_TOKEN_BUDGET: int = 1500
+   LLM_MAX_CHUNKS: int = 4
+
+   # Prometheus /metrics endpoint and hot-path instrumentation
+   METRICS_ENABLED: bool = True
+
+   # Analysis result cache
+   ANALYSIS_CACHE_ENABLED: bool = True
+   ANALYSIS_CACHE_MAX_ENTRIES: int = 1024
+   ANALYSIS_CACHE_TTL_SECONDS: int = 86400
+   ANALYSIS_CACHE_PERSISTENT: bool = True
+   # Share one LLM call between concurrent identical analyses
+   ANALYSIS_COALESCE_ENABLED: bool = True
+   # Delta-aware re-analysis: reuse the prior analysis when no section changed,
+   # send only changed sections when they are at most this share of the text
+   ANALYSIS_DELTA_ENABLED: bool = True
+   ANALYSIS_DELTA_MAX_CHANGED_RATIO: float = 0.5
+   ANALYSIS_DELTA_MAX_DEPTH: int = 3
+   # Previous versions kept per resume in Mongo resume_texts
+   RESUME_VERSIONS_MAX: int = 50
+
+   # Background analysis jobs
+   JOB_WORKER_CONCURRENCY: int = 4
+   JOB_QUEUE_MAX_SIZE: int = 1000
+   JOB_MAX_ATTEMPTS: int = 3
+   JOB_RETRY_BACKOFF_SECONDS: float = 2.0
+   JOB_WAIT_MAX_SECONDS: float = 30.0
+   # RUNNING jobs not heartbeating for JOB_STALE_SECONDS are requeued at startup
+   JOB_HEARTBEAT_SECONDS: float = 15.0
+   JOB_STALE_SECONDS: float = 120.0
+
+   # Batch analysis
+   BATCH_ANALYZE_CONCURRENCY: int = 8
+   BATCH_ANALYZE_MAX_PAIRS: int = 5000
+   BATCH_ANALYZE_WRITE_CHUNK: int = 50
+
+   # Bulk resume import (POST /resumes/bulk and python -m app.services.bulk_import)
+   BULK_IMPORT_WORKERS: int = 2
+   BULK_IMPORT_BATCH_SIZE: int = 500
+   BULK_IMPORT_MAX_FILE_BYTES: int = 5_000_000
+
+   # PDF/DOCX text extraction (POST /resumes/upload)
+   EXTRACTION_WORKERS: int = 2
+   EXTRACTION_TIMEOUT_SECONDS: float = 20.0
+   EXTRACTION_MAX_FILE_BYTES: int = 10_000_000
+   EXTRACTION_MAX_PAGES: int = 50
+   EXTRACTION_CACHE_MAX_ENTRIES: int = 256
+
+   # Analytics rollups (/analytics/*); 0 disables the periodic job
+   ANALYTICS_COMPACTION_INTERVAL_SECONDS: float = 21600
+   ANALYTICS_LLM_REFRESH_SECONDS: float = 300
+   ANALYTICS_LLM_BACKFILL_DAYS: int = 90
+
+   # Resume/job matching (POST /match)
+   EMBEDDING_INDEX_PATH: str = "./embeddings"
+   EMBEDDING_DIM: int = 512
+   # float16 halves the index size but is slower to score on most CPUs
+   EMBEDDING_DTYPE: str = "float32"
+   MATCH_ANN_MIN_ROWS: int = 50000
+   MATCH_ANN_NPROBE: int = 16
+
+   # Background Mongo writer (resume_texts mirror, ai_logs)
+   MONGO_WRITER_ENABLED: bool = True
+   MONGO_WRITER_QUEUE_MAX_SIZE: int = 10000
+   MONGO_WRITER_BATCH_SIZE: int = 500
+   MONGO_WRITER_FLUSH_INTERVAL_SECONDS: float = 0.5
+   MONGO_WRITER_ENQUEUE_TIMEOUT_SECONDS: float = 1.0
+   MONGO_WRITER_SPILL_PATH: str = "./mongo_spill.jsonl"
+
    model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8"
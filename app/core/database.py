@@ -1,22 +1,67 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.pool import StaticPool
 
 from app.core.config import get_settings
+from app.core.metrics import instrument_engine
 
 settings = get_settings()
 
+# Sync driver prefix -> asyncio driver used on the request path
+ASYNC_DRIVERS = {
+   "sqlite://": "sqlite+aiosqlite://",
+   "sqlite+pysqlite://": "sqlite+aiosqlite://",
+   "postgresql://": "postgresql+asyncpg://",
+   "postgresql+psycopg2://": "postgresql+asyncpg://",
+   "mysql://": "mysql+aiomysql://",
+   "mysql+pymysql://": "mysql+aiomysql://",
+}
+
+
+def get_async_database_url() -> str:
+   if settings.ASYNC_DATABASE_URL:
+      return settings.ASYNC_DATABASE_URL
+   for prefix, async_prefix in ASYNC_DRIVERS.items():
+      if settings.DATABASE_URL.startswith(prefix):
+         return async_prefix + settings.DATABASE_URL[len(prefix):]
+   return settings.DATABASE_URL
+
+
+def _enable_sqlite_wal(dbapi_connection, connection_record):
+   # WAL lets readers proceed while the async and sync engines write
+   cursor = dbapi_connection.cursor()
+   cursor.execute("PRAGMA journal_mode=WAL")
+   cursor.execute("PRAGMA synchronous=NORMAL")
+   cursor.close()
+
+
 if settings.DATABASE_URL.startswith("sqlite"):
    engine: Engine = create_engine(
       settings.DATABASE_URL,
       connect_args={"check_same_thread": False},
       poolclass=StaticPool,
    )
+   async_engine: AsyncEngine = create_async_engine(
+      get_async_database_url(),
+      connect_args={"timeout": 30},
+   )
+   if ":memory:" not in settings.DATABASE_URL:
+      event.listen(engine, "connect", _enable_sqlite_wal)
+      event.listen(async_engine.sync_engine, "connect", _enable_sqlite_wal)
 else:
    engine = create_engine(settings.DATABASE_URL)
+   async_engine = create_async_engine(get_async_database_url(), pool_pre_ping=True)
+
+if settings.METRICS_ENABLED:
+   instrument_engine(engine)
+   instrument_engine(async_engine.sync_engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(
+   async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 
 class Base(DeclarativeBase):
    pass
@@ -27,3 +72,7 @@ def get_db():
       yield db
    finally:
       db.close()
+
+async def get_async_db():
+   async with AsyncSessionLocal() as db:
+      yield db
@@ -0,0 +1,72 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+# Hashes made with other Argon2 parameters still verify and are flagged for rehash
+pwd_context = CryptContext(
+   schemes=["argon2"],
+   deprecated="auto",
+   argon2__rounds=settings.ARGON2_TIME_COST,
+   argon2__memory_cost=settings.ARGON2_MEMORY_COST_KIB,
+   argon2__parallelism=settings.ARGON2_PARALLELISM,
+)
+
+
+def hash_password(password: str) -> str:
+   # Truncate to bcrypt 72-byte limit (safe for all passwords)
+   return pwd_context.hash(password[:72])
+
+
+def verify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+   return pwd_context.verify_and_update(password, hashed_password)
+
+
+class PasswordHasher:
+   # Runs Argon2 on its own small pool so a login burst queues here instead of
+   # occupying the threadpool that serves sync routes and blocking DB calls.
+   # argon2-cffi releases the GIL, so threads scale with cores; "process"
+   # isolates hashing from the API process entirely.
+
+   def __init__(self, workers: int, kind: str = "thread"):
+      self.workers = workers
+      self.kind = kind
+      self._executor: Optional[Executor] = None
+
+   def _get_executor(self) -> Executor:
+      if self._executor is None:
+         if self.kind == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+         else:
+            self._executor = ThreadPoolExecutor(
+               max_workers=self.workers, thread_name_prefix="password-hash"
+            )
+      return self._executor
+
+   async def hash(self, password: str) -> str:
+      loop = asyncio.get_running_loop()
+      return await loop.run_in_executor(self._get_executor(), hash_password, password)
+
+   async def verify_and_update(
+      self, password: str, hashed_password: str
+   ) -> Tuple[bool, Optional[str]]:
+      loop = asyncio.get_running_loop()
+      return await loop.run_in_executor(
+         self._get_executor(), verify_and_update, password, hashed_password
+      )
+
+   def shutdown(self) -> None:
+      if self._executor is not None:
+         self._executor.shutdown(wait=True)
+         self._executor = None
+
+
+password_hasher = PasswordHasher(
+   workers=settings.PASSWORD_HASH_WORKERS,
+   kind=settings.PASSWORD_HASH_EXECUTOR,
+)
@@ -0,0 +1,230 @@
+import os
+import re
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from prometheus_client import (
+   CONTENT_TYPE_LATEST,
+   REGISTRY,
+   CollectorRegistry,
+   Counter,
+   Gauge,
+   Histogram,
+   generate_latest,
+   multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+from pymongo import monitoring
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+_LLM_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0, 120.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+   "http_request_duration_seconds",
+   "HTTP request latency by route template",
+   ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+   "http_requests_in_flight",
+   "HTTP requests currently being served",
+   multiprocess_mode="livesum",
+)
+DB_QUERY_SECONDS = Histogram(
+   "db_query_duration_seconds",
+   "SQL statement execution time",
+   ["operation"],
+   buckets=_FAST_BUCKETS,
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+   "db_queries_per_request",
+   "SQL statements executed while serving one HTTP request",
+   ["method", "route"],
+   buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+MONGO_COMMAND_SECONDS = Histogram(
+   "mongo_command_duration_seconds",
+   "MongoDB command round-trip time",
+   ["command", "outcome"],
+   buckets=_FAST_BUCKETS,
+)
+LLM_REQUEST_SECONDS = Histogram(
+   "llm_request_duration_seconds",
+   "LLM call latency including scheduling and retries",
+   ["mode", "outcome"],
+   buckets=_LLM_BUCKETS,
+)
+LLM_TOKENS = Counter(
+   "llm_tokens",
+   "Tokens reported in the usage field of LLM responses",
+   ["kind"],
+)
+LLM_RETRIES = Counter(
+   "llm_retries",
+   "LLM request attempts that were retried",
+   ["reason"],
+)
+LLM_BACKEND_REQUEST_SECONDS = Histogram(
+   "llm_backend_request_duration_seconds",
+   "Latency of each request the LLM router sent to a backend",
+   ["backend", "outcome"],
+   buckets=_LLM_BUCKETS,
+)
+LLM_HEDGED_REQUESTS = Counter(
+   "llm_hedged_requests",
+   "LLM requests that were hedged, by which copy answered first",
+   ["outcome"],
+)
+LLM_OUTPUT_PARSES = Counter(
+   "llm_output_parses",
+   "Model replies parsed: clean, repaired locally, incomplete (fields missing) or failed",
+   ["outcome"],
+)
+LLM_PROMPT_TOKENS_SAVED = Counter(
+   "llm_prompt_tokens_saved",
+   "Prompt tokens removed by compaction and trimming",
+)
+
+_METRIC_NAME = re.compile(r"[^a-zA-Z0-9_]")
+
+
+class ServiceStats(Collector):
+   # Exports the stats() of in-process services (caches, LLM router, Mongo
+   # writer, ...) as app_<subsystem>_<key> gauges, read at scrape time.
+   # Nested {name: {...}} dicts become a label ("backends" -> backend="azure"),
+   # strings an info-style series with the value as a label; None is skipped.
+   # The values belong to the process serving the scrape: under
+   # PROMETHEUS_MULTIPROC_DIR they carry its pid.
+
+   def __init__(self):
+      self._sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+   def register(self, subsystem: str, stats: Callable[[], Dict[str, Any]]) -> None:
+      self._sources[subsystem] = stats
+
+   def collect(self) -> Iterator[GaugeMetricFamily]:
+      base = {"pid": str(os.getpid())} if os.environ.get("PROMETHEUS_MULTIPROC_DIR") else {}
+      families: Dict[str, GaugeMetricFamily] = {}
+      for subsystem, stats in self._sources.items():
+         for name, labels, value in _flatten(f"app_{subsystem}", stats(), base):
+            family = families.get(name)
+            if family is None:
+               family = families[name] = GaugeMetricFamily(
+                  name, f"{subsystem} stats()", labels=list(labels)
+               )
+            family.add_metric(list(labels.values()), value)
+      yield from families.values()
+
+
+def _flatten(prefix: str, stats: Dict[str, Any], labels: Dict[str, str]):
+   for key, value in stats.items():
+      name = f"{prefix}_{_METRIC_NAME.sub('_', key)}"
+      if isinstance(value, dict):
+         if value and all(isinstance(v, dict) for v in value.values()):
+            label = _METRIC_NAME.sub("_", key).rstrip("s")
+            for item, nested in value.items():
+               yield from _flatten(name, nested, {**labels, label: str(item)})
+         else:
+            yield from _flatten(name, value, labels)
+      elif isinstance(value, str):
+         yield f"{name}_info", {**labels, _METRIC_NAME.sub("_", key): value}, 1.0
+      elif isinstance(value, (int, float)):
+         yield name, labels, float(value)
+
+
+service_stats = ServiceStats()
+REGISTRY.register(service_stats)
+
+# SQL statements executed by the current request; None outside a request
+_request_queries: ContextVar[Optional[List[int]]] = ContextVar("request_queries", default=None)
+
+_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+   conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+   started = conn.info["query_started"].pop()
+   operation = statement.lstrip()[:6].upper()
+   DB_QUERY_SECONDS.labels(operation if operation in _OPERATIONS else "OTHER").observe(
+      time.perf_counter() - started
+   )
+   queries = _request_queries.get()
+   if queries is not None:
+      queries[0] += 1
+
+
+def _handle_error(context):
+   if context.connection is not None:
+      stack = context.connection.info.get("query_started")
+      if stack:
+         stack.pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+   event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+   event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+   event.listen(engine, "handle_error", _handle_error)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+   # pymongo already times each command; just record its duration
+   def started(self, event):
+      pass
+
+   def succeeded(self, event):
+      MONGO_COMMAND_SECONDS.labels(event.command_name, "ok").observe(event.duration_micros / 1e6)
+
+   def failed(self, event):
+      MONGO_COMMAND_SECONDS.labels(event.command_name, "error").observe(event.duration_micros / 1e6)
+
+
+class MetricsMiddleware:
+   # Plain ASGI middleware (no BaseHTTPMiddleware task/queue per request).
+   # Routes are labelled by their template so ids don't explode cardinality.
+
+   def __init__(self, app):
+      self.app = app
+
+   async def __call__(self, scope, receive, send):
+      if scope["type"] != "http":
+         await self.app(scope, receive, send)
+         return
+
+      status = 500
+
+      async def send_wrapper(message):
+         nonlocal status
+         if message["type"] == "http.response.start":
+            status = message["status"]
+         await send(message)
+
+      queries = [0]
+      token = _request_queries.set(queries)
+      HTTP_REQUESTS_IN_FLIGHT.inc()
+      started = time.perf_counter()
+      try:
+         await self.app(scope, receive, send_wrapper)
+      finally:
+         elapsed = time.perf_counter() - started
+         HTTP_REQUESTS_IN_FLIGHT.dec()
+         _request_queries.reset(token)
+         route = getattr(scope.get("route"), "path", None) or "unmatched"
+         HTTP_REQUEST_SECONDS.labels(scope["method"], route, str(status)).observe(elapsed)
+         DB_QUERIES_PER_REQUEST.labels(scope["method"], route).observe(queries[0])
+
+
+def render_metrics() -> Tuple[bytes, str]:
+   # With several uvicorn/gunicorn workers, set PROMETHEUS_MULTIPROC_DIR and
+   # every worker's samples are aggregated here
+   if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+      registry = CollectorRegistry()
+      multiprocess.MultiProcessCollector(registry)
+      registry.register(service_stats)
+      return generate_latest(registry), CONTENT_TYPE_LATEST
+   return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
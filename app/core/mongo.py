@@ -1,13 +1,23 @@
-from pymongo import MongoClient
+from pymongo import AsyncMongoClient, MongoClient
 from app.core.config import get_settings
+from app.core.metrics import MongoCommandMetrics
 
 settings = get_settings()
 
-mongo_client = MongoClient(settings.MONGO_URI)
+event_listeners = [MongoCommandMetrics()] if settings.METRICS_ENABLED else []
+
+mongo_client = MongoClient(settings.MONGO_URI, event_listeners=event_listeners)
 mongo_db = mongo_client[settings.MONGO_DB_NAME]
 
+# asyncio-native client used on the request path so Mongo I/O never blocks the loop
+async_mongo_client = AsyncMongoClient(settings.MONGO_URI, event_listeners=event_listeners)
+async_mongo_db = async_mongo_client[settings.MONGO_DB_NAME]
+
 def get_mongo_db():
     try:
         yield mongo_db
     finally:
         pass  # Mongo connections are safe to reuse
+
+async def get_async_mongo_db():
+    yield async_mongo_db
@@ -4,16 +4,17 @@ from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.auth_cache import auth_cache
 from app.core.config import get_settings
-from app.core.database import get_db
+from app.core.database import get_async_db
+from app.core.hashing import pwd_context, hash_password, password_hasher
 from app.models.user import User
 
 settings = get_settings()
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 oauth2_scheme = HTTPBearer()
 
 
@@ -22,8 +23,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 
 def get_password_hash(password: str) -> str:
-   # Truncate to bcrypt 72-byte limit (safe for all passwords)
-   return pwd_context.hash(password[:72])
+   return hash_password(password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -40,21 +40,40 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
    return encoded_jwt
 
 
-def get_user_by_email(db: Session, email: str) -> Optional[User]:
-   return db.query(User).filter(User.email == email).first()
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+   result = await db.execute(select(User).where(User.email == email))
+   return result.scalars().first()
 
 
-def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
-   user = get_user_by_email(db, email)
+async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
+   if settings.AUTH_CACHE_ENABLED:
+      cached = auth_cache.get_user(user_id)
+      if cached is not None:
+         # Attach the snapshot to this session without a SELECT
+         return await db.merge(cached, load=False)
+   user = await db.get(User, user_id)
+   if user is not None and settings.AUTH_CACHE_ENABLED:
+      auth_cache.put_user(user)
+   return user
+
+
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
+   user = await get_user_by_email(db, email)
    if not user:
       return None
-   if not verify_password(password, user.hashed_password):
+   valid, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+   if not valid:
       return None
+   if new_hash is not None:
+      # Argon2 parameters changed since this hash was made
+      user.hashed_password = new_hash
+      await db.commit()
    return user
 
 
 async def get_current_user(
-   credentials: HTTPAuthorizationCredentials = Depends(oauth2_scheme), db: Session = Depends(get_db)
+   credentials: HTTPAuthorizationCredentials = Depends(oauth2_scheme),
+   db: AsyncSession = Depends(get_async_db),
 ) -> User:
    token = credentials.credentials
    credentials_exception = HTTPException(
@@ -62,19 +81,28 @@ async def get_current_user(
       detail="Could not validate credentials.",
       headers={"WWW-Authenticate": "Bearer"},
    )
-   try:
-      payload = jwt.decode(
-         token,
-         settings.SECRET_KEY,
-         algorithms=[settings.ALGORITHM],
-      )
-      email: str | None = payload.get("sub")
-      if email is None:
+   payload = auth_cache.get_claims(token) if settings.AUTH_CACHE_ENABLED else None
+   if payload is None:
+      try:
+         payload = jwt.decode(
+            token,
+            settings.SECRET_KEY,
+            algorithms=[settings.ALGORITHM],
+         )
+      except JWTError:
          raise credentials_exception
-   except JWTError:
+      if settings.AUTH_CACHE_ENABLED:
+         auth_cache.put_claims(token, payload)
+
+   user_id: int | None = payload.get("uid")
+   email: str | None = payload.get("sub")
+   if user_id is not None:
+      user = await get_user_by_id(db, user_id)
+   elif email is not None:
+      # Tokens issued before "uid" was added
+      user = await get_user_by_email(db, email=email)
+   else:
       raise credentials_exception
-
-   user = get_user_by_email(db, email=email)
    if user is None:
       raise credentials_exception
    return user
@@ -1,15 +1,56 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from app.core.database import Base, engine  
+from app.core.database import Base, engine, async_engine
 from app.core.config import get_settings
-from app.routes import auth, resumes
+from app.routes import analytics, auth, jobs, match, resumes
+from app.core.hashing import password_hasher
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.core.mongo import async_mongo_client, async_mongo_db
+from app.services.llm_backends import init_http_client, close_http_client
+from app.services.analysis_cache import ensure_cache_indexes
+from app.services.analytics import analytics_rollups
+from app.services.bulk_import import bulk_importer
+from app.services.embeddings import embedding_index
+from app.services.job_queue import job_queue
+from app.services.local_scorer import local_scorer
+from app.services.mongo_writer import mongo_writer
+from app.services.search_index import search_index
+from app.services.text_extraction import text_extractor
 
 settings = get_settings()
 
 # Create tables 
 Base.metadata.create_all(bind=engine)
+search_index.bootstrap(engine)
+embedding_index.bootstrap(engine)
+local_scorer.bootstrap(engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+   await init_http_client()
+   if settings.ANALYSIS_CACHE_PERSISTENT:
+      await ensure_cache_indexes(async_mongo_db)
+   if settings.MONGO_WRITER_ENABLED:
+      await mongo_writer.start()
+   await job_queue.start()
+   await analytics_rollups.start(async_mongo_db)
+   yield
+   await analytics_rollups.stop()
+   await job_queue.stop()
+   await mongo_writer.stop()
+   password_hasher.shutdown()
+   bulk_importer.shutdown()
+   text_extractor.shutdown()
+   embedding_index.close()
+   await close_http_client()
+   await async_engine.dispose()
+   await async_mongo_client.close()
 
-app = FastAPI(title=settings.APP_NAME)
+
+app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
 
 # CORS – can be adjust origins for frontend later
 app.add_middleware(
@@ -19,10 +60,20 @@ app.add_middleware(
    allow_methods=["*"],
    allow_headers=["*"],
 )
+if settings.METRICS_ENABLED:
+   app.add_middleware(MetricsMiddleware)
 
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+   body, content_type = render_metrics()
+   return Response(content=body, media_type=content_type)
+
 app.include_router(auth.router)
 app.include_router(resumes.router)
+app.include_router(jobs.router)
+app.include_router(match.router)
+app.include_router(analytics.router)
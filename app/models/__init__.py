@@ -1,6 +1,19 @@
 from app.core.database import Base  # re-export for alembic
 from .user import User
 from .resume import Resume
-from .analysis import ResumeAnalysis
+from .analysis import ResumeAnalysis, AnalysisSkill, AnalysisPoint
+from .job import AnalysisJob
+from .analytics import ScoreRollup, GapRollup, SkillDailyRollup
 
-__all__ = ["User", "Resume", "ResumeAnalysis", "Base"]
+__all__ = [
+   "User",
+   "Resume",
+   "ResumeAnalysis",
+   "AnalysisSkill",
+   "AnalysisPoint",
+   "AnalysisJob",
+   "ScoreRollup",
+   "GapRollup",
+   "SkillDailyRollup",
+   "Base",
+]
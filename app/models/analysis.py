@@ -1,24 +1,112 @@
 from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import JSON, Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
 
 
+class SkillKind:
+   TECHNICAL = "technical"
+   SOFT = "soft"
+
+
+class PointKind:
+   STRENGTH = "strength"
+   GAP = "gap"
+   SUGGESTION = "suggestion"
+
+
 class ResumeAnalysis(Base):
    __tablename__ = "resume_analyses"
 
    id = Column(Integer, primary_key=True, index=True)
-   resume_id = Column(Integer, ForeignKey("resumes.id", ondelete="CASCADE"))
+   resume_id = Column(Integer, ForeignKey("resumes.id", ondelete="CASCADE"), index=True)
    overall_score = Column(Integer, nullable=True)
    experience_summary = Column(Text, nullable=True)
-   skills_technical = Column(Text, nullable=True)  # store as comma-separated or JSON
-   skills_soft = Column(Text, nullable=True)
-   strengths = Column(Text, nullable=True)
-   gaps = Column(Text, nullable=True)
-   improvement_suggestions = Column(Text, nullable=True)
    created_at = Column(
       DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
    )
+   # What an LLM analysis was computed from, for delta-aware re-analysis:
+   # {"prompt", "job_description", "depth", "sections": {key: digest}}.
+   # NULL for local (fast mode) scores.
+   source_digest = Column(JSON(none_as_null=True), nullable=True)
 
    resume = relationship("Resume", back_populates="analyses")
+   skills = relationship(
+      "AnalysisSkill",
+      back_populates="analysis",
+      cascade="all, delete-orphan",
+      order_by="AnalysisSkill.position",
+      lazy="selectin",
+   )
+   points = relationship(
+      "AnalysisPoint",
+      back_populates="analysis",
+      cascade="all, delete-orphan",
+      order_by="AnalysisPoint.position",
+      lazy="selectin",
+   )
+
+   def _skill_names(self, kind: str) -> list[str]:
+      return [s.name for s in self.skills if s.kind == kind]
+
+   def _point_texts(self, kind: str) -> list[str]:
+      return [p.text for p in self.points if p.kind == kind]
+
+   @property
+   def skills_technical(self) -> list[str]:
+      return self._skill_names(SkillKind.TECHNICAL)
+
+   @property
+   def skills_soft(self) -> list[str]:
+      return self._skill_names(SkillKind.SOFT)
+
+   @property
+   def strengths(self) -> list[str]:
+      return self._point_texts(PointKind.STRENGTH)
+
+   @property
+   def gaps(self) -> list[str]:
+      return self._point_texts(PointKind.GAP)
+
+   @property
+   def improvement_suggestions(self) -> list[str]:
+      return self._point_texts(PointKind.SUGGESTION)
+
+
+class AnalysisSkill(Base):
+   __tablename__ = "analysis_skills"
+   __table_args__ = (
+      # Serves "how many resumes list X" and per-skill frequency counts
+      Index("ix_analysis_skills_kind_name_resume", "kind", "name_normalized", "resume_id"),
+   )
+
+   id = Column(Integer, primary_key=True)
+   analysis_id = Column(
+      Integer, ForeignKey("resume_analyses.id", ondelete="CASCADE"), nullable=False, index=True
+   )
+   resume_id = Column(Integer, ForeignKey("resumes.id", ondelete="CASCADE"), nullable=False)
+   kind = Column(String(16), nullable=False)
+   position = Column(Integer, nullable=False)
+   name = Column(String, nullable=False)
+   name_normalized = Column(String, nullable=False)
+
+   analysis = relationship("ResumeAnalysis", back_populates="skills")
+
+
+class AnalysisPoint(Base):
+   __tablename__ = "analysis_points"
+
+   id = Column(Integer, primary_key=True)
+   analysis_id = Column(
+      Integer, ForeignKey("resume_analyses.id", ondelete="CASCADE"), nullable=False, index=True
+   )
+   kind = Column(String(16), nullable=False)
+   position = Column(Integer, nullable=False)
+   text = Column(Text, nullable=False)
+
+   analysis = relationship("ResumeAnalysis", back_populates="points")
+
+
+def normalize_skill(name: str) -> str:
+   return " ".join(name.split()).casefold()
@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Date, ForeignKey, Index, Integer, String, Text
+
+from app.core.database import Base
+
+# Rollup tables behind /analytics/*. Rows are incremented in the same
+# transaction that writes an analysis (app.services.analytics) and rebuilt
+# from the analysis tables by the periodic compaction job. target_role is ""
+# when the resume has none, so it can be part of the primary key.
+
+
+class ScoreRollup(Base):
+   __tablename__ = "analytics_scores"
+
+   user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+   target_role = Column(String(200), primary_key=True)
+   # overall_score // 10, with 100 folded into 9
+   bucket = Column(Integer, primary_key=True)
+   analyses = Column(Integer, nullable=False, default=0)
+   score_sum = Column(Integer, nullable=False, default=0)
+
+
+class GapRollup(Base):
+   __tablename__ = "analytics_gaps"
+   __table_args__ = (Index("ix_analytics_gaps_user_analyses", "user_id", "analyses"),)
+
+   user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+   target_role = Column(String(200), primary_key=True)
+   gap_key = Column(String(255), primary_key=True)
+   gap = Column(Text, nullable=False)
+   analyses = Column(Integer, nullable=False, default=0)
+
+
+class SkillDailyRollup(Base):
+   __tablename__ = "analytics_skills_daily"
+
+   user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+   kind = Column(String(16), primary_key=True)
+   day = Column(Date, primary_key=True)
+   name_normalized = Column(String(255), primary_key=True)
+   name = Column(String(255), nullable=False)
+   analyses = Column(Integer, nullable=False, default=0)
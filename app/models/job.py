@@ -0,0 +1,35 @@
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey
+
+from app.core.database import Base
+
+
+class JobStatus:
+   QUEUED = "queued"
+   RUNNING = "running"
+   SUCCEEDED = "succeeded"
+   FAILED = "failed"
+
+   TERMINAL = (SUCCEEDED, FAILED)
+
+
+class AnalysisJob(Base):
+   __tablename__ = "analysis_jobs"
+
+   id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+   resume_id = Column(Integer, ForeignKey("resumes.id", ondelete="CASCADE"), nullable=False)
+   user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+   status = Column(String(16), nullable=False, default=JobStatus.QUEUED, index=True)
+   force = Column(Boolean, nullable=False, default=False)
+   attempts = Column(Integer, nullable=False, default=0)
+   error = Column(Text, nullable=True)
+   analysis_id = Column(Integer, ForeignKey("resume_analyses.id", ondelete="SET NULL"), nullable=True)
+   created_at = Column(
+      DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+   )
+   updated_at = Column(
+      DateTime(timezone=True),
+      default=lambda: datetime.now(timezone.utc),
+      onupdate=lambda: datetime.now(timezone.utc),
+   )
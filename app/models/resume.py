@@ -6,6 +6,7 @@ from sqlalchemy import (
    Text,
    DateTime,
    ForeignKey,
+   Index,
 )
 from sqlalchemy.orm import relationship
 
@@ -14,6 +15,10 @@ from app.core.database import Base
 
 class Resume(Base):
    __tablename__ = "resumes"
+   __table_args__ = (
+      # Keyset pagination of a user's resumes on (created_at, id)
+      Index("ix_resumes_user_id_created_at", "user_id", "created_at", "id"),
+   )
 
    id = Column(Integer, primary_key=True, index=True)
    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -21,6 +26,9 @@ class Resume(Base):
    resume_text = Column(Text, nullable=False)
    target_role = Column(String, nullable=True)
    job_description = Column(Text, nullable=True)
+   # Bumped whenever resume_text or job_description changes; earlier versions
+   # live in Mongo resume_texts (app.services.resume_versions)
+   version = Column(Integer, nullable=False, default=1, server_default="1")
    created_at = Column(
       DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
    )
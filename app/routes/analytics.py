@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.core.mongo import get_async_mongo_db
+from app.core.security import get_current_user
+from app.models.user import User
+from app.models.analysis import SkillKind
+from app.schemas.analytics import GapFrequency, LLMUsageDay, ScoreDistribution, SkillTrend
+from app.services.analytics import analytics_rollups
+
+# Dashboards over the caller's analyses, served from the analytics_* rollup
+# tables (and the analytics_llm_daily Mongo rollup) rather than the analyses
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+
+@router.get("/scores", response_model=list[ScoreDistribution])
+async def score_distribution(
+   target_role: str | None = None,
+   db: AsyncSession = Depends(get_async_db),
+   current_user: User = Depends(get_current_user),
+):
+   return await analytics_rollups.score_distribution(db, current_user.id, target_role)
+
+
+@router.get("/gaps", response_model=list[GapFrequency])
+async def top_gaps(
+   target_role: str | None = None,
+   limit: int = Query(20, ge=1, le=200),
+   db: AsyncSession = Depends(get_async_db),
+   current_user: User = Depends(get_current_user),
+):
+   return await analytics_rollups.top_gaps(db, current_user.id, limit, target_role)
+
+
+@router.get("/skills/trend", response_model=SkillTrend)
+async def skill_trend(
+   kind: str = Query(SkillKind.TECHNICAL, pattern="^(technical|soft)$"),
+   interval: str = Query("week", pattern="^(day|week|month)$"),
+   days: int = Query(90, ge=1, le=730),
+   limit: int = Query(10, ge=1, le=50),
+   skill: str | None = None,
+   db: AsyncSession = Depends(get_async_db),
+   current_user: User = Depends(get_current_user),
+):
+   return await analytics_rollups.skill_trend(
+      db, current_user.id, kind, interval, days, limit, skill=skill
+   )
+
+
+@router.get("/llm-usage", response_model=list[LLMUsageDay])
+async def llm_usage(
+   days: int = Query(30, ge=1, le=365),
+   mongo_db=Depends(get_async_mongo_db),
+   current_user: User = Depends(get_current_user),
+):
+   return await analytics_rollups.llm_usage(mongo_db, current_user.id, days)
@@ -1,9 +1,10 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.core.hashing import password_hasher
 from app.core.security import (
-   get_password_hash,
    create_access_token,
    authenticate_user,
 )
@@ -17,8 +18,10 @@ settings = get_settings()
 
 
 @router.post("/signup", response_model=UserRead, status_code=status.HTTP_201_CREATED)
-def signup(user_in: UserCreate, db: Session = Depends(get_db)):
-   existing = db.query(User).filter(User.email == user_in.email).first()
+async def signup(user_in: UserCreate, db: AsyncSession = Depends(get_async_db)):
+   existing = (
+      await db.execute(select(User.id).where(User.email == user_in.email))
+   ).first()
    if existing:
       raise HTTPException(
          status_code=status.HTTP_400_BAD_REQUEST,
@@ -27,17 +30,16 @@ def signup(user_in: UserCreate, db: Session = Depends(get_db)):
    user = User(
       email=user_in.email,
       full_name=user_in.full_name,
-      hashed_password=get_password_hash(user_in.password),
+      hashed_password=await password_hasher.hash(user_in.password),
    )
    db.add(user)
-   db.commit()
-   db.refresh(user)
+   await db.commit()
    return user
 
 
 @router.post("/login", response_model=Token)
-def login(form_data: LoginRequest, db: Session = Depends(get_db)):
-   user = authenticate_user(db, form_data.email, form_data.password)
+async def login(form_data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
+   user = await authenticate_user(db, form_data.email, form_data.password)
    if not user:
       raise HTTPException(
          status_code=status.HTTP_401_UNAUTHORIZED,
@@ -48,7 +50,7 @@ def login(form_data: LoginRequest, db: Session = Depends(get_db)):
       minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
    )
    access_token = create_access_token(
-      data={"sub": user.email},
+      data={"sub": user.email, "uid": user.id},
       expires_delta=access_token_expires,
    )
    return Token(access_token=access_token)
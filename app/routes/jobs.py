@@ -0,0 +1,93 @@
+import time
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import get_settings
+from app.core.database import get_async_db, AsyncSessionLocal
+from app.core.security import get_current_user
+from app.models.user import User
+from app.models.job import AnalysisJob, JobStatus
+from app.models.analysis import ResumeAnalysis
+from app.schemas.job import AnalysisJobRead
+from app.services.analysis_service import to_analysis_read
+from app.services.job_queue import job_queue
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+settings = get_settings()
+
+
+async def _load_job(db: AsyncSession, job_id: str, user_id: int) -> AnalysisJob:
+   job = await db.scalar(
+      select(AnalysisJob).where(AnalysisJob.id == job_id, AnalysisJob.user_id == user_id)
+   )
+   if not job:
+      raise HTTPException(status_code=404, detail="Job not found.")
+   return job
+
+
+async def to_job_read(db: AsyncSession, job: AnalysisJob) -> AnalysisJobRead:
+   result = None
+   if job.analysis_id is not None:
+      analysis = await db.get(ResumeAnalysis, job.analysis_id)
+      if analysis is not None:
+         result = to_analysis_read(analysis)
+   return AnalysisJobRead(
+      id=job.id,
+      resume_id=job.resume_id,
+      status=job.status,
+      attempts=job.attempts,
+      error=job.error,
+      created_at=job.created_at,
+      updated_at=job.updated_at,
+      result=result,
+   )
+
+
+@router.get("/{job_id}", response_model=AnalysisJobRead)
+async def get_job(
+   job_id: str,
+   wait: float = 0,
+   db: AsyncSession = Depends(get_async_db),
+   current_user: User = Depends(get_current_user),
+):
+   # Long-poll: with ?wait=N hold the request until the job finishes or N seconds pass
+   deadline = time.monotonic() + min(wait, settings.JOB_WAIT_MAX_SECONDS)
+   job = await _load_job(db, job_id, current_user.id)
+   while job.status not in JobStatus.TERMINAL:
+      remaining = deadline - time.monotonic()
+      if remaining <= 0:
+         break
+      await job_queue.wait_for_update(job_id, min(remaining, 1.0))
+      await db.refresh(job)
+   return await to_job_read(db, job)
+
+
+@router.get("/{job_id}/events")
+async def stream_job_events(
+   job_id: str,
+   db: AsyncSession = Depends(get_async_db),
+   current_user: User = Depends(get_current_user),
+):
+   await _load_job(db, job_id, current_user.id)
+
+   async def events():
+      last_state = None
+      while True:
+         async with AsyncSessionLocal() as session:
+            job = await _load_job(session, job_id, current_user.id)
+            payload = await to_job_read(session, job)
+
+         state = (payload.status, payload.attempts)
+         if state != last_state:
+            last_state = state
+            yield f"event: {payload.status}\ndata: {payload.model_dump_json()}\n\n"
+         if payload.status in JobStatus.TERMINAL:
+            return
+         await job_queue.wait_for_update(job_id, 1.0)
+
+   return StreamingResponse(
+      events(),
+      media_type="text/event-stream",
+      headers={"Cache-Control": "no-cache"},
+   )
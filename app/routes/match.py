@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.core.security import get_current_user
+from app.models.user import User
+from app.models.resume import Resume
+from app.schemas.match import MatchRequest, MatchHit, MatchResults
+from app.services.embeddings import embedding_index
+
+router = APIRouter(prefix="/match", tags=["match"])
+
+
+@router.post("", response_model=MatchResults)
+async def match_resumes(
+   match_in: MatchRequest,
+   db: AsyncSession = Depends(get_async_db),
+   current_user: User = Depends(get_current_user),
+):
+   # Ranks the caller's stored resumes against a job description by
+   # embedding similarity; no LLM calls
+   candidates, method, ranked = await embedding_index.search(
+      current_user.id, match_in.job_description, match_in.top_k
+   )
+   scores = dict(ranked)
+   rows = await db.execute(
+      select(Resume.id, Resume.title, Resume.target_role, Resume.created_at)
+      .where(Resume.id.in_(scores), Resume.user_id == current_user.id)
+   )
+   resumes = {r.id: r for r in rows}
+   items = [
+      MatchHit(
+         id=resume_id,
+         title=resumes[resume_id].title,
+         target_role=resumes[resume_id].target_role,
+         created_at=resumes[resume_id].created_at,
+         score=round(score, 4),
+      )
+      for resume_id, score in ranked
+      if resume_id in resumes
+   ]
+   return MatchResults(candidates=candidates, method=method, items=items)
@@ -1,74 +1,373 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.mongo import get_mongo_db
+import base64
+import difflib
+import json
+import math
+from datetime import datetime, timezone
+from typing import List, Optional
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
+from starlette.datastructures import UploadFile as FormFile
+from sqlalchemy import and_, distinct, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, noload, selectinload
+from app.core.database import get_async_db, AsyncSessionLocal
+from app.core.mongo import get_async_mongo_db
 from app.core.security import get_current_user
 from app.models.user import User
 from app.models.resume import Resume
-from app.models.analysis import ResumeAnalysis
-from app.schemas.resume import ResumeCreate, ResumeRead, ResumeUpdate
-from app.schemas.analysis import ResumeAnalysisRead
-from app.services.ai_client import analyze_resume, AIAnalysisError
+from app.models.analysis import ResumeAnalysis, AnalysisSkill, SkillKind, normalize_skill
+from app.schemas.resume import (
+   ResumeCreate,
+   ResumeRead,
+   ResumeUpdate,
+   ResumeListItem,
+   RESUME_LIST_FIELDS,
+   ResumeSearchHit,
+   ResumeSearchResults,
+   ResumeVersion,
+   ResumeVersionDiff,
+)
+from app.schemas.analysis import ResumeAnalysisRead, BatchAnalyzeRequest, SkillFrequency
+from app.schemas.job import AnalysisJobRead
+from app.services.ai_client import AIAnalysisError, AIServiceUnavailableError
+from app.services.analytics import analytics_rollups
+from app.services.analysis_service import (
+   run_analysis,
+   stream_run_analysis,
+   to_analysis_read,
+   analyze_batch,
+   AnalysisMode,
+)
+from app.services.job_queue import job_queue, JobQueueError
+from app.services.embeddings import embedding_index
+from app.services.local_scorer import local_scorer
+from app.services.bulk_import import bulk_importer, iter_jsonl, iter_upload, spool_body
+from app.services.mongo_writer import mongo_writer
+from app.services.resume_versions import (
+   diff_sections,
+   history_entry,
+   reconstruct,
+   section_digests,
+   split_sections,
+   version_list,
+   with_current,
+)
+from app.services.search_index import search_index, latest_skills
+from app.services.text_extraction import (
+   ExtractionError,
+   FileTooLargeError,
+   UnsupportedFileError,
+   spool_upload,
+   text_extractor,
+   title_from_filename,
+)
+from app.routes.jobs import to_job_read
+from app.core.config import get_settings
 
 router = APIRouter(prefix="/resumes", tags=["resumes"])
+settings = get_settings()
 
 
-@router.post("/", response_model=ResumeRead, status_code=status.HTTP_201_CREATED)
-def create_resume(
-   resume_in: ResumeCreate,
-   db: Session = Depends(get_db),
-   mongo_db=Depends(get_mongo_db),
-   current_user: User = Depends(get_current_user),
-):
+async def _store_resume(db: AsyncSession, user_id: int, resume_in: ResumeCreate) -> Resume:
    resume = Resume(
-      user_id=current_user.id,
+      user_id=user_id,
       title=resume_in.title,
       resume_text=resume_in.resume_text,
       target_role=resume_in.target_role,
       job_description=resume_in.job_description,
+      analyses=[],
    )
    db.add(resume)
-   db.commit()
-   db.refresh(resume)
+   await db.flush()
+   await search_index.upsert(db, resume)
+   await db.commit()
+   await embedding_index.upsert(resume)
+   local_scorer.partial_fit([resume.resume_text])
 
    # Store a copy in Mongo for unstructured logging
-   mongo_db.resume_texts.insert_one(
+   await mongo_writer.insert(
+      "resume_texts",
       {
          "resume_id": resume.id,
-         "user_id": current_user.id,
+         "user_id": user_id,
          "resume_text": resume.resume_text,
          "job_description": resume.job_description,
-      }
+         "version": resume.version,
+      },
    )
 
    return resume
 
 
-@router.get("/", response_model=List[ResumeRead])
-def list_resumes(
-   db: Session = Depends(get_db),
+@router.post("/", response_model=ResumeRead, status_code=status.HTTP_201_CREATED)
+async def create_resume(
+   resume_in: ResumeCreate,
+   db: AsyncSession = Depends(get_async_db),
+   current_user: User = Depends(get_current_user),
+):
+   return await _store_resume(db, current_user.id, resume_in)
+
+
+@router.post("/upload", response_model=ResumeRead, status_code=status.HTTP_201_CREATED)
+async def upload_resume(
+   file: UploadFile = File(...),
+   title: Optional[str] = Form(None),
+   target_role: Optional[str] = Form(None),
+   job_description: Optional[str] = Form(None),
+   db: AsyncSession = Depends(get_async_db),
+   current_user: User = Depends(get_current_user),
+):
+   # PDF, DOCX or plain text; the extracted text is stored as resume_text
+   try:
+      upload = await spool_upload(file, settings.EXTRACTION_MAX_FILE_BYTES)
+   except FileTooLargeError as e:
+      raise HTTPException(status_code=413, detail=str(e))
+   try:
+      resume_text = await text_extractor.extract(upload)
+   except UnsupportedFileError as e:
+      raise HTTPException(status_code=415, detail=str(e))
+   except ExtractionError as e:
+      raise HTTPException(status_code=422, detail=str(e))
+   finally:
+      upload.cleanup()
+
+   resume_in = ResumeCreate(
+      title=title or title_from_filename(upload.name),
+      resume_text=resume_text,
+      target_role=target_role or None,
+      job_description=job_description or None,
+   )
+   return await _store_resume(db, current_user.id, resume_in)
+
+
+NDJSON_TYPES = {"application/x-ndjson", "application/jsonl", "application/json-lines"}
+
+
+@router.post("/bulk")
+async def bulk_import_resumes(
+   request: Request,
+   current_user: User = Depends(get_current_user),
+):
+   # multipart/form-data: "files" parts, each a text resume, a .jsonl file or a
+   # .zip of either. NDJSON body: one {"title", "resume_text", ...} per line.
+   # Responds with NDJSON progress events while the import runs.
+   content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+   form = body = None
+   if content_type == "multipart/form-data":
+      form = await request.form()
+      uploads = [f for f in form.getlist("files") if isinstance(f, FormFile)]
+      if not uploads:
+         await form.close()
+         raise HTTPException(status_code=400, detail="No files uploaded in the 'files' field.")
+
+      def upload_items():
+         for upload in uploads:
+            yield from iter_upload(upload.filename or "upload", upload.file)
+
+      items = iterate_in_threadpool(upload_items())
+   elif content_type in NDJSON_TYPES:
+      body = await spool_body(request.stream())
+      items = iterate_in_threadpool(iter_jsonl(body))
+   else:
+      raise HTTPException(
+         status_code=415, detail="Send multipart/form-data files or an application/x-ndjson body."
+      )
+
+   async def ndjson():
+      try:
+         async for event in bulk_importer.run(items, current_user.id):
+            yield json.dumps(event) + "\n"
+      finally:
+         if form is not None:
+            await form.close()
+         if body is not None:
+            body.close()
+
+   return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+def _encode_cursor(resume: Resume) -> str:
+   raw = json.dumps([resume.created_at.isoformat(), resume.id])
+   return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+   try:
+      padded = cursor + "=" * (-len(cursor) % 4)
+      created_at, resume_id = json.loads(base64.urlsafe_b64decode(padded))
+      return datetime.fromisoformat(created_at), int(resume_id)
+   except (ValueError, TypeError):
+      raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+def _parse_fields(fields: str | None) -> list[str]:
+   if not fields:
+      return list(RESUME_LIST_FIELDS)
+   selected = [f.strip() for f in fields.split(",") if f.strip()]
+   unknown = sorted(set(selected) - set(RESUME_LIST_FIELDS))
+   if unknown:
+      raise HTTPException(status_code=400, detail=f"Unknown fields: {unknown}")
+   return selected
+
+
+@router.get("/", response_model=List[ResumeListItem], response_model_exclude_unset=True)
+async def list_resumes(
+   request: Request,
+   response: Response,
+   limit: int = Query(50, ge=1, le=200),
+   cursor: str | None = None,
+   fields: str | None = Query(
+      None, description="Comma-separated fields to return, e.g. id,title,created_at"
+   ),
+   db: AsyncSession = Depends(get_async_db),
    current_user: User = Depends(get_current_user),
 ):
+   selected = _parse_fields(fields)
+   # created_at is always loaded because the cursor is built from it
+   columns = {f for f in selected if f != "analyses"} | {"id", "created_at"}
+   query = (
+      select(Resume)
+      .options(load_only(*(getattr(Resume, f) for f in columns)))
+      .where(Resume.user_id == current_user.id)
+   )
+   if "analyses" in selected:
+      query = query.options(selectinload(Resume.analyses))
+   else:
+      query = query.options(noload(Resume.analyses))
+
+   if cursor:
+      created_at, resume_id = _decode_cursor(cursor)
+      query = query.where(
+         or_(
+            Resume.created_at < created_at,
+            and_(Resume.created_at == created_at, Resume.id < resume_id),
+         )
+      )
+
    resumes = (
-      db.query(Resume)
-      .filter(Resume.user_id == current_user.id)
-      .order_by(Resume.created_at.desc())
-      .all()
+      await db.scalars(
+         query.order_by(Resume.created_at.desc(), Resume.id.desc()).limit(limit + 1)
+      )
+   ).all()
+   if len(resumes) > limit:
+      resumes = resumes[:limit]
+      next_cursor = _encode_cursor(resumes[-1])
+      response.headers["X-Next-Cursor"] = next_cursor
+      next_url = request.url.include_query_params(cursor=next_cursor)
+      response.headers["Link"] = f'<{next_url}>; rel="next"'
+
+   items = []
+   for resume in resumes:
+      values = {f: getattr(resume, f) for f in selected if f != "analyses"}
+      if "analyses" in selected:
+         values["analyses"] = [to_analysis_read(a) for a in resume.analyses]
+      items.append(ResumeListItem(**values))
+   return items
+
+
+@router.post("/batch-analyze")
+async def batch_analyze(
+   batch_in: BatchAnalyzeRequest,
+   db: AsyncSession = Depends(get_async_db),
+   mongo_db=Depends(get_async_mongo_db),
+   current_user: User = Depends(get_current_user),
+):
+   resume_ids = list(dict.fromkeys(batch_in.resume_ids))
+   pair_count = len(resume_ids) * max(1, len(batch_in.job_descriptions))
+   if pair_count > settings.BATCH_ANALYZE_MAX_PAIRS:
+      raise HTTPException(
+         status_code=400,
+         detail=f"Batch too large: {pair_count} pairs (max {settings.BATCH_ANALYZE_MAX_PAIRS}).",
+      )
+
+   rows = (
+      await db.execute(
+         select(Resume.id, Resume.resume_text, Resume.job_description)
+         .where(Resume.id.in_(resume_ids), Resume.user_id == current_user.id)
+      )
+   ).all()
+   if len(rows) != len(resume_ids):
+      missing = sorted(set(resume_ids) - {row.id for row in rows})
+      raise HTTPException(status_code=404, detail=f"Resumes not found: {missing}")
+
+   async def ndjson():
+      async for event in analyze_batch(
+         [tuple(row) for row in rows],
+         batch_in.job_descriptions,
+         current_user.id,
+         mongo_db,
+         force=batch_in.force,
+      ):
+         yield json.dumps(event, default=str) + "\n"
+
+   return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+@router.get("/search", response_model=ResumeSearchResults)
+async def search_resumes(
+   q: str = Query(..., min_length=1, max_length=500),
+   limit: int = Query(20, ge=1, le=100),
+   offset: int = Query(0, ge=0),
+   db: AsyncSession = Depends(get_async_db),
+   current_user: User = Depends(get_current_user),
+):
+   total, ranked = await search_index.search(db, current_user.id, q, limit, offset)
+   scores = dict(ranked)
+   rows = await db.execute(
+      select(Resume.id, Resume.title, Resume.target_role, Resume.created_at)
+      .where(Resume.id.in_(scores), Resume.user_id == current_user.id)
+   )
+   resumes = {r.id: r for r in rows}
+   items = [
+      ResumeSearchHit(
+         id=resume_id,
+         title=resumes[resume_id].title,
+         target_role=resumes[resume_id].target_role,
+         created_at=resumes[resume_id].created_at,
+         score=round(score, 4),
+      )
+      for resume_id, score in ranked
+      if resume_id in resumes
+   ]
+   return ResumeSearchResults(query=q, total=total, limit=limit, offset=offset, items=items)
+
+
+@router.get("/skills/frequency", response_model=list[SkillFrequency])
+async def skill_frequency(
+   kind: str = Query(SkillKind.TECHNICAL, pattern="^(technical|soft)$"),
+   skill: str | None = None,
+   limit: int = Query(20, ge=1, le=500),
+   db: AsyncSession = Depends(get_async_db),
+   current_user: User = Depends(get_current_user),
+):
+   # Number of the caller's resumes listing each skill in any analysis
+   resumes = func.count(distinct(AnalysisSkill.resume_id))
+   query = (
+      select(func.min(AnalysisSkill.name), resumes)
+      .join(Resume, Resume.id == AnalysisSkill.resume_id)
+      .where(Resume.user_id == current_user.id, AnalysisSkill.kind == kind)
+   )
+   if skill:
+      query = query.where(AnalysisSkill.name_normalized == normalize_skill(skill))
+   rows = await db.execute(
+      query.group_by(AnalysisSkill.name_normalized)
+      .order_by(resumes.desc(), AnalysisSkill.name_normalized)
+      .limit(limit)
    )
-   return resumes
+   return [SkillFrequency(skill=name, resumes=count) for name, count in rows]
 
 
 @router.get("/{resume_id}", response_model=ResumeRead)
-def get_resume(
+async def get_resume(
    resume_id: int,
-   db: Session = Depends(get_db),
+   db: AsyncSession = Depends(get_async_db),
    current_user: User = Depends(get_current_user),
 ):
-   resume = (
-      db.query(Resume)
-      .filter(Resume.id == resume_id, Resume.user_id == current_user.id)
-      .first()
+   resume = await db.scalar(
+      select(Resume)
+      .options(selectinload(Resume.analyses))
+      .where(Resume.id == resume_id, Resume.user_id == current_user.id)
    )
    if not resume:
       raise HTTPException(status_code=404, detail="Resume not found.")
@@ -76,176 +375,290 @@ def get_resume(
 
 
 @router.put("/{resume_id}", response_model=ResumeRead)
-def update_resume(
+async def update_resume(
    resume_id: int,
    resume_in: ResumeUpdate,
-   db: Session = Depends(get_db),
-   mongo_db=Depends(get_mongo_db),
+   db: AsyncSession = Depends(get_async_db),
    current_user: User = Depends(get_current_user),
 ):
-   resume = (
-      db.query(Resume)
-      .filter(Resume.id == resume_id, Resume.user_id == current_user.id)
-      .first()
+   resume = await db.scalar(
+      select(Resume)
+      .options(selectinload(Resume.analyses))
+      .where(Resume.id == resume_id, Resume.user_id == current_user.id)
    )
    if not resume:
       raise HTTPException(status_code=404, detail="Resume not found.")
 
+   previous_text, previous_jd = resume.resume_text, resume.job_description
    for field, value in resume_in.model_dump(exclude_unset=True).items():
       setattr(resume, field, value)
+   content_changed = (resume.resume_text, resume.job_description) != (previous_text, previous_jd)
+   if content_changed:
+      resume.version += 1
 
    db.add(resume)
-   db.commit()
-   db.refresh(resume)
-
-   # Update copy in Mongo
-   mongo_db.resume_texts.update_one(
-      {"resume_id": resume.id},
+   await db.flush()
+   await search_index.upsert(db, resume, await latest_skills(db, resume.id))
+   await db.commit()
+   await embedding_index.upsert(resume)
+
+   if not content_changed:
+      return resume
+   if resume.resume_text != previous_text:
+      local_scorer.partial_fit([previous_text], sign=-1)
+      local_scorer.partial_fit([resume.resume_text])
+
+   # Update copy in Mongo, keeping the previous version as a reverse delta.
+   # The delta is only valid against the document at the previous version;
+   # the writer may apply ops late or out of order (spill replay), so each
+   # op is guarded by version. If the copy is behind (a lost write), it is
+   # brought up to date without history; a newer copy is left alone.
+   current = {
+      "user_id": resume.user_id,
+      "resume_text": resume.resume_text,
+      "job_description": resume.job_description,
+      "version": resume.version,
+   }
+   entry = history_entry(
+      resume.version - 1,
+      resume.resume_text,
+      previous_text,
+      datetime.now(timezone.utc),
+      previous_jd,
+      job_description_changed=previous_jd != resume.job_description,
+   )
+   # Bulk-imported copies carry no version: they are at version 1
+   previous = resume.version - 1 if resume.version > 2 else {"$in": [1, None]}
+   await mongo_writer.update(
+      "resume_texts",
+      {"resume_id": resume.id, "version": previous},
       {
-         "$set": {
-               "resume_text": resume.resume_text,
-               "job_description": resume.job_description,
-         }
+         "$set": current,
+         "$push": {"history": {"$each": [entry], "$slice": -settings.RESUME_VERSIONS_MAX}},
       },
-      upsert=True,
+   )
+   await mongo_writer.update(
+      "resume_texts",
+      {"resume_id": resume.id, "version": {"$not": {"$gte": resume.version}}},
+      {"$set": {**current, "history": []}},
    )
 
    return resume
 
 
+async def _owned_resume_version(db: AsyncSession, resume_id: int, user_id: int, *columns):
+   row = (
+      await db.execute(
+         select(Resume.version, Resume.created_at, Resume.updated_at, *columns).where(
+            Resume.id == resume_id, Resume.user_id == user_id
+         )
+      )
+   ).first()
+   if row is None:
+      raise HTTPException(status_code=404, detail="Resume not found.")
+   return row
+
+
+@router.get("/{resume_id}/versions", response_model=list[ResumeVersion])
+async def list_resume_versions(
+   resume_id: int,
+   db: AsyncSession = Depends(get_async_db),
+   mongo_db=Depends(get_async_mongo_db),
+   current_user: User = Depends(get_current_user),
+):
+   version, created_at, updated_at = await _owned_resume_version(db, resume_id, current_user.id)
+   # Only version numbers and timestamps; deltas and texts stay in Mongo
+   document = await mongo_db.resume_texts.find_one(
+      {"resume_id": resume_id}, {"version": 1, "history.version": 1, "history.superseded_at": 1}
+   )
+   return version_list(with_current(document, version, updated_at), created_at)
+
+
+@router.get("/{resume_id}/versions/diff", response_model=ResumeVersionDiff)
+async def diff_resume_versions(
+   resume_id: int,
+   from_version: Optional[int] = Query(None, ge=1),
+   to_version: Optional[int] = Query(None, ge=1),
+   db: AsyncSession = Depends(get_async_db),
+   mongo_db=Depends(get_async_mongo_db),
+   current_user: User = Depends(get_current_user),
+):
+   # Defaults to the current version against the one before it
+   version, _, updated_at, resume_text, job_description = await _owned_resume_version(
+      db, resume_id, current_user.id, Resume.resume_text, Resume.job_description
+   )
+   document = with_current(
+      await mongo_db.resume_texts.find_one({"resume_id": resume_id}),
+      version,
+      updated_at,
+      resume_text,
+      job_description,
+   )
+   to_version = to_version or version
+   from_version = from_version or max(1, to_version - 1)
+   old, new = reconstruct(document, from_version), reconstruct(document, to_version)
+   if old is None or new is None:
+      raise HTTPException(status_code=404, detail="Resume version not found.")
+
+   sections = diff_sections(
+      section_digests(split_sections(old[0])), section_digests(split_sections(new[0]))
+   )
+   # Every line ends in "\n" so a last line without one doesn't run into the next
+   diff = difflib.unified_diff(
+      [line + "\n" for line in old[0].splitlines()],
+      [line + "\n" for line in new[0].splitlines()],
+      fromfile=f"v{from_version}",
+      tofile=f"v{to_version}",
+   )
+   return ResumeVersionDiff(
+      from_version=from_version,
+      to_version=to_version,
+      sections_added=sections.added,
+      sections_removed=sections.removed,
+      sections_changed=sections.changed,
+      sections_unchanged=sections.unchanged,
+      job_description_changed=old[1] != new[1],
+      diff="".join(diff),
+   )
+
+
 @router.delete("/{resume_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_resume(
+async def delete_resume(
    resume_id: int,
-   db: Session = Depends(get_db),
-   mongo_db=Depends(get_mongo_db),
+   db: AsyncSession = Depends(get_async_db),
    current_user: User = Depends(get_current_user),
 ):
-   resume = (
-      db.query(Resume)
-      .filter(Resume.id == resume_id, Resume.user_id == current_user.id)
-      .first()
+   resume = await db.scalar(
+      select(Resume)
+      .options(selectinload(Resume.analyses))
+      .where(Resume.id == resume_id, Resume.user_id == current_user.id)
    )
    if not resume:
       raise HTTPException(status_code=404, detail="Resume not found.")
 
-   db.delete(resume)
-   db.commit()
+   await analytics_rollups.record(
+      db, [(resume.user_id, resume.target_role, a) for a in resume.analyses], sign=-1
+   )
+   await db.delete(resume)
+   await search_index.delete(db, resume_id)
+   await db.commit()
+   await embedding_index.delete(resume_id)
+   local_scorer.partial_fit([resume.resume_text], sign=-1)
 
-   mongo_db.resume_texts.delete_many({"resume_id": resume_id})
-   mongo_db.ai_logs.delete_many({"resume_id": resume_id})
+   await mongo_writer.delete("resume_texts", {"resume_id": resume_id})
+   await mongo_writer.delete("ai_logs", {"resume_id": resume_id})
 
    return
 
 
-@router.post("/{resume_id}/analyze", response_model=ResumeAnalysisRead)
+@router.post(
+   "/{resume_id}/analyze",
+   response_model=ResumeAnalysisRead,
+   responses={202: {"model": AnalysisJobRead}},
+)
 async def analyze_resume_endpoint(
    resume_id: int,
-   db: Session = Depends(get_db),
-   mongo_db=Depends(get_mongo_db),
+   force: bool = False,
+   mode: AnalysisMode = AnalysisMode.LLM,
+   run_async: bool = Query(False, alias="async"),
+   db: AsyncSession = Depends(get_async_db),
+   mongo_db=Depends(get_async_mongo_db),
    current_user: User = Depends(get_current_user),
 ):
-   resume = (
-      db.query(Resume)
-      .filter(Resume.id == resume_id, Resume.user_id == current_user.id)
-      .first()
+   resume = await db.scalar(
+      select(Resume).where(Resume.id == resume_id, Resume.user_id == current_user.id)
    )
    if not resume:
       raise HTTPException(status_code=404, detail="Resume not found.")
 
+   # Local scoring takes microseconds, so it is never worth queueing
+   if run_async and mode == AnalysisMode.LLM:
+      try:
+         job = await job_queue.submit(resume.id, current_user.id, force=force)
+      except JobQueueError as e:
+         raise HTTPException(status_code=503, detail=str(e))
+      return JSONResponse(
+         status_code=status.HTTP_202_ACCEPTED,
+         content=(await to_job_read(db, job)).model_dump(mode="json"),
+         headers={"Location": f"/jobs/{job.id}"},
+      )
+
    try:
-      result = await analyze_resume(resume.resume_text, resume.job_description)
-      print("result", result)
+      return await run_analysis(
+         db, mongo_db, resume, current_user.id, force=force, mode=mode
+      )
+   except AIServiceUnavailableError as e:
+      raise HTTPException(
+         status_code=503,
+         detail=f"AI analysis temporarily unavailable: {e}",
+         headers={"Retry-After": str(math.ceil(e.retry_after))},
+      )
    except AIAnalysisError as e:
       raise HTTPException(
          status_code=500,
          detail=f"AI analysis failed: {e}",
       )
 
-   # Extract fields safely
-   overall_score = result.get("overall_score")
-   experience_summary = result.get("experience_summary")
-   skills = result.get("skills", {})
-   tech_skills = skills.get("technical", [])
-   soft_skills = skills.get("soft", [])
-   strengths = result.get("strengths", [])
-   gaps = result.get("gaps", [])
-   suggestions = result.get("improvement_suggestions", [])
-
-   analysis = ResumeAnalysis(
-      resume_id=resume.id,
-      overall_score=overall_score,
-      experience_summary=experience_summary,
-      skills_technical=",".join(tech_skills),
-      skills_soft=",".join(soft_skills),
-      strengths="\n".join(strengths),
-      gaps="\n".join(gaps),
-      improvement_suggestions="\n".join(suggestions),
-   )
-
-   db.add(analysis)
-   db.commit()
-   db.refresh(analysis)
-
-   # Log raw response to Mongo
-   mongo_db.ai_logs.insert_one(
-      {
-         "resume_id": resume.id,
-         "user_id": current_user.id,
-         "raw_result": result,
-      }
-   )
-
-   # Return proper ResumeAnalysisRead object
-   return ResumeAnalysisRead(
-         id=analysis.id,
-         created_at=analysis.created_at,
-         overall_score=analysis.overall_score,
-         experience_summary=analysis.experience_summary,
-         skills_technical=tech_skills,
-         skills_soft=soft_skills,
-         strengths=strengths,
-         gaps=gaps,
-         improvement_suggestions=suggestions,
-      )
 
+@router.post("/{resume_id}/analyze/stream")
+async def stream_analyze_resume(
+   resume_id: int,
+   force: bool = False,
+   db: AsyncSession = Depends(get_async_db),
+   mongo_db=Depends(get_async_mongo_db),
+   current_user: User = Depends(get_current_user),
+):
+   # SSE: one "section" event per completed field of the model's JSON, then
+   # "result" with the stored analysis (or "error")
+   owned = await db.scalar(
+      select(Resume.id).where(Resume.id == resume_id, Resume.user_id == current_user.id)
+   )
+   if not owned:
+      raise HTTPException(status_code=404, detail="Resume not found.")
+   user_id = current_user.id
+
+   async def events():
+      async with AsyncSessionLocal() as session:
+         resume = await session.get(Resume, resume_id)
+         try:
+            async for event in stream_run_analysis(
+               session, mongo_db, resume, user_id, force=force
+            ):
+               if event["type"] == "section":
+                  data = json.dumps({"key": event["key"], "value": event["value"]})
+               else:
+                  data = json.dumps(
+                     {"cached": event["cached"], "analysis": event["analysis"].model_dump(mode="json")}
+                  )
+               yield f"event: {event['type']}\ndata: {data}\n\n"
+         except AIAnalysisError as e:
+            error = {"detail": f"AI analysis failed: {e}"}
+            if isinstance(e, AIServiceUnavailableError):
+               error["retry_after"] = math.ceil(e.retry_after)
+            yield f"event: error\ndata: {json.dumps(error)}\n\n"
+
+   return StreamingResponse(
+      events(),
+      media_type="text/event-stream",
+      headers={"Cache-Control": "no-cache"},
+   )
 
 
 @router.get("/{resume_id}/analysis", response_model=list[ResumeAnalysisRead])
-def list_analyses_for_resume(
+async def list_analyses_for_resume(
    resume_id: int,
-   db: Session = Depends(get_db),
+   db: AsyncSession = Depends(get_async_db),
    current_user: User = Depends(get_current_user),
 ):
-   resume = (
-      db.query(Resume)
-      .filter(Resume.id == resume_id, Resume.user_id == current_user.id)
-      .first()
+   resume = await db.scalar(
+      select(Resume.id).where(Resume.id == resume_id, Resume.user_id == current_user.id)
    )
    if not resume:
       raise HTTPException(status_code=404, detail="Resume not found.")
 
-   analyses = (
-      db.query(ResumeAnalysis)
-      .filter(ResumeAnalysis.resume_id == resume_id)
+   analyses = await db.scalars(
+      select(ResumeAnalysis)
+      .where(ResumeAnalysis.resume_id == resume_id)
       .order_by(ResumeAnalysis.created_at.desc())
-      .all()
-   )
-   # SQLAlchemy → Pydantic conversion handled by from_attributes in schema
-   return [
-      ResumeAnalysisRead(
-         id=a.id,
-         created_at=a.created_at,
-         overall_score=a.overall_score,
-         experience_summary=a.experience_summary,
-         skills_technical=a.skills_technical.split(",") if a.skills_technical else [],
-         skills_soft=a.skills_soft.split(",") if a.skills_soft else [],
-         strengths=a.strengths.split("\n") if a.strengths else [],
-         gaps=a.gaps.split("\n") if a.gaps else [],
-         improvement_suggestions=(
-               a.improvement_suggestions.split("\n")
-               if a.improvement_suggestions
-               else []
-         ),
-      )
-      for a in analyses
-   ]
+   )
+   return [to_analysis_read(a) for a in analyses]
@@ -1,5 +1,6 @@
+import re
 from datetime import datetime
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from pydantic_settings import SettingsConfigDict
 
 class ResumeAnalysisBase(BaseModel):
@@ -11,29 +12,78 @@ class ResumeAnalysisBase(BaseModel):
    gaps: list[str] | None = None
    improvement_suggestions: list[str] | None = None
 
-   # Convert comma-separated strings from the DB to lists
-   @field_validator("skills_technical", "skills_soft", mode="before")
+
+class ResumeAnalysisRead(ResumeAnalysisBase):
+   id: int
+   created_at: datetime
+
+   model_config = SettingsConfigDict(from_attributes=True)
+
+
+def _string_list(v):
+   # Models sometimes answer a list field with one string, or with objects
+   if isinstance(v, str):
+      return [line.strip(" -*•\t") for line in v.split("\n") if line.strip(" -*•\t")]
+   if isinstance(v, list):
+      return [
+         item if isinstance(item, str) else " ".join(str(part) for part in item.values())
+         if isinstance(item, dict) else str(item)
+         for item in v
+         if item is not None
+      ]
+   return v
+
+
+class AnalysisSkills(BaseModel):
+   technical: list[str] = Field(default_factory=list)
+   soft: list[str] = Field(default_factory=list)
+
+   @field_validator("technical", "soft", mode="before")
    @classmethod
-   def _ensure_list_comma(cls, v):
+   def _ensure_list(cls, v):
       if v is None:
          return []
       if isinstance(v, str):
          return [item.strip() for item in v.split(",") if item.strip()]
-      return v  # already a list or something else
+      return _string_list(v)
 
-   # Convert newline-separated strings from the DB to lists
-   @field_validator("strengths", "gaps", "improvement_suggestions", mode="before")
+
+class LLMAnalysis(BaseModel):
+   # The JSON object the model is asked for. Fields it left out are None;
+   # unknown keys (e.g. "degraded") are kept.
+   model_config = ConfigDict(extra="allow")
+
+   overall_score: int | None = Field(default=None, ge=0, le=100)
+   experience_summary: str | None = None
+   skills: AnalysisSkills | None = None
+   strengths: list[str] | None = None
+   gaps: list[str] | None = None
+   improvement_suggestions: list[str] | None = None
+
+   # "78", "78.5" and "78/100" all mean 78
+   @field_validator("overall_score", mode="before")
    @classmethod
-   def _ensure_list_newline(cls, v):
-      if v is None:
-         return []
+   def _score(cls, v):
       if isinstance(v, str):
-         return [line.strip() for line in v.split("\n") if line.strip()]
+         match = re.match(r"\s*(\d+(?:\.\d+)?)", v)
+         v = float(match.group(1)) if match else v
+      if isinstance(v, float):
+         return round(v)
       return v
 
+   @field_validator("strengths", "gaps", "improvement_suggestions", mode="before")
+   @classmethod
+   def _ensure_list(cls, v):
+      return _string_list(v)
+
 
-class ResumeAnalysisRead(ResumeAnalysisBase):
-   id: int
-   created_at: datetime
+class BatchAnalyzeRequest(BaseModel):
+   resume_ids: list[int] = Field(min_length=1)
+   # Empty: score each resume against its own stored job description
+   job_descriptions: list[str] = Field(default_factory=list)
+   force: bool = False
 
-   model_config = SettingsConfigDict(from_attributes=True)
+
+class SkillFrequency(BaseModel):
+   skill: str
+   resumes: int
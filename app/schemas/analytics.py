@@ -0,0 +1,33 @@
+from datetime import date
+from pydantic import BaseModel
+
+class ScoreDistribution(BaseModel):
+   target_role: str | None = None
+   analyses: int
+   mean_score: float | None = None
+   # Analyses per score decile: buckets[0] is 0-9, buckets[9] is 90-100
+   buckets: list[int]
+
+class GapFrequency(BaseModel):
+   gap: str
+   analyses: int
+
+class SkillSeries(BaseModel):
+   skill: str
+   total: int
+   counts: list[int]
+
+class SkillTrend(BaseModel):
+   kind: str
+   interval: str
+   # Start date of each period; every series has one count per period
+   periods: list[date]
+   series: list[SkillSeries]
+
+class LLMUsageDay(BaseModel):
+   day: date
+   analyses: int
+   cached: int
+   streamed: int
+   scored: int
+   mean_score: float | None = None
@@ -0,0 +1,16 @@
+from datetime import datetime
+from pydantic import BaseModel
+from pydantic_settings import SettingsConfigDict
+from app.schemas.analysis import ResumeAnalysisRead
+
+class AnalysisJobRead(BaseModel):
+   id: str
+   resume_id: int
+   status: str
+   attempts: int
+   error: str | None = None
+   created_at: datetime
+   updated_at: datetime
+   result: ResumeAnalysisRead | None = None
+
+   model_config = SettingsConfigDict(from_attributes=True)
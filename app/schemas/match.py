@@ -0,0 +1,19 @@
+from datetime import datetime
+from pydantic import BaseModel, Field
+
+class MatchRequest(BaseModel):
+   job_description: str = Field(min_length=1, max_length=50000)
+   top_k: int = Field(10, ge=1, le=100)
+
+class MatchHit(BaseModel):
+   id: int
+   title: str
+   target_role: str | None = None
+   created_at: datetime
+   score: float
+
+class MatchResults(BaseModel):
+   # Resumes considered; "ivf" means only the nearest partitions were scored
+   candidates: int
+   method: str
+   items: list[MatchHit]
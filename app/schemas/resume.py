@@ -25,8 +25,64 @@ class ResumeRead(BaseModel):
    resume_text: str
    target_role: Optional[str]
    job_description: Optional[str]
+   version: int
    created_at: datetime
    updated_at: datetime
    analyses: List[ResumeAnalysisRead] = Field(default_factory=list)
 
    model_config = SettingsConfigDict(from_attributes=True)
+
+RESUME_LIST_FIELDS = (
+   "id",
+   "title",
+   "resume_text",
+   "target_role",
+   "job_description",
+   "version",
+   "created_at",
+   "updated_at",
+   "analyses",
+)
+
+# Projection of ResumeRead: only the requested fields are set (and serialized)
+class ResumeListItem(BaseModel):
+   id: Optional[int] = None
+   title: Optional[str] = None
+   resume_text: Optional[str] = None
+   target_role: Optional[str] = None
+   job_description: Optional[str] = None
+   version: Optional[int] = None
+   created_at: Optional[datetime] = None
+   updated_at: Optional[datetime] = None
+   analyses: Optional[List[ResumeAnalysisRead]] = None
+
+class ResumeSearchHit(BaseModel):
+   id: int
+   title: str
+   target_role: Optional[str]
+   created_at: datetime
+   score: float
+
+class ResumeSearchResults(BaseModel):
+   query: str
+   total: int
+   limit: int
+   offset: int
+   items: List[ResumeSearchHit]
+
+class ResumeVersion(BaseModel):
+   version: int
+   # Unknown for the oldest kept version once earlier ones were trimmed
+   created_at: Optional[datetime] = None
+   current: bool
+
+class ResumeVersionDiff(BaseModel):
+   from_version: int
+   to_version: int
+   sections_added: List[str]
+   sections_removed: List[str]
+   sections_changed: List[str]
+   sections_unchanged: List[str]
+   job_description_changed: bool
+   # Unified diff of the resume text
+   diff: str
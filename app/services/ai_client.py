@@ -1,20 +1,33 @@
-from typing import Optional, Any, Dict
+from typing import Optional, Any, AsyncIterator, Dict, List, Tuple
+import asyncio
 import json
-import httpx
+import time
+from contextlib import contextmanager
 from app.core.config import get_settings
-import re
+from app.core.metrics import LLM_REQUEST_SECONDS
+from app.services import llm_backends
+from app.services.json_stream import IncrementalJsonParser
+from app.services.llm_backends import (
+   AIAnalysisError,
+   AIServiceUnavailableError,
+   ChatRequest,
+   estimate_tokens,
+)
+from app.services.llm_output import LLMOutputError, ParsedAnalysis, merge_fields, parse_analysis
+from app.services.prompt_budget import PreparedPrompt, count_tokens, merge_results, prompt_budget
 
 settings = get_settings()
 
+# Bump whenever the prompt or expected JSON shape changes; it is part of the
+# analysis cache key so stale results are never served for a new prompt.
+PROMPT_VERSION = "v2"
 
-class AIAnalysisError(Exception):
-   pass
-
-
-async def analyze_resume(resume_text: str, job_description: Optional[str]) -> Dict[str, Any]:
-   if not settings.AZURE_OPENAI_ENDPOINT or not settings.AZURE_OPENAI_API_KEY:
-      raise AIAnalysisError("Azure OpenAI configuration is missing.")
 
+def _build_payload(
+   resume_text: str,
+   job_description: Optional[str],
+   part: Optional[Tuple[int, int]] = None,
+) -> Dict[str, Any]:
    system_prompt = (
       "You are an expert resume reviewer. "
       "You carefully evaluate resumes and provide structured, concise feedback. "
@@ -22,9 +35,14 @@ async def analyze_resume(resume_text: str, job_description: Optional[str]) -> Di
    )
 
    jd_section = f"\n\nTarget Job Description:\n{job_description}" if job_description else ""
+   part_note = (
+      f"This is part {part[0]} of {part[1]} of a longer resume; assess only this part.\n"
+      if part
+      else ""
+   )
 
    user_prompt = f"""
-   Resume:
+   {part_note}Resume:
    {resume_text}
    {jd_section}
 
@@ -43,18 +61,7 @@ async def analyze_resume(resume_text: str, job_description: Optional[str]) -> Di
    }}
    """
 
-   url = (
-      f"{settings.AZURE_OPENAI_ENDPOINT}/openai/deployments/"
-      f"{settings.AZURE_OPENAI_DEPLOYMENT}/chat/completions"
-      f"?api-version={settings.AZURE_OPENAI_API_VERSION}"
-   )
-
-   headers = {
-      "Content-Type": "application/json",
-      "api-key": settings.AZURE_OPENAI_API_KEY,
-   }
-
-   payload = {
+   return {
       "messages": [
          {"role": "system", "content": system_prompt},
          {"role": "user", "content": user_prompt},
@@ -62,25 +69,190 @@ async def analyze_resume(resume_text: str, job_description: Optional[str]) -> Di
       "temperature": 0.2,
    }
 
-   async with httpx.AsyncClient(timeout=30.0) as client:
-      resp = await client.post(url, json=payload, headers=headers)
 
-   if resp.status_code != 200:
-      raise AIAnalysisError(
-         f"Azure OpenAI returned {resp.status_code}: {resp.text}"
-      )
+def _build_delta_payload(
+   previous: Dict[str, Any],
+   changed_text: str,
+   removed: List[str],
+   job_description: Optional[str],
+) -> Dict[str, Any]:
+   payload = _build_payload("", job_description)
+   removed_note = (
+      f"\n   These sections were removed from the resume: {', '.join(removed)}.\n" if removed else ""
+   )
+   jd_section = f"\n\nTarget Job Description:\n{job_description}" if job_description else ""
+   payload["messages"][1]["content"] = f"""
+   You previously analysed an earlier version of this resume:
+   {json.dumps(previous, ensure_ascii=False)}
+
+   Only the sections below have changed or been added since then:
+   {changed_text or "(none)"}
+   {removed_note}{jd_section}
+
+   Update the previous analysis to reflect these changes; keep whatever the
+   changes do not affect. Respond ONLY in valid JSON with the same structure
+   as the previous analysis.
+   """
+   return payload
+
+
+@contextmanager
+def _observe_llm(mode: str):
+   started = time.perf_counter()
+   outcome = "error"
+   try:
+      yield
+      outcome = "ok"
+   finally:
+      LLM_REQUEST_SECONDS.labels(mode, outcome).observe(time.perf_counter() - started)
+
+
+def _build_followup_payload(
+   payload: Dict[str, Any], reply: str, missing: List[str]
+) -> Dict[str, Any]:
+   return {
+      **payload,
+      "messages": [
+         *payload["messages"],
+         {"role": "assistant", "content": reply},
+         {
+            "role": "user",
+            "content": (
+               f"Your answer was incomplete or invalid for: {', '.join(missing)}. "
+               "Respond ONLY in valid JSON with an object holding just these fields, "
+               "in the structure requested above."
+            ),
+         },
+      ],
+   }
+
 
-   data = resp.json()
-   ai_response = data["choices"][0]["message"]["content"]
-   pattern = r'```(?:json)?\s*([\s\S]*?)\s*```'
-   match = re.search(pattern, ai_response)
-   
-   if match:
-      json_string = match.group(1).strip()
-   
+def _parse(reply: str) -> ParsedAnalysis:
    try:
-      parsed = json.loads(json_string)
-   except json.JSONDecodeError as e:
+      return parse_analysis(reply)
+   except LLMOutputError as e:
       raise AIAnalysisError(f"Model did not return valid JSON: {e}") from e
 
+
+async def _complete_missing(
+   request: ChatRequest, reply: str, parsed: ParsedAnalysis
+) -> ParsedAnalysis:
+   # Asks only for the fields that were missing or invalid after local repair
+   # instead of re-running the whole analysis
+   for _ in range(settings.LLM_OUTPUT_FOLLOWUP_ATTEMPTS):
+      if not parsed.missing:
+         break
+      payload = _build_followup_payload(request.payload, reply, parsed.missing)
+      with _observe_llm("followup"):
+         followup = await llm_backends.llm_router.complete(ChatRequest(payload))
+      parsed = merge_fields(parsed, followup)
    return parsed
+
+
+async def _complete(request: ChatRequest) -> Dict[str, Any]:
+   with _observe_llm("buffered"):
+      ai_response = await llm_backends.llm_router.complete(request)
+
+   parsed = _parse(ai_response)
+   if parsed.missing:
+      parsed = await _complete_missing(request, ai_response, parsed)
+   return parsed.result
+
+
+async def _analyze_chunks(prompt: PreparedPrompt) -> Dict[str, Any]:
+   # Map: one call per chunk, concurrently (the scheduler paces them).
+   # Reduce: merge the partial results deterministically.
+   total = len(prompt.resume_chunks)
+   partials = await asyncio.gather(
+      *(
+         _complete(
+            ChatRequest(
+               _build_payload(chunk, prompt.job_description, part=(i + 1, total)),
+               resume_text=chunk,
+               job_description=prompt.job_description,
+            )
+         )
+         for i, chunk in enumerate(prompt.resume_chunks)
+      )
+   )
+   merged = merge_results(list(partials), [count_tokens(chunk) for chunk in prompt.resume_chunks])
+   if any(partial.get("degraded") for partial in partials):
+      merged["degraded"] = True
+   return merged
+
+
+async def analyze_resume(resume_text: str, job_description: Optional[str]) -> Dict[str, Any]:
+   prompt = prompt_budget.prepare(resume_text, job_description)
+   if len(prompt.resume_chunks) > 1:
+      return await _analyze_chunks(prompt)
+   return await _complete(
+      ChatRequest(
+         _build_payload(prompt.resume_chunks[0], prompt.job_description),
+         resume_text=prompt.resume_chunks[0],
+         job_description=prompt.job_description,
+      )
+   )
+
+
+async def reanalyze_resume(
+   previous: Dict[str, Any],
+   sections: List[str],
+   removed: List[str],
+   job_description: Optional[str],
+) -> Dict[str, Any]:
+   # Incremental update of `previous` from the text of the changed sections;
+   # the result has the same shape as analyze_resume's
+   prompt = prompt_budget.prepare("\n\n".join(sections), job_description)
+   return await _complete(
+      ChatRequest(
+         _build_delta_payload(
+            previous, "\n\n".join(prompt.resume_chunks), removed, prompt.job_description
+         )
+      )
+   )
+
+
+async def stream_analysis(
+   resume_text: str, job_description: Optional[str]
+) -> AsyncIterator[Tuple[str, Any]]:
+   # Yields (section, value) for each top-level field of the model's JSON as
+   # soon as it is complete; the fields together form the analyze_resume result.
+   prompt = prompt_budget.prepare(resume_text, job_description)
+   if len(prompt.resume_chunks) > 1:
+      # Partial results are only meaningful once merged; emit them afterwards
+      for section in (await _analyze_chunks(prompt)).items():
+         yield section
+      return
+
+   request = ChatRequest(
+      _build_payload(prompt.resume_chunks[0], prompt.job_description),
+      resume_text=prompt.resume_chunks[0],
+      job_description=prompt.job_description,
+   )
+   parser = IncrementalJsonParser()
+   reply: List[str] = []
+   streaming = True
+
+   with _observe_llm("stream"):
+      async for delta in llm_backends.llm_router.stream(request):
+         reply.append(delta)
+         if not streaming:
+            continue
+         try:
+            sections = parser.feed(delta)
+         except ValueError:
+            # Malformed from here on; repaired once the reply is complete
+            streaming = False
+            continue
+         for section in sections:
+            yield section
+
+   # Validate (and repair or complete) the whole reply, then send the
+   # fields that are new or differ from what was streamed
+   text = "".join(reply)
+   parsed = _parse(text)
+   if parsed.missing:
+      parsed = await _complete_missing(request, text, parsed)
+   for key, value in parsed.result.items():
+      if key not in parser.result or parser.result[key] != value:
+         yield key, value
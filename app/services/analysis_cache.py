@@ -0,0 +1,131 @@
+import hashlib
+import json
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from pymongo.errors import PyMongoError
+
+from app.core.config import get_settings
+from app.core.metrics import service_stats
+from app.services import llm_backends
+from app.services.ai_client import PROMPT_VERSION
+
+settings = get_settings()
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize(text: Optional[str]) -> str:
+   if not text:
+      return ""
+   return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def make_cache_key(resume_text: str, job_description: Optional[str]) -> str:
+   # No user id in the key: identical resumes from different users share
+   # results. The router's models are: a result from one backend is not
+   # reused once the configured backends or their models change.
+   material = json.dumps(
+      [
+         PROMPT_VERSION,
+         llm_backends.llm_router.model_ids(),
+         _normalize(resume_text),
+         _normalize(job_description),
+      ],
+      ensure_ascii=False,
+   )
+   return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+   def __init__(self, max_entries: int, ttl_seconds: int):
+      self.max_entries = max_entries
+      self.ttl_seconds = ttl_seconds
+      self._entries: OrderedDict[str, tuple[float, Dict[str, Any]]] = OrderedDict()
+      self._lock = threading.Lock()
+      self.memory_hits = 0
+      self.persistent_hits = 0
+      self.misses = 0
+
+   def _get_memory(self, key: str) -> Optional[Dict[str, Any]]:
+      with self._lock:
+         entry = self._entries.get(key)
+         if entry is None:
+            return None
+         expires_at, result = entry
+         if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+         self._entries.move_to_end(key)
+         return result
+
+   async def _get_persistent(self, key: str, mongo_db) -> Optional[Dict[str, Any]]:
+      cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.ttl_seconds)
+      try:
+         doc = await mongo_db.ai_logs.find_one(
+            {
+               "cache_key": key,
+               "created_at": {"$gte": cutoff},
+               # Local fallback answers are logged too but never cached
+               "raw_result.degraded": {"$ne": True},
+            },
+            sort=[("created_at", -1)],
+         )
+      except PyMongoError:
+         return None
+      return doc["raw_result"] if doc else None
+
+   async def get(self, key: str, mongo_db=None) -> Optional[Dict[str, Any]]:
+      result = self._get_memory(key)
+      if result is not None:
+         self.memory_hits += 1
+         return result
+
+      if mongo_db is not None and settings.ANALYSIS_CACHE_PERSISTENT:
+         result = await self._get_persistent(key, mongo_db)
+         if result is not None:
+            self.persistent_hits += 1
+            self.put(key, result)
+            return result
+
+      self.misses += 1
+      return None
+
+   def put(self, key: str, result: Dict[str, Any]) -> None:
+      with self._lock:
+         self._entries[key] = (time.monotonic() + self.ttl_seconds, result)
+         self._entries.move_to_end(key)
+         while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+   def clear(self) -> None:
+      with self._lock:
+         self._entries.clear()
+
+   def stats(self) -> Dict[str, int]:
+      return {
+         "entries": len(self._entries),
+         "max_entries": self.max_entries,
+         "memory_hits": self.memory_hits,
+         "persistent_hits": self.persistent_hits,
+         "misses": self.misses,
+      }
+
+
+analysis_cache = AnalysisCache(
+   max_entries=settings.ANALYSIS_CACHE_MAX_ENTRIES,
+   ttl_seconds=settings.ANALYSIS_CACHE_TTL_SECONDS,
+)
+service_stats.register("analysis_cache", analysis_cache.stats)
+
+
+async def ensure_cache_indexes(mongo_db) -> None:
+   try:
+      await mongo_db.ai_logs.create_index([("cache_key", 1), ("created_at", -1)])
+   except PyMongoError:
+      pass
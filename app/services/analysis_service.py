@@ -0,0 +1,473 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import service_stats
+from app.models.analysis import (
+   ResumeAnalysis,
+   AnalysisSkill,
+   AnalysisPoint,
+   SkillKind,
+   PointKind,
+   normalize_skill,
+)
+from app.models.resume import Resume
+from app.schemas.analysis import ResumeAnalysisRead
+from app.services.ai_client import (
+   analyze_resume,
+   reanalyze_resume,
+   stream_analysis,
+   AIAnalysisError,
+   PROMPT_VERSION,
+)
+from app.services.analysis_cache import analysis_cache, make_cache_key
+from app.services.analytics import analytics_rollups
+from app.services.local_scorer import score_resume
+from app.services.mongo_writer import mongo_writer
+from app.services.resume_versions import diff_sections, section_digests, split_sections, text_digest
+from app.services.search_index import search_index
+from app.services.single_flight import SingleFlight
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# In-flight LLM analyses keyed like the cache (resume, JD, prompt version)
+analysis_flights = SingleFlight()
+service_stats.register("analysis_coalescing", analysis_flights.stats)
+
+
+class AnalysisMode(str, Enum):
+   LLM = "llm"
+   FAST = "fast"
+
+
+class DeltaOutcome(str, Enum):
+   UNCHANGED = "unchanged"
+   INCREMENTAL = "incremental"
+   FULL = "full"
+
+
+@dataclass
+class DeltaPlan:
+   outcome: DeltaOutcome
+   # Stored as the new analysis's source_digest
+   digest: Dict[str, Any]
+   previous: Optional[ResumeAnalysis] = None
+   sections: List[str] = field(default_factory=list)
+   removed: List[str] = field(default_factory=list)
+
+
+class DeltaCounters:
+   def __init__(self):
+      self.counts = {outcome: 0 for outcome in DeltaOutcome}
+
+   def record(self, outcome: DeltaOutcome) -> None:
+      self.counts[outcome] += 1
+
+   def stats(self) -> Dict[str, Any]:
+      total = sum(self.counts.values())
+      return {
+         **{outcome.value: count for outcome, count in self.counts.items()},
+         "llm_calls_avoided": self.counts[DeltaOutcome.UNCHANGED],
+         "reuse_ratio": round((total - self.counts[DeltaOutcome.FULL]) / total, 3) if total else None,
+      }
+
+
+analysis_deltas = DeltaCounters()
+service_stats.register("analysis_delta", analysis_deltas.stats)
+
+
+def to_analysis_read(analysis: ResumeAnalysis) -> ResumeAnalysisRead:
+   return ResumeAnalysisRead(
+      id=analysis.id,
+      created_at=analysis.created_at,
+      overall_score=analysis.overall_score,
+      experience_summary=analysis.experience_summary,
+      skills_technical=analysis.skills_technical,
+      skills_soft=analysis.skills_soft,
+      strengths=analysis.strengths,
+      gaps=analysis.gaps,
+      improvement_suggestions=analysis.improvement_suggestions,
+   )
+
+
+def to_result(analysis: ResumeAnalysis) -> Dict[str, Any]:
+   # Inverse of build_analysis: the stored analysis in the model's JSON shape
+   return {
+      "overall_score": analysis.overall_score,
+      "experience_summary": analysis.experience_summary,
+      "skills": {"technical": analysis.skills_technical, "soft": analysis.skills_soft},
+      "strengths": analysis.strengths,
+      "gaps": analysis.gaps,
+      "improvement_suggestions": analysis.improvement_suggestions,
+   }
+
+
+async def plan_analysis(db: AsyncSession, resume: Resume, force: bool = False) -> DeltaPlan:
+   # Compares the resume's sections with those the latest LLM analysis was
+   # computed from: nothing relevant changed -> reuse that analysis; a few
+   # sections changed -> send only those plus the prior analysis; otherwise
+   # (or for a new JD or prompt) a full analysis. Incremental updates are
+   # chained at most ANALYSIS_DELTA_MAX_DEPTH times before a full refresh.
+   sections = split_sections(resume.resume_text)
+   digest = {
+      "prompt": PROMPT_VERSION,
+      "job_description": text_digest(resume.job_description),
+      "depth": 0,
+      "sections": section_digests(sections),
+   }
+   full = DeltaPlan(DeltaOutcome.FULL, digest)
+   if force or not settings.ANALYSIS_DELTA_ENABLED:
+      return full
+
+   previous = await db.scalar(
+      select(ResumeAnalysis)
+      .where(ResumeAnalysis.resume_id == resume.id, ResumeAnalysis.source_digest.is_not(None))
+      .order_by(ResumeAnalysis.id.desc())
+      .limit(1)
+   )
+   if previous is None:
+      return full
+   source = previous.source_digest
+   if source.get("prompt") != PROMPT_VERSION or source.get("job_description") != digest["job_description"]:
+      return full
+
+   diff = diff_sections(source.get("sections") or {}, digest["sections"])
+   if not diff.modified:
+      return DeltaPlan(DeltaOutcome.UNCHANGED, source, previous)
+
+   touched = set(diff.added) | set(diff.changed)
+   changed = [text for key, text in sections if key in touched]
+   ratio = sum(len(text) for text in changed) / max(1, len(resume.resume_text))
+   depth = source.get("depth", 0) + 1
+   if ratio > settings.ANALYSIS_DELTA_MAX_CHANGED_RATIO or depth > settings.ANALYSIS_DELTA_MAX_DEPTH:
+      return full
+   return DeltaPlan(
+      DeltaOutcome.INCREMENTAL, {**digest, "depth": depth}, previous, changed, diff.removed
+   )
+
+
+async def get_analysis_result(
+   resume_text: str,
+   job_description: Optional[str],
+   mongo_db,
+   force: bool = False,
+   analyze: Optional[Callable[[], Awaitable[Dict[str, Any]]]] = None,
+) -> Tuple[Dict[str, Any], str, bool]:
+   # Returns (raw result, cache key, served from cache); raises AIAnalysisError.
+   # `analyze` replaces the full model call on a cache miss (incremental updates).
+   cache_key = make_cache_key(resume_text, job_description)
+   result = None
+   if settings.ANALYSIS_CACHE_ENABLED and not force:
+      result = await analysis_cache.get(cache_key, mongo_db)
+   cached = result is not None
+
+   if not cached:
+      async def call():
+         if analyze is not None:
+            result = await analyze()
+         else:
+            result = await analyze_resume(resume_text, job_description)
+         # Local fallback answers are only good until a model is reachable again
+         if settings.ANALYSIS_CACHE_ENABLED and not result.get("degraded"):
+            analysis_cache.put(cache_key, result)
+         return result
+
+      if settings.ANALYSIS_COALESCE_ENABLED:
+         result = await analysis_flights.do(cache_key, call)
+      else:
+         result = await call()
+   return result, cache_key, cached
+
+
+def _clean(items: Any) -> List[str]:
+   if not isinstance(items, list):
+      return []
+   return [str(item).strip() for item in items if item is not None and str(item).strip()]
+
+
+def build_analysis(resume_id: int, result: Dict[str, Any]) -> ResumeAnalysis:
+   skills = result.get("skills") or {}
+   analysis = ResumeAnalysis(
+      resume_id=resume_id,
+      overall_score=result.get("overall_score"),
+      experience_summary=result.get("experience_summary"),
+   )
+   analysis.skills = [
+      AnalysisSkill(
+         resume_id=resume_id,
+         kind=kind,
+         position=position,
+         name=name,
+         name_normalized=normalize_skill(name),
+      )
+      for kind, names in (
+         (SkillKind.TECHNICAL, skills.get("technical")),
+         (SkillKind.SOFT, skills.get("soft")),
+      )
+      for position, name in enumerate(_clean(names))
+   ]
+   analysis.points = [
+      AnalysisPoint(kind=kind, position=position, text=text)
+      for kind, texts in (
+         (PointKind.STRENGTH, result.get("strengths")),
+         (PointKind.GAP, result.get("gaps")),
+         (PointKind.SUGGESTION, result.get("improvement_suggestions")),
+      )
+      for position, text in enumerate(_clean(texts))
+   ]
+   return analysis
+
+
+def build_ai_log(
+   resume_id: int,
+   user_id: int,
+   result: Dict[str, Any],
+   cache_key: str,
+   cached: bool,
+   **extra: Any,
+) -> Dict[str, Any]:
+   return {
+      "resume_id": resume_id,
+      "user_id": user_id,
+      "raw_result": result,
+      "cache_key": cache_key,
+      "prompt_version": PROMPT_VERSION,
+      "cached": cached,
+      "created_at": datetime.now(timezone.utc),
+      **extra,
+   }
+
+
+async def save_analysis(
+   db: AsyncSession,
+   resume: Resume,
+   result: Dict[str, Any],
+   source_digest: Optional[Dict[str, Any]] = None,
+) -> ResumeAnalysis:
+   analysis = build_analysis(resume.id, result)
+   analysis.source_digest = source_digest
+   db.add(analysis)
+   await db.flush()
+   await search_index.upsert(db, resume, analysis.skills_technical)
+   await analytics_rollups.record(db, [(resume.user_id, resume.target_role, analysis)])
+   await db.commit()
+   return analysis
+
+
+async def run_analysis(
+   db: AsyncSession,
+   mongo_db,
+   resume: Resume,
+   user_id: int,
+   force: bool = False,
+   mode: str = AnalysisMode.LLM,
+) -> ResumeAnalysisRead:
+   # Raises AIAnalysisError when the model call fails; callers map it to HTTP/job errors
+   if mode == AnalysisMode.FAST:
+      result = score_resume(resume.resume_text, resume.job_description)
+      analysis = await save_analysis(db, resume, result)
+      # Local scores are cheap to recompute, so they are not logged
+      return to_analysis_read(analysis)
+
+   plan = await plan_analysis(db, resume, force=force)
+   analysis_deltas.record(plan.outcome)
+   if plan.outcome == DeltaOutcome.UNCHANGED:
+      return to_analysis_read(plan.previous)
+
+   analyze = None
+   if plan.outcome == DeltaOutcome.INCREMENTAL:
+      previous = to_result(plan.previous)
+
+      def analyze():
+         return reanalyze_resume(previous, plan.sections, plan.removed, resume.job_description)
+
+   result, cache_key, cached = await get_analysis_result(
+      resume.resume_text, resume.job_description, mongo_db, force=force, analyze=analyze
+   )
+   digest = None if result.get("degraded") else plan.digest
+   analysis = await save_analysis(db, resume, result, digest)
+
+   # Log raw LLM response to Mongo
+   await mongo_writer.insert(
+      "ai_logs",
+      build_ai_log(resume.id, user_id, result, cache_key, cached, delta=plan.outcome.value),
+   )
+
+   return to_analysis_read(analysis)
+
+
+async def stream_run_analysis(
+   db: AsyncSession,
+   mongo_db,
+   resume: Resume,
+   user_id: int,
+   force: bool = False,
+) -> AsyncIterator[Dict[str, Any]]:
+   # Streaming variant of run_analysis: yields a "section" event per completed
+   # top-level field, then persists and yields the stored "result".
+   # Incremental updates are not streamed; their sections are emitted at once.
+   plan = await plan_analysis(db, resume, force=force)
+   analysis_deltas.record(plan.outcome)
+   if plan.outcome == DeltaOutcome.UNCHANGED:
+      for key, value in to_result(plan.previous).items():
+         yield {"type": "section", "key": key, "value": value}
+      yield {"type": "result", "cached": True, "analysis": to_analysis_read(plan.previous)}
+      return
+
+   cache_key = make_cache_key(resume.resume_text, resume.job_description)
+   result = None
+   if settings.ANALYSIS_CACHE_ENABLED and not force:
+      result = await analysis_cache.get(cache_key, mongo_db)
+   cached = result is not None
+
+   if cached:
+      for key, value in result.items():
+         yield {"type": "section", "key": key, "value": value}
+   else:
+      if plan.outcome == DeltaOutcome.INCREMENTAL:
+         result = await reanalyze_resume(
+            to_result(plan.previous), plan.sections, plan.removed, resume.job_description
+         )
+         for key, value in result.items():
+            yield {"type": "section", "key": key, "value": value}
+      else:
+         result = {}
+         async for key, value in stream_analysis(resume.resume_text, resume.job_description):
+            result[key] = value
+            yield {"type": "section", "key": key, "value": value}
+      if settings.ANALYSIS_CACHE_ENABLED and not result.get("degraded"):
+         analysis_cache.put(cache_key, result)
+
+   digest = None if result.get("degraded") else plan.digest
+   analysis = await save_analysis(db, resume, result, digest)
+   await mongo_writer.insert(
+      "ai_logs",
+      build_ai_log(
+         resume.id, user_id, result, cache_key, cached, streamed=True, delta=plan.outcome.value
+      ),
+   )
+   yield {"type": "result", "cached": cached, "analysis": to_analysis_read(analysis)}
+
+
+async def analyze_batch(
+   resumes: List[Tuple[int, str, Optional[str]]],
+   job_descriptions: List[str],
+   user_id: int,
+   mongo_db,
+   force: bool = False,
+) -> AsyncIterator[Dict[str, Any]]:
+   # Scores every (resume, job description) pair with bounded concurrency and
+   # yields one event per pair as it completes. With no job descriptions each
+   # resume is scored against its own. Rows are written in chunked bulk inserts,
+   # only for pairs scored against the resume's own job description: a
+   # ResumeAnalysis is the resume's latest analysis, which the search index
+   # and rollups read. Other pairs are returned and logged to ai_logs only.
+   if job_descriptions:
+      pairs = [
+         (resume_id, text, jd_index, jd)
+         for resume_id, text, _ in resumes
+         for jd_index, jd in enumerate(job_descriptions)
+      ]
+   else:
+      pairs = [(resume_id, text, None, jd) for resume_id, text, jd in resumes]
+   own_jd = {resume_id: jd for resume_id, _, jd in resumes}
+
+   pending = iter(pairs)
+   completed: asyncio.Queue = asyncio.Queue()
+
+   async def worker():
+      try:
+         for resume_id, text, jd_index, jd in pending:
+            try:
+               outcome = await get_analysis_result(text, jd, mongo_db, force=force)
+            except AIAnalysisError as e:
+               await completed.put((resume_id, jd_index, None, str(e)))
+               continue
+            except Exception:
+               # One bad pair must not end the worker and drop its share
+               logger.exception("Batch analysis of resume %s failed", resume_id)
+               await completed.put((resume_id, jd_index, None, "Analysis failed."))
+               continue
+            await completed.put((resume_id, jd_index, outcome, None))
+      finally:
+         completed.put_nowait(None)
+
+   concurrency = max(1, min(settings.BATCH_ANALYZE_CONCURRENCY, len(pairs)))
+   workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+   rows: List[ResumeAnalysis] = []
+   logs: List[Dict[str, Any]] = []
+
+   async def flush():
+      if rows:
+         async with AsyncSessionLocal() as db:
+            db.add_all(rows)
+            latest = {row.resume_id: row.skills_technical for row in rows}
+            roles = {}
+            for resume in await db.scalars(select(Resume).where(Resume.id.in_(latest))):
+               await search_index.upsert(db, resume, latest[resume.id])
+               roles[resume.id] = resume.target_role
+            await analytics_rollups.record(
+               db, [(user_id, roles.get(row.resume_id), row) for row in rows]
+            )
+            await db.commit()
+      await mongo_writer.insert_many("ai_logs", logs)
+      rows.clear()
+      logs.clear()
+
+   succeeded = failed = 0
+   try:
+      finished = 0
+      while finished < concurrency:
+         item = await completed.get()
+         if item is None:
+            finished += 1
+            continue
+
+         resume_id, jd_index, outcome, error = item
+         if error is not None:
+            failed += 1
+            yield {"type": "error", "resume_id": resume_id, "job_index": jd_index, "error": error}
+            continue
+
+         result, cache_key, cached = outcome
+         succeeded += 1
+         job_description = job_descriptions[jd_index] if jd_index is not None else None
+         stored = jd_index is None or job_description == own_jd[resume_id]
+         if stored:
+            rows.append(build_analysis(resume_id, result))
+         logs.append(
+            build_ai_log(
+               resume_id,
+               user_id,
+               result,
+               cache_key,
+               cached,
+               job_description=job_description,
+               batch=True,
+            )
+         )
+         if len(logs) >= settings.BATCH_ANALYZE_WRITE_CHUNK:
+            await flush()
+         yield {
+            "type": "result",
+            "resume_id": resume_id,
+            "job_index": jd_index,
+            "cached": cached,
+            "stored": stored,
+            "result": result,
+         }
+      await flush()
+   finally:
+      for task in workers:
+         task.cancel()
+
+   yield {"type": "done", "total": len(pairs), "succeeded": succeeded, "failed": failed}
@@ -0,0 +1,500 @@
+import asyncio
+import logging
+import re
+import unicodedata
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import service_stats
+from app.models.analysis import AnalysisPoint, AnalysisSkill, PointKind, ResumeAnalysis
+from app.models.analytics import GapRollup, ScoreRollup, SkillDailyRollup
+from app.models.resume import Resume
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+SCORE_BUCKETS = 10
+
+_PUNCTUATION = re.compile(r"[^\w\s+#]")
+_SPACES = re.compile(r"\s+")
+
+_WRITE_CHUNK = 500
+
+
+def gap_key(text: str) -> str:
+   # "Limited AWS experience." and "limited AWS experience" count as one gap
+   text = unicodedata.normalize("NFKC", text).casefold()
+   return _SPACES.sub(" ", _PUNCTUATION.sub(" ", text)).strip()[:255]
+
+
+def _role(target_role: Optional[str]) -> str:
+   return (target_role or "").strip()[:200]
+
+
+def _bucket(score: int) -> int:
+   return min(max(score, 0) // 10, SCORE_BUCKETS - 1)
+
+
+def _mean(total: int, count: Optional[int]) -> Optional[float]:
+   return round(total / count, 1) if count else None
+
+
+def _day(analysis: ResumeAnalysis) -> date:
+   # Pending analyses get created_at at flush time
+   return (analysis.created_at or datetime.now(timezone.utc)).date()
+
+
+def _insert(dialect: str):
+   if dialect == "sqlite":
+      from sqlalchemy.dialects.sqlite import insert
+   elif dialect == "postgresql":
+      from sqlalchemy.dialects.postgresql import insert
+   elif dialect == "mysql":
+      from sqlalchemy.dialects.mysql import insert
+   else:
+      raise NotImplementedError(f"Analytics rollups need upserts; unsupported dialect {dialect}")
+   return insert
+
+
+class RollupDelta:
+   # Per-key increments for a batch of analyses, applied with one upsert per
+   # table. Deletions are negative increments.
+
+   def __init__(self):
+      self.scores: Dict[Tuple[int, str, int], List[int]] = {}
+      self.gaps: Dict[Tuple[int, str, str], List[Any]] = {}
+      self.skills: Dict[Tuple[int, str, date, str], List[Any]] = {}
+
+   def __bool__(self) -> bool:
+      return bool(self.scores or self.gaps or self.skills)
+
+   def add_score(self, user_id: int, role: str, score: Optional[int], sign: int = 1) -> None:
+      if score is None:
+         return
+      entry = self.scores.setdefault((user_id, role, _bucket(score)), [0, 0])
+      entry[0] += sign
+      entry[1] += sign * score
+
+   def add_gap(self, user_id: int, role: str, text: str, sign: int = 1) -> None:
+      key = gap_key(text)
+      if key:
+         self.gaps.setdefault((user_id, role, key), [text.strip(), 0])[1] += sign
+
+   def add_skill(
+      self, user_id: int, kind: str, day: date, name: str, normalized: str, sign: int = 1
+   ) -> None:
+      self.skills.setdefault((user_id, kind, day, normalized[:255]), [name[:255], 0])[1] += sign
+
+   def add_analysis(
+      self, user_id: int, target_role: Optional[str], analysis: ResumeAnalysis, sign: int = 1
+   ) -> None:
+      role = _role(target_role)
+      self.add_score(user_id, role, analysis.overall_score, sign)
+      for text in {gap_key(g): g for g in analysis.gaps}.values():
+         self.add_gap(user_id, role, text, sign)
+      day = _day(analysis)
+      seen = set()
+      for skill in analysis.skills:
+         if (skill.kind, skill.name_normalized) not in seen:
+            seen.add((skill.kind, skill.name_normalized))
+            self.add_skill(user_id, skill.kind, day, skill.name, skill.name_normalized, sign)
+
+   async def apply(self, db: AsyncSession) -> None:
+      insert = _insert(db.get_bind().dialect.name)
+      score_rows = [
+         {"user_id": u, "target_role": r, "bucket": b, "analyses": n, "score_sum": s}
+         for (u, r, b), (n, s) in self.scores.items()
+      ]
+      gap_rows = [
+         {"user_id": u, "target_role": r, "gap_key": k, "gap": text, "analyses": n}
+         for (u, r, k), (text, n) in self.gaps.items()
+      ]
+      skill_rows = [
+         {"user_id": u, "kind": kind, "day": day, "name_normalized": k, "name": name, "analyses": n}
+         for (u, kind, day, k), (name, n) in self.skills.items()
+      ]
+      for model, rows, counters in (
+         (ScoreRollup, score_rows, ("analyses", "score_sum")),
+         (GapRollup, gap_rows, ("analyses",)),
+         (SkillDailyRollup, skill_rows, ("analyses",)),
+      ):
+         table = model.__table__
+         keys = [c.name for c in table.primary_key]
+         for start in range(0, len(rows), _WRITE_CHUNK):
+            stmt = insert(table).values(rows[start : start + _WRITE_CHUNK])
+            if hasattr(stmt, "on_duplicate_key_update"):
+               stmt = stmt.on_duplicate_key_update({c: table.c[c] + stmt.inserted[c] for c in counters})
+            else:
+               stmt = stmt.on_conflict_do_update(
+                  index_elements=keys, set_={c: table.c[c] + stmt.excluded[c] for c in counters}
+               )
+            await db.execute(stmt)
+
+      if any(n < 0 for n, _ in self.scores.values()) or any(
+         entry[1] < 0 for entry in (*self.gaps.values(), *self.skills.values())
+      ):
+         users = {key[0] for key in (*self.scores, *self.gaps, *self.skills)}
+         for model in (ScoreRollup, GapRollup, SkillDailyRollup):
+            await db.execute(delete(model).where(model.user_id.in_(users), model.analyses <= 0))
+
+
+class AnalyticsRollups:
+   # Keeps the analytics_* tables current and serves /analytics/* from them.
+   #
+   # record() runs inside the transaction that writes (or deletes) analyses,
+   # so rollups commit or roll back with them. The background job rebuilds
+   # each user's rollups from the analysis tables every
+   # ANALYTICS_COMPACTION_INTERVAL_SECONDS, and on startup when the rollups
+   # are empty but analyses exist. That fixes drift from deletions after a
+   # target_role change or from out-of-band writes, and drops zero rows. It
+   # also refreshes the per-day LLM usage rollup in Mongo (analytics_llm_daily)
+   # from ai_logs with an aggregation pipeline every
+   # ANALYTICS_LLM_REFRESH_SECONDS.
+
+   def __init__(
+      self, compaction_interval: float, llm_refresh_interval: float, llm_backfill_days: int
+   ):
+      self.compaction_interval = compaction_interval
+      self.llm_refresh_interval = llm_refresh_interval
+      self.llm_backfill_days = llm_backfill_days
+      self._task: Optional[asyncio.Task] = None
+      self._llm_watermark: Optional[datetime] = None
+      self.compactions = 0
+      self.last_compaction: Optional[datetime] = None
+      self.llm_refreshes = 0
+
+   async def record(
+      self,
+      db: AsyncSession,
+      entries: Iterable[Tuple[int, Optional[str], ResumeAnalysis]],
+      sign: int = 1,
+   ) -> None:
+      # entries: (user_id, resume target_role, analysis); sign=-1 on delete
+      delta = RollupDelta()
+      for user_id, target_role, analysis in entries:
+         delta.add_analysis(user_id, target_role, analysis, sign)
+      if delta:
+         await delta.apply(db)
+
+   # Compaction
+
+   async def _rebuild_user(self, user_id: int) -> None:
+      # Delete, then re-add with the same upserts the write path uses, so an
+      # analysis committed concurrently still lands on top of the rebuilt rows
+      async with AsyncSessionLocal() as db:
+         for model in (ScoreRollup, GapRollup, SkillDailyRollup):
+            await db.execute(delete(model).where(model.user_id == user_id))
+
+         delta = RollupDelta()
+         days: Dict[int, date] = {}
+         roles: Dict[int, str] = {}
+         analyses = await db.stream(
+            select(
+               ResumeAnalysis.id,
+               ResumeAnalysis.overall_score,
+               ResumeAnalysis.created_at,
+               Resume.target_role,
+            )
+            .join(Resume, Resume.id == ResumeAnalysis.resume_id)
+            .where(Resume.user_id == user_id)
+            .execution_options(yield_per=5000)
+         )
+         async for analysis_id, score, created_at, target_role in analyses:
+            roles[analysis_id] = _role(target_role)
+            days[analysis_id] = (created_at or datetime.now(timezone.utc)).date()
+            delta.add_score(user_id, roles[analysis_id], score)
+
+         # Ordered by analysis so duplicates within one analysis are skipped
+         # with a per-analysis set
+         skills = await db.stream(
+            select(
+               AnalysisSkill.analysis_id,
+               AnalysisSkill.kind,
+               AnalysisSkill.name,
+               AnalysisSkill.name_normalized,
+            )
+            .join(Resume, Resume.id == AnalysisSkill.resume_id)
+            .where(Resume.user_id == user_id)
+            .order_by(AnalysisSkill.analysis_id)
+            .execution_options(yield_per=5000)
+         )
+         current, seen = None, set()
+         async for analysis_id, kind, name, normalized in skills:
+            if analysis_id != current:
+               current, seen = analysis_id, set()
+            if (kind, normalized) not in seen:
+               seen.add((kind, normalized))
+               delta.add_skill(user_id, kind, days[analysis_id], name, normalized)
+
+         gaps = await db.stream(
+            select(AnalysisPoint.analysis_id, AnalysisPoint.text)
+            .join(ResumeAnalysis, ResumeAnalysis.id == AnalysisPoint.analysis_id)
+            .join(Resume, Resume.id == ResumeAnalysis.resume_id)
+            .where(Resume.user_id == user_id, AnalysisPoint.kind == PointKind.GAP)
+            .order_by(AnalysisPoint.analysis_id)
+            .execution_options(yield_per=5000)
+         )
+         current, seen = None, set()
+         async for analysis_id, text in gaps:
+            if analysis_id != current:
+               current, seen = analysis_id, set()
+            if gap_key(text) not in seen:
+               seen.add(gap_key(text))
+               delta.add_gap(user_id, roles[analysis_id], text)
+
+         if delta:
+            await delta.apply(db)
+         await db.commit()
+
+   async def compact(self) -> int:
+      async with AsyncSessionLocal() as db:
+         users = list(
+            await db.scalars(
+               select(Resume.user_id)
+               .join(ResumeAnalysis, ResumeAnalysis.resume_id == Resume.id)
+               .distinct()
+            )
+         )
+         # Users whose analyses are all gone
+         for model in (ScoreRollup, GapRollup, SkillDailyRollup):
+            await db.execute(delete(model).where(model.user_id.notin_(users)))
+         await db.commit()
+      for user_id in users:
+         await self._rebuild_user(user_id)
+      self.compactions += 1
+      self.last_compaction = datetime.now(timezone.utc)
+      return len(users)
+
+   async def _needs_backfill(self) -> bool:
+      async with AsyncSessionLocal() as db:
+         has_rollups = await db.scalar(select(ScoreRollup.user_id).limit(1))
+         has_analyses = await db.scalar(select(ResumeAnalysis.id).limit(1))
+      return has_rollups is None and has_analyses is not None
+
+   # LLM usage (Mongo)
+
+   async def refresh_llm_usage(self, mongo_db) -> int:
+      now = datetime.now(timezone.utc)
+      since = self._llm_watermark or now - timedelta(days=self.llm_backfill_days)
+      # Whole days are recomputed, so re-running over a day is idempotent
+      since = datetime(since.year, since.month, since.day, tzinfo=timezone.utc)
+      pipeline = [
+         {"$match": {"created_at": {"$gte": since}}},
+         {
+            "$group": {
+               "_id": {
+                  "user_id": "$user_id",
+                  "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
+               },
+               "analyses": {"$sum": 1},
+               "cached": {"$sum": {"$cond": ["$cached", 1, 0]}},
+               "streamed": {"$sum": {"$cond": [{"$ifNull": ["$streamed", False]}, 1, 0]}},
+               "score_sum": {"$sum": {"$ifNull": ["$raw_result.overall_score", 0]}},
+               "scored": {"$sum": {"$cond": [{"$isNumber": "$raw_result.overall_score"}, 1, 0]}},
+            }
+         },
+      ]
+      cursor = await mongo_db.ai_logs.aggregate(pipeline)
+      ops = []
+      async for row in cursor:
+         user_id, day = row["_id"]["user_id"], row["_id"]["day"]
+         ops.append(
+            UpdateOne(
+               {"_id": f"{user_id}:{day}"},
+               {
+                  "$set": {
+                     "user_id": user_id,
+                     "day": day,
+                     **{k: row[k] for k in ("analyses", "cached", "streamed", "score_sum", "scored")},
+                  }
+               },
+               upsert=True,
+            )
+         )
+      if ops:
+         await mongo_db.analytics_llm_daily.bulk_write(ops, ordered=False)
+      self._llm_watermark = now
+      self.llm_refreshes += 1
+      return len(ops)
+
+   # Background job
+
+   async def _run(self, mongo_db) -> None:
+      try:
+         await mongo_db.analytics_llm_daily.create_index([("user_id", 1), ("day", 1)])
+         await mongo_db.ai_logs.create_index([("created_at", 1)])
+      except PyMongoError:
+         pass
+      loop = asyncio.get_running_loop()
+      next_compaction = loop.time() + self.compaction_interval
+      if self.compaction_interval and await self._needs_backfill():
+         next_compaction = loop.time()
+      next_llm_refresh = loop.time()
+      while True:
+         now = loop.time()
+         if self.compaction_interval and now >= next_compaction:
+            try:
+               await self.compact()
+            except Exception:
+               logger.exception("Analytics compaction failed")
+            next_compaction = loop.time() + self.compaction_interval
+         if self.llm_refresh_interval and now >= next_llm_refresh:
+            try:
+               await self.refresh_llm_usage(mongo_db)
+            except PyMongoError as e:
+               logger.warning("LLM usage rollup failed: %s", e)
+            next_llm_refresh = loop.time() + self.llm_refresh_interval
+         deadlines = [
+            deadline
+            for deadline, enabled in (
+               (next_compaction, self.compaction_interval),
+               (next_llm_refresh, self.llm_refresh_interval),
+            )
+            if enabled
+         ]
+         if not deadlines:
+            return
+         await asyncio.sleep(max(0.0, min(deadlines) - loop.time()))
+
+   async def start(self, mongo_db) -> None:
+      if self._task is None:
+         self._task = asyncio.create_task(self._run(mongo_db), name="analytics-rollups")
+
+   async def stop(self) -> None:
+      if self._task is not None:
+         self._task.cancel()
+         try:
+            await self._task
+         except asyncio.CancelledError:
+            pass
+         self._task = None
+
+   # Reads
+
+   async def score_distribution(
+      self, db: AsyncSession, user_id: int, target_role: Optional[str] = None
+   ) -> List[Dict[str, Any]]:
+      query = select(
+         ScoreRollup.target_role, ScoreRollup.bucket, ScoreRollup.analyses, ScoreRollup.score_sum
+      ).where(ScoreRollup.user_id == user_id)
+      if target_role is not None:
+         query = query.where(ScoreRollup.target_role == _role(target_role))
+      roles: Dict[str, Dict[str, Any]] = {}
+      for role, bucket, analyses, score_sum in await db.execute(query):
+         entry = roles.setdefault(role, {"analyses": 0, "score_sum": 0, "buckets": [0] * SCORE_BUCKETS})
+         entry["analyses"] += analyses
+         entry["score_sum"] += score_sum
+         entry["buckets"][bucket] += analyses
+      return [
+         {
+            "target_role": role or None,
+            "analyses": entry["analyses"],
+            "mean_score": _mean(entry["score_sum"], entry["analyses"]),
+            "buckets": entry["buckets"],
+         }
+         for role, entry in sorted(roles.items(), key=lambda item: -item[1]["analyses"])
+      ]
+
+   async def top_gaps(
+      self, db: AsyncSession, user_id: int, limit: int, target_role: Optional[str] = None
+   ) -> List[Dict[str, Any]]:
+      analyses = func.sum(GapRollup.analyses)
+      query = select(func.min(GapRollup.gap), analyses).where(GapRollup.user_id == user_id)
+      if target_role is not None:
+         query = query.where(GapRollup.target_role == _role(target_role))
+      rows = await db.execute(
+         query.group_by(GapRollup.gap_key).order_by(analyses.desc(), GapRollup.gap_key).limit(limit)
+      )
+      return [{"gap": gap, "analyses": count} for gap, count in rows]
+
+   async def skill_trend(
+      self,
+      db: AsyncSession,
+      user_id: int,
+      kind: str,
+      interval: str,
+      days: int,
+      limit: int,
+      skill: Optional[str] = None,
+   ) -> Dict[str, Any]:
+      today = datetime.now(timezone.utc).date()
+      start = today - timedelta(days=days - 1)
+      where = [
+         SkillDailyRollup.user_id == user_id,
+         SkillDailyRollup.kind == kind,
+         SkillDailyRollup.day >= start,
+      ]
+      if skill:
+         where.append(SkillDailyRollup.name_normalized == " ".join(skill.split()).casefold())
+      # Pick the top skills first so only their daily rows are fetched
+      total = func.sum(SkillDailyRollup.analyses)
+      top = (
+         await db.execute(
+            select(SkillDailyRollup.name_normalized, func.min(SkillDailyRollup.name), total)
+            .where(*where)
+            .group_by(SkillDailyRollup.name_normalized)
+            .order_by(total.desc(), SkillDailyRollup.name_normalized)
+            .limit(limit)
+         )
+      ).all()
+
+      def period(day: date) -> date:
+         if interval == "week":
+            return day - timedelta(days=day.weekday())
+         if interval == "month":
+            return day.replace(day=1)
+         return day
+
+      periods = sorted({period(start + timedelta(days=i)) for i in range(days)})
+      position = {p: i for i, p in enumerate(periods)}
+      series = {
+         normalized: {"skill": name, "total": count, "counts": [0] * len(periods)}
+         for normalized, name, count in top
+      }
+      if series:
+         rows = await db.execute(
+            select(
+               SkillDailyRollup.day, SkillDailyRollup.name_normalized, SkillDailyRollup.analyses
+            ).where(*where, SkillDailyRollup.name_normalized.in_(series))
+         )
+         for day, normalized, analyses in rows:
+            series[normalized]["counts"][position[period(day)]] += analyses
+      return {"kind": kind, "interval": interval, "periods": periods, "series": list(series.values())}
+
+   async def llm_usage(self, mongo_db, user_id: int, days: int) -> List[Dict[str, Any]]:
+      since = (datetime.now(timezone.utc).date() - timedelta(days=days - 1)).isoformat()
+      cursor = mongo_db.analytics_llm_daily.find(
+         {"user_id": user_id, "day": {"$gte": since}}, {"_id": 0, "user_id": 0}
+      ).sort("day", 1)
+      rows = []
+      async for row in cursor:
+         row["mean_score"] = _mean(row.pop("score_sum"), row.get("scored"))
+         rows.append(row)
+      return rows
+
+   def stats(self) -> Dict[str, Any]:
+      return {
+         "compactions": self.compactions,
+         "last_compaction_timestamp_seconds": (
+            self.last_compaction.timestamp() if self.last_compaction else None
+         ),
+         "llm_refreshes": self.llm_refreshes,
+         "llm_watermark_timestamp_seconds": (
+            self._llm_watermark.timestamp() if self._llm_watermark else None
+         ),
+      }
+
+
+analytics_rollups = AnalyticsRollups(
+   compaction_interval=settings.ANALYTICS_COMPACTION_INTERVAL_SECONDS,
+   llm_refresh_interval=settings.ANALYTICS_LLM_REFRESH_SECONDS,
+   llm_backfill_days=settings.ANALYTICS_LLM_BACKFILL_DAYS,
+)
+service_stats.register("analytics_rollups", analytics_rollups.stats)
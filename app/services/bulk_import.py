@@ -0,0 +1,332 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, AsyncIterator, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, select
+from starlette.concurrency import iterate_in_threadpool
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.models.resume import Resume
+from app.services.embeddings import embedding_index
+from app.services.local_scorer import local_scorer
+from app.services.mongo_writer import mongo_writer
+from app.services.search_index import search_index
+from app.services.text_extraction import (
+   DOCUMENT_EXTENSIONS,
+   TEXT_EXTENSIONS,
+   ExtractionError,
+   extract_text,
+   normalize_text,
+   title_from_filename,
+)
+
+settings = get_settings()
+
+RECORD_EXTENSIONS = {".jsonl", ".ndjson"}
+FILE_EXTENSIONS = TEXT_EXTENSIONS | DOCUMENT_EXTENSIONS
+
+
+@dataclass
+class Rejected:
+   reason: str
+
+
+# (source name, file bytes | JSONL record | Rejected)
+Item = Tuple[str, Any]
+
+
+def _extension(name: str) -> str:
+   return os.path.splitext(name)[1].lower()
+
+
+def iter_jsonl(lines: Iterable[bytes], prefix: str = "") -> Iterator[Item]:
+   for lineno, line in enumerate(lines, 1):
+      line = line.strip()
+      if not line:
+         continue
+      name = f"{prefix}:{lineno}" if prefix else f"line {lineno}"
+      try:
+         record = json.loads(line)
+      except ValueError as e:
+         yield name, Rejected(f"Invalid JSON: {e}")
+         continue
+      yield name, record if isinstance(record, dict) else Rejected("Expected a JSON object.")
+
+
+def iter_zip(fileobj: BinaryIO, prefix: str = "") -> Iterator[Item]:
+   # Members are read one at a time; nested archives are not expanded
+   with zipfile.ZipFile(fileobj) as archive:
+      for info in archive.infolist():
+         extension = _extension(info.filename)
+         if info.is_dir() or extension not in FILE_EXTENSIONS | RECORD_EXTENSIONS:
+            continue
+         name = f"{prefix}/{info.filename}" if prefix else info.filename
+         if extension in RECORD_EXTENSIONS:
+            with archive.open(info) as member:
+               yield from iter_jsonl(member, prefix=name)
+         elif info.file_size > settings.BULK_IMPORT_MAX_FILE_BYTES:
+            yield name, Rejected("File too large.")
+         else:
+            yield name, archive.read(info)
+
+
+def iter_file(path: str, name: Optional[str] = None) -> Iterator[Item]:
+   name = name or os.path.basename(path)
+   extension = _extension(path)
+   if extension == ".zip":
+      with open(path, "rb") as f:
+         yield from iter_zip(f, prefix=name)
+   elif extension in RECORD_EXTENSIONS:
+      with open(path, "rb") as f:
+         yield from iter_jsonl(f, prefix=name)
+   elif extension in FILE_EXTENSIONS:
+      if os.path.getsize(path) > settings.BULK_IMPORT_MAX_FILE_BYTES:
+         yield name, Rejected("File too large.")
+      else:
+         with open(path, "rb") as f:
+            yield name, f.read()
+
+
+def iter_path(path: str) -> Iterator[Item]:
+   if not os.path.isdir(path):
+      yield from iter_file(path)
+      return
+   for root, dirs, files in os.walk(path):
+      dirs.sort()
+      for filename in sorted(files):
+         full = os.path.join(root, filename)
+         yield from iter_file(full, os.path.relpath(full, path))
+
+
+def iter_upload(filename: str, fileobj: BinaryIO) -> Iterator[Item]:
+   # Multipart uploads are spooled to disk by Starlette, so this reads from a file
+   extension = _extension(filename)
+   if extension == ".zip":
+      yield from iter_zip(fileobj, prefix=filename)
+   elif extension in RECORD_EXTENSIONS:
+      yield from iter_jsonl(fileobj, prefix=filename)
+   else:
+      data = fileobj.read(settings.BULK_IMPORT_MAX_FILE_BYTES + 1)
+      if len(data) > settings.BULK_IMPORT_MAX_FILE_BYTES:
+         yield filename, Rejected("File too large.")
+      else:
+         yield filename, data
+
+
+async def spool_body(chunks: AsyncIterable[bytes]) -> BinaryIO:
+   # The response streams progress while the import runs, and a streaming
+   # response also listens on the request channel, so the body is spooled
+   # (to disk past 1 MB, like multipart uploads) before processing starts
+   spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+   async for chunk in chunks:
+      spool.write(chunk)
+   spool.seek(0)
+   return spool
+
+
+def _optional_text(value: Any) -> Optional[str]:
+   if not value:
+      return None
+   return normalize_text(str(value)) or None
+
+
+def decode_document(name: str, payload: Any) -> Dict[str, Any]:
+   # Runs in the import process pool. Returns Resume column values or raises
+   # ValueError for unusable input.
+   if isinstance(payload, dict):
+      resume_text = payload.get("resume_text")
+      if not isinstance(resume_text, str):
+         raise ValueError("Missing resume_text.")
+      title = payload.get("title") or title_from_filename(name)
+      target_role = payload.get("target_role")
+      job_description = payload.get("job_description")
+   else:
+      try:
+         resume_text = extract_text(name, payload)
+      except ExtractionError as e:
+         raise ValueError(str(e))
+      title, target_role, job_description = title_from_filename(name), None, None
+
+   resume_text = normalize_text(resume_text)
+   if not resume_text:
+      raise ValueError("Empty resume text.")
+   return {
+      "title": normalize_text(str(title))[:200],
+      "resume_text": resume_text,
+      "target_role": _optional_text(target_role),
+      "job_description": _optional_text(job_description),
+   }
+
+
+class BulkImporter:
+   # Generator pipeline: source items -> decode/normalize on a process pool
+   # (at most `window` documents in flight) -> chunked multi-row INSERTs,
+   # search index rows and Mongo mirror documents per batch. Memory is bounded
+   # by window + batch size whatever the input size.
+
+   def __init__(self, workers: int, batch_size: int):
+      self.workers = workers
+      self.batch_size = batch_size
+      self._executor: Optional[Executor] = None
+
+   def _get_executor(self) -> Executor:
+      if self._executor is None:
+         self._executor = ProcessPoolExecutor(max_workers=self.workers)
+      return self._executor
+
+   def shutdown(self) -> None:
+      if self._executor is not None:
+         self._executor.shutdown(wait=True)
+         self._executor = None
+
+   async def _write(self, rows: List[Dict[str, Any]], user_id: int) -> List[int]:
+      for row in rows:
+         row["user_id"] = user_id
+      async with AsyncSessionLocal() as db:
+         inserted = (
+            await db.execute(
+               insert(Resume).returning(
+                  Resume.id, Resume.updated_at, sort_by_parameter_order=True
+               ),
+               rows,
+            )
+         ).all()
+         ids = [id for id, _ in inserted]
+         indexed = [
+            {**row, "id": id, "updated_at": updated_at}
+            for row, (id, updated_at) in zip(rows, inserted)
+         ]
+         await search_index.add_many(db, indexed)
+         await db.commit()
+      await embedding_index.add_many(indexed)
+      local_scorer.partial_fit(row["resume_text"] for row in rows)
+
+      await mongo_writer.insert_many(
+         "resume_texts",
+         [
+            {
+               "resume_id": id,
+               "user_id": user_id,
+               "resume_text": row["resume_text"],
+               "job_description": row["job_description"],
+            }
+            for row, id in zip(rows, ids)
+         ],
+      )
+      return ids
+
+   async def run(self, items: AsyncIterable[Item], user_id: int) -> AsyncIterator[Dict[str, Any]]:
+      loop = asyncio.get_running_loop()
+      executor = self._get_executor()
+      window = max(self.batch_size, self.workers * 4)
+      pending: deque = deque()
+      batch: List[Dict[str, Any]] = []
+      started = time.perf_counter()
+      processed = imported = failed = 0
+
+      async def drain(limit: int) -> List[Dict[str, Any]]:
+         nonlocal processed, failed
+         events = []
+         while len(pending) > limit:
+            name, future = pending.popleft()
+            processed += 1
+            try:
+               batch.append(await future)
+            except Exception as e:
+               failed += 1
+               error = str(e) if isinstance(e, ValueError) else f"{type(e).__name__}: {e}"
+               events.append({"type": "error", "name": name, "error": error})
+         return events
+
+      async def flush() -> Dict[str, Any]:
+         nonlocal imported
+         rows = batch[: self.batch_size]
+         del batch[: self.batch_size]
+         ids = await self._write(rows, user_id)
+         imported += len(ids)
+         return {
+            "type": "progress",
+            "processed": processed,
+            "imported": imported,
+            "failed": failed,
+            "resume_ids": ids,
+         }
+
+      async for name, payload in items:
+         if isinstance(payload, Rejected):
+            processed += 1
+            failed += 1
+            yield {"type": "error", "name": name, "error": payload.reason}
+            continue
+         pending.append((name, loop.run_in_executor(executor, decode_document, name, payload)))
+         if len(pending) >= window:
+            for event in await drain(window // 2):
+               yield event
+            while len(batch) >= self.batch_size:
+               yield await flush()
+
+      for event in await drain(0):
+         yield event
+      while batch:
+         yield await flush()
+
+      yield {
+         "type": "done",
+         "processed": processed,
+         "imported": imported,
+         "failed": failed,
+         "elapsed_s": round(time.perf_counter() - started, 2),
+      }
+
+
+bulk_importer = BulkImporter(
+   workers=settings.BULK_IMPORT_WORKERS,
+   batch_size=settings.BULK_IMPORT_BATCH_SIZE,
+)
+
+
+async def _import_path(path: str, email: str) -> int:
+   from app.models.user import User
+
+   async with AsyncSessionLocal() as db:
+      user_id = await db.scalar(select(User.id).where(User.email == email))
+   if user_id is None:
+      print(f"No user with email {email}", file=sys.stderr)
+      return 1
+
+   if path == "-":
+      items = iter_jsonl(sys.stdin.buffer, prefix="stdin")
+   else:
+      items = iter_path(path)
+   # Without the writer every resume_texts insert would be its own round trip
+   if settings.MONGO_WRITER_ENABLED:
+      await mongo_writer.start()
+   try:
+      async for event in bulk_importer.run(iterate_in_threadpool(items), user_id):
+         event.pop("resume_ids", None)
+         print(json.dumps(event), flush=True)
+   finally:
+      await mongo_writer.stop()
+   return 0
+
+
+if __name__ == "__main__":
+   # python -m app.services.bulk_import "Example_dataset/John Doe resume.txt" --email john.doe@example.com
+   parser = argparse.ArgumentParser(description="Bulk import resumes for one user.")
+   parser.add_argument("path", help="directory, .zip, .jsonl file, or - for JSONL on stdin")
+   parser.add_argument("--email", required=True, help="owner of the imported resumes")
+   args = parser.parse_args()
+   try:
+      sys.exit(asyncio.run(_import_path(args.path, args.email)))
+   finally:
+      bulk_importer.shutdown()
@@ -0,0 +1,456 @@
+import asyncio
+import fcntl
+import json
+import math
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.metrics import service_stats
+from app.models.resume import Resume
+from app.services.local_scorer import feature_ids
+
+settings = get_settings()
+
+# Bump when embed() changes so stored vectors are rebuilt
+EMBEDDING_VERSION = 1
+
+_SEARCH_BLOCK_ROWS = 65536
+
+# state.npy fields
+_GENERATION, _LAYOUT, _TRAINED_ROWS, _TRAINING = range(4)
+# slots.npy column holding the row's Resume.updated_at stamp
+_STAMP = 3
+_EMPTY_SLOT = (0, 0, -1, 0)
+
+
+def _stamp(updated_at: Optional[datetime]) -> int:
+   # Resume.updated_at in microseconds; SQLite hands back naive UTC values
+   if updated_at is None:
+      return 0
+   if updated_at.tzinfo is None:
+      updated_at = updated_at.replace(tzinfo=timezone.utc)
+   return int(updated_at.timestamp() * 1_000_000)
+
+
+def embed(text: Optional[str], dim: int) -> np.ndarray:
+   # Hashing-trick embedding: the local scorer's 18-bit term hashes are folded
+   # into `dim` signed buckets with sublinear tf weights, then L2-normalized.
+   # Cosine similarity between two of these approximates the cosine of the
+   # full term-frequency vectors.
+   vector = np.zeros(dim, dtype=np.float32)
+   ids = feature_ids(text or "")
+   if not len(ids):
+      return vector
+   ids, counts = np.unique(ids, return_counts=True)
+   weights = 1.0 + np.log(counts.astype(np.float32))
+   signs = np.where((ids // dim) & 1, -1.0, 1.0).astype(np.float32)
+   np.add.at(vector, ids % dim, signs * weights)
+   norm = np.linalg.norm(vector)
+   if norm:
+      vector /= norm
+   return vector
+
+
+def resume_document(title: Optional[str], target_role: Optional[str], resume_text: Optional[str]) -> str:
+   return "\n".join(part for part in (title, target_role, resume_text) if part)
+
+
+def _kmeans(sample: np.ndarray, k: int, iterations: int, seed: int = 0) -> np.ndarray:
+   # Spherical k-means: rows and centroids are unit vectors, assignment by dot product
+   rng = np.random.default_rng(seed)
+   centroids = sample[rng.choice(len(sample), k, replace=False)].copy()
+   for _ in range(iterations):
+      labels = np.argmax(sample @ centroids.T, axis=1)
+      for cluster in range(k):
+         members = sample[labels == cluster]
+         if len(members):
+            centroid = members.sum(axis=0)
+            norm = np.linalg.norm(centroid)
+            if norm:
+               centroids[cluster] = centroid / norm
+   return centroids
+
+
+class EmbeddingIndex:
+   # One row per resume in memory-mapped files under EMBEDDING_INDEX_PATH:
+   #   vectors.npy    (capacity, dim) float16/float32 embeddings
+   #   slots.npy      (capacity, 4) int64 (resume_id, user_id, IVF list,
+   #                  updated_at stamp); resume_id 0 marks a free row,
+   #                  list -1 an unassigned one
+   #   centroids.npy  the IVF partition, once trained
+   #   state.npy      int64 [generation, layout, trained_rows, training]
+   # The files are shared by every worker process. Writes hold an exclusive
+   # flock on index.lock and bump the generation (and the layout when the
+   # files are replaced on growth, the training counter when the partition
+   # is retrained); reads hold a shared one. Each process derives the
+   # resume_id -> row map and free list from slots.npy and rebuilds them
+   # when another process has moved the generation. The files are checked
+   # against the resumes table at startup, (id, updated_at) per row, and
+   # rebuilt if they disagree. If
+   # the directory can't be used, the index is a private in-memory copy kept
+   # current only with this process's writes, like InMemorySearchIndex.
+   #
+   # Search scores the user's rows exactly. Once the index holds
+   # ann_min_rows rows, an IVF partition (spherical k-means, ~sqrt(n) lists)
+   # is trained, and users with at least that many resumes only score rows
+   # in the nprobe lists nearest the query. The partition is retrained when
+   # the index has doubled since the last training.
+
+   def __init__(self, path: str, dim: int, dtype: str, ann_min_rows: int, nprobe: int):
+      self.path = path
+      self.dim = dim
+      self.dtype = np.dtype(dtype)
+      self.ann_min_rows = ann_min_rows
+      self.nprobe = nprobe
+      self._lock = threading.RLock()
+      self._vectors: Optional[np.ndarray] = None
+      self._slots: Optional[np.ndarray] = None
+      self._rows: Dict[int, int] = {}
+      self._free: List[int] = []
+      self._size = 0
+      self._persistent = False
+      self._lock_file = None
+      self._centroids: Optional[np.ndarray] = None
+      self._state = np.zeros(4, dtype=np.int64)
+      # self._state as of this process's last sync
+      self._seen = np.zeros(4, dtype=np.int64)
+      self.searches = 0
+      self.ann_searches = 0
+
+   # Storage
+
+   def _file(self, name: str) -> str:
+      return os.path.join(self.path, name)
+
+   def _open_lock_file(self) -> bool:
+      try:
+         os.makedirs(self.path, exist_ok=True)
+         self._lock_file = open(self._file("index.lock"), "w")
+      except OSError:
+         return False
+      return True
+
+   @contextmanager
+   def _locked(self, exclusive: bool = False):
+      # The thread lock, then the file lock shared with other workers; the
+      # body sees their writes and its own writes are announced on exit
+      with self._lock:
+         if self._lock_file is None:
+            yield
+            return
+         fcntl.flock(self._lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+         try:
+            self._sync()
+            yield
+            if exclusive:
+               self._state[_GENERATION] += 1
+               self._seen[:] = self._state
+         finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+   def _sync(self) -> None:
+      if self._vectors is None or self._state[_GENERATION] == self._seen[_GENERATION]:
+         return
+      if self._state[_LAYOUT] != self._seen[_LAYOUT]:
+         self._open()
+      if self._state[_TRAINING] != self._seen[_TRAINING]:
+         self._load_centroids()
+      self._index_slots()
+      self._seen[:] = self._state
+
+   def _meta(self) -> Dict[str, Any]:
+      return {"version": EMBEDDING_VERSION, "dim": self.dim, "dtype": self.dtype.name, "slots": 4}
+
+   def _open(self) -> None:
+      self._vectors = np.load(self._file("vectors.npy"), mmap_mode="r+")
+      self._slots = np.load(self._file("slots.npy"), mmap_mode="r+")
+
+   def _open_state(self) -> None:
+      # Created once and never replaced: every worker keeps it mapped
+      try:
+         self._state = np.load(self._file("state.npy"), mmap_mode="r+")
+      except (OSError, ValueError):
+         self._state = np.lib.format.open_memmap(
+            self._file("state.npy"), mode="w+", dtype=np.int64, shape=(4,)
+         )
+
+   def _load_centroids(self) -> None:
+      self._centroids = None
+      if self._state[_TRAINED_ROWS]:
+         try:
+            self._centroids = np.load(self._file("centroids.npy"))
+         except (OSError, ValueError):
+            pass
+
+   def _load(self) -> bool:
+      try:
+         with open(self._file("meta.json")) as f:
+            if json.load(f) != self._meta():
+               return False
+         self._open()
+      except (OSError, ValueError):
+         return False
+      if (
+         self._vectors.shape[1] != self.dim
+         or self._slots.shape[1] != 4
+         or len(self._vectors) != len(self._slots)
+      ):
+         return False
+      self._load_centroids()
+      self._index_slots()
+      return True
+
+   def _allocate(self, capacity: int) -> Tuple[np.ndarray, np.ndarray]:
+      if not self._persistent:
+         vectors = np.zeros((capacity, self.dim), dtype=self.dtype)
+         slots = np.zeros((capacity, 4), dtype=np.int64)
+      else:
+         # Grow into new files and swap them in, so a crash mid-resize leaves the old ones
+         vectors = np.lib.format.open_memmap(
+            self._file("vectors.npy.tmp"), mode="w+", dtype=self.dtype, shape=(capacity, self.dim)
+         )
+         slots = np.lib.format.open_memmap(
+            self._file("slots.npy.tmp"), mode="w+", dtype=np.int64, shape=(capacity, 4)
+         )
+      slots[:] = _EMPTY_SLOT
+      return vectors, slots
+
+   def _commit_files(self) -> None:
+      self._state[_LAYOUT] += 1
+      if not self._persistent:
+         return
+      self._vectors.flush()
+      self._slots.flush()
+      os.replace(self._file("vectors.npy.tmp"), self._file("vectors.npy"))
+      os.replace(self._file("slots.npy.tmp"), self._file("slots.npy"))
+      with open(self._file("meta.json"), "w") as f:
+         json.dump(self._meta(), f)
+
+   def _reset(self, capacity: int) -> None:
+      self._vectors, self._slots = self._allocate(capacity)
+      self._commit_files()
+      self._rows, self._free, self._size = {}, [], 0
+      self._centroids = None
+      self._state[_TRAINED_ROWS] = 0
+      self._state[_TRAINING] += 1
+
+   def _grow(self) -> None:
+      capacity = max(1024, len(self._vectors) * 2)
+      vectors, slots = self._allocate(capacity)
+      vectors[: self._size] = self._vectors[: self._size]
+      slots[: self._size] = self._slots[: self._size]
+      self._vectors, self._slots = vectors, slots
+      self._commit_files()
+
+   def _index_slots(self) -> None:
+      used = np.flatnonzero(self._slots[:, 0])
+      self._size = int(used[-1]) + 1 if len(used) else 0
+      self._rows = {int(self._slots[row, 0]): int(row) for row in used}
+      self._free = [int(row) for row in np.flatnonzero(self._slots[: self._size, 0] == 0)]
+
+   def _matches_database(self, db: Session) -> bool:
+      # Every resume has a row stamped with its current updated_at, and no others
+      count = 0
+      resumes = db.execute(
+         select(Resume.id, Resume.updated_at).execution_options(yield_per=10000)
+      )
+      for resume_id, updated_at in resumes:
+         row = self._rows.get(resume_id)
+         if row is None or self._slots[row, _STAMP] != _stamp(updated_at):
+            return False
+         count += 1
+      return count == len(self._rows)
+
+   def bootstrap(self, bind: Engine) -> None:
+      with self._lock:
+         self._persistent = self._open_lock_file()
+      with self._locked(exclusive=True), Session(bind) as db:
+         if self._persistent:
+            self._open_state()
+            if self._load() and self._matches_database(db):
+               self._maybe_train()
+               return
+         self._reset(1024)
+         resumes = db.execute(
+            select(
+               Resume.id,
+               Resume.user_id,
+               Resume.updated_at,
+               Resume.title,
+               Resume.target_role,
+               Resume.resume_text,
+            ).execution_options(yield_per=1000)
+         )
+         for resume_id, user_id, updated_at, title, target_role, resume_text in resumes:
+            vector = embed(resume_document(title, target_role, resume_text), self.dim)
+            self._put(resume_id, user_id, _stamp(updated_at), vector)
+         self.flush()
+         self._maybe_train()
+
+   def flush(self) -> None:
+      with self._lock:
+         if self._persistent and self._vectors is not None:
+            self._vectors.flush()
+            self._slots.flush()
+
+   def close(self) -> None:
+      self.flush()
+      if self._lock_file is not None:
+         self._lock_file.close()
+         self._lock_file = None
+
+   # Writes
+
+   def _put(self, resume_id: int, user_id: int, stamp: int, vector: np.ndarray) -> None:
+      row = self._rows.get(resume_id)
+      if row is None:
+         if self._free:
+            row = self._free.pop()
+         else:
+            if self._size == len(self._vectors):
+               self._grow()
+            row = self._size
+            self._size += 1
+         self._rows[resume_id] = row
+      self._vectors[row] = vector
+      ivf_list = -1 if self._centroids is None else int(np.argmax(self._centroids @ vector))
+      self._slots[row] = (resume_id, user_id, ivf_list, stamp)
+
+   def _upsert_many(self, rows: List[Tuple[int, int, int, str]]) -> None:
+      # (resume_id, user_id, stamp, document)
+      vectors = [embed(document, self.dim) for *_, document in rows]
+      with self._locked(exclusive=True):
+         if self._vectors is None:
+            return
+         for (resume_id, user_id, stamp, _), vector in zip(rows, vectors):
+            self._put(resume_id, user_id, stamp, vector)
+         self._maybe_train()
+
+   def _delete(self, resume_id: int) -> None:
+      with self._locked(exclusive=True):
+         row = self._rows.pop(resume_id, None)
+         if row is None:
+            return
+         self._slots[row] = _EMPTY_SLOT
+         self._free.append(row)
+
+   async def upsert(self, resume: Resume) -> None:
+      document = resume_document(resume.title, resume.target_role, resume.resume_text)
+      await asyncio.to_thread(
+         self._upsert_many, [(resume.id, resume.user_id, _stamp(resume.updated_at), document)]
+      )
+
+   async def add_many(self, rows: Iterable[Dict[str, Any]]) -> None:
+      batch = [
+         (
+         row["id"],
+         row["user_id"],
+         _stamp(row.get("updated_at")),
+         resume_document(row["title"], row.get("target_role"), row["resume_text"]),
+      )
+         for row in rows
+      ]
+      await asyncio.to_thread(self._upsert_many, batch)
+
+   async def delete(self, resume_id: int) -> None:
+      await asyncio.to_thread(self._delete, resume_id)
+
+   # Approximate index
+
+   def _maybe_train(self) -> None:
+      live = len(self._rows)
+      if live < self.ann_min_rows or live < 2 * self._state[_TRAINED_ROWS]:
+         return
+      rows = np.flatnonzero(self._slots[: self._size, 0])
+      n_lists = max(1, int(math.sqrt(live)))
+      rng = np.random.default_rng(0)
+      sample_rows = np.sort(rng.choice(rows, min(live, n_lists * 40), replace=False))
+      sample = np.asarray(self._vectors[sample_rows], dtype=np.float32)
+      centroids = _kmeans(sample, n_lists, iterations=8)
+      for start in range(0, len(rows), _SEARCH_BLOCK_ROWS):
+         block = rows[start : start + _SEARCH_BLOCK_ROWS]
+         self._slots[block, 2] = np.argmax(
+            np.asarray(self._vectors[block], dtype=np.float32) @ centroids.T, axis=1
+         )
+      if self._persistent:
+         with open(self._file("centroids.npy.tmp"), "wb") as f:
+            np.save(f, centroids)
+         os.replace(self._file("centroids.npy.tmp"), self._file("centroids.npy"))
+      self._centroids = centroids
+      self._state[_TRAINED_ROWS] = live
+      self._state[_TRAINING] += 1
+
+   # Reads
+
+   def _search(self, user_id: int, query: np.ndarray, k: int) -> Tuple[int, str, List[Tuple[int, float]]]:
+      with self._locked():
+         if self._vectors is None or not self._size:
+            return 0, "exact", []
+         candidates = np.flatnonzero(self._slots[: self._size, 1] == user_id)
+         candidates = candidates[self._slots[candidates, 0] != 0]
+         total = len(candidates)
+         method = "exact"
+         if self._centroids is not None and total >= self.ann_min_rows:
+            probe = np.argsort(self._centroids @ query)[-self.nprobe :]
+            candidates = candidates[np.isin(self._slots[candidates, 2], probe)]
+            method = "ivf"
+         self.searches += 1
+         self.ann_searches += method == "ivf"
+
+         scores = np.empty(len(candidates), dtype=np.float32)
+         if len(candidates) * 4 > self._size:
+            # Mostly this user's rows: scoring contiguous slices beats gathering
+            for start in range(0, self._size, _SEARCH_BLOCK_ROWS):
+               lo, hi = np.searchsorted(candidates, (start, start + _SEARCH_BLOCK_ROWS))
+               if hi > lo:
+                  block = np.asarray(self._vectors[start : start + _SEARCH_BLOCK_ROWS], dtype=np.float32) @ query
+                  scores[lo:hi] = block[candidates[lo:hi] - start]
+         else:
+            for start in range(0, len(candidates), _SEARCH_BLOCK_ROWS):
+               block = candidates[start : start + _SEARCH_BLOCK_ROWS]
+               scores[start : start + len(block)] = np.asarray(self._vectors[block], dtype=np.float32) @ query
+         if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+         else:
+            top = np.arange(len(scores))
+         top = top[np.argsort(-scores[top], kind="stable")]
+         resume_ids = self._slots[candidates[top], 0]
+      return total, method, [(int(r), float(s)) for r, s in zip(resume_ids, scores[top])]
+
+   async def search(self, user_id: int, text: str, k: int) -> Tuple[int, str, List[Tuple[int, float]]]:
+      # Returns (resumes considered, "exact" | "ivf", [(resume_id, cosine)] best first)
+      query = embed(text, self.dim)
+      if not query.any():
+         return 0, "exact", []
+      return await asyncio.to_thread(self._search, user_id, query, k)
+
+   def stats(self) -> Dict[str, Any]:
+      return {
+         "rows": len(self._rows),
+         "capacity": 0 if self._vectors is None else len(self._vectors),
+         "dim": self.dim,
+         "dtype": self.dtype.name,
+         "persistent": self._persistent,
+         "ivf_lists": 0 if self._centroids is None else len(self._centroids),
+         "searches": self.searches,
+         "ann_searches": self.ann_searches,
+      }
+
+
+embedding_index = EmbeddingIndex(
+   path=settings.EMBEDDING_INDEX_PATH,
+   dim=settings.EMBEDDING_DIM,
+   dtype=settings.EMBEDDING_DTYPE,
+   ann_min_rows=settings.MATCH_ANN_MIN_ROWS,
+   nprobe=settings.MATCH_ANN_NPROBE,
+)
+service_stats.register("embedding_index", embedding_index.stats)
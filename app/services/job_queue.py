@@ -0,0 +1,242 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from app.core.config import get_settings
+from sqlalchemy import select, update
+
+from app.core.database import AsyncSessionLocal
+from app.core.mongo import async_mongo_db
+from app.models.job import AnalysisJob, JobStatus
+from app.models.resume import Resume
+from app.services.ai_client import AIAnalysisError
+from app.services.analysis_service import run_analysis
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class JobQueueError(Exception):
+   pass
+
+
+class JobQueueFullError(JobQueueError):
+   pass
+
+
+class JobQueueNotRunningError(JobQueueError):
+   pass
+
+
+class AnalysisJobQueue:
+   # Jobs live in analysis_jobs; each process keeps the ids it will run in
+   # an in-memory queue. Several processes may load the same QUEUED row, so
+   # a job is claimed with a conditional UPDATE (queued -> running) and only
+   # the process that wins runs it. A running job's updated_at is bumped
+   # every heartbeat seconds; RUNNING rows older than stale_after are taken
+   # to belong to a dead process and are requeued at startup.
+
+   def __init__(self, concurrency: int, max_size: int, heartbeat: float, stale_after: float):
+      self.concurrency = concurrency
+      self.max_size = max_size
+      self.heartbeat = heartbeat
+      self.stale_after = stale_after
+      self._queue: Optional[asyncio.Queue[str]] = None
+      self._workers: list[asyncio.Task] = []
+      self._updates: dict[str, asyncio.Event] = {}
+      # Jobs in the in-memory queue or being run
+      self._enqueued: set[str] = set()
+      # Set while QUEUED jobs in the DB didn't fit in the in-memory queue
+      self._backlog = False
+      self._refill_lock = asyncio.Lock()
+
+   @property
+   def running(self) -> bool:
+      return bool(self._workers)
+
+   async def start(self) -> None:
+      if self.running:
+         return
+      self._queue = asyncio.Queue(maxsize=self.max_size)
+      self._enqueued.clear()
+
+      # Re-enqueue work that was queued, or interrupted mid-run by a process
+      # that stopped heartbeating, before a restart
+      cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.stale_after)
+      async with AsyncSessionLocal() as db:
+         await db.execute(
+            update(AnalysisJob)
+            .where(AnalysisJob.status == JobStatus.RUNNING, AnalysisJob.updated_at < cutoff)
+            .values(status=JobStatus.QUEUED)
+         )
+         await db.commit()
+      self._backlog = True
+      await self._refill()
+
+      self._workers = [
+         asyncio.create_task(self._worker(), name=f"analysis-worker-{i}")
+         for i in range(self.concurrency)
+      ]
+
+   async def stop(self) -> None:
+      for task in self._workers:
+         task.cancel()
+      await asyncio.gather(*self._workers, return_exceptions=True)
+      self._workers = []
+
+   async def submit(self, resume_id: int, user_id: int, force: bool = False) -> AnalysisJob:
+      if not self.running:
+         raise JobQueueNotRunningError("Analysis job queue is not running.")
+      if self._queue.full():
+         raise JobQueueFullError("Analysis job queue is full.")
+
+      async with AsyncSessionLocal() as db:
+         job = AnalysisJob(resume_id=resume_id, user_id=user_id, force=force)
+         db.add(job)
+         await db.commit()
+         db.expunge(job)
+
+      self._enqueued.add(job.id)
+      self._queue.put_nowait(job.id)
+      return job
+
+   async def wait_for_update(self, job_id: str, timeout: float) -> None:
+      event = self._updates.setdefault(job_id, asyncio.Event())
+      try:
+         await asyncio.wait_for(event.wait(), timeout)
+      except asyncio.TimeoutError:
+         pass
+
+   def _notify(self, job_id: str) -> None:
+      event = self._updates.pop(job_id, None)
+      if event is not None:
+         event.set()
+
+   async def _refill(self) -> None:
+      # Moves the oldest QUEUED jobs from the DB into the free queue slots;
+      # jobs that don't fit wait in the DB until a worker frees a slot
+      async with self._refill_lock:
+         free = self.max_size - self._queue.qsize()
+         if not self._backlog or free <= 0:
+            return
+         async with AsyncSessionLocal() as db:
+            query = (
+               select(AnalysisJob.id)
+               .where(AnalysisJob.status == JobStatus.QUEUED)
+               .order_by(AnalysisJob.created_at)
+               .limit(free + len(self._enqueued))
+            )
+            job_ids = [job_id for job_id in await db.scalars(query) if job_id not in self._enqueued]
+         added = 0
+         for job_id in job_ids:
+            # submit() may have taken slots while the DB was queried
+            if self._queue.full():
+               break
+            self._enqueued.add(job_id)
+            self._queue.put_nowait(job_id)
+            added += 1
+         self._backlog = added < len(job_ids) or len(job_ids) >= free
+
+   async def _worker(self) -> None:
+      while True:
+         job_id = await self._queue.get()
+         try:
+            await self._run(job_id)
+         except Exception:
+            logger.exception("Analysis job %s crashed", job_id)
+         finally:
+            self._enqueued.discard(job_id)
+            self._queue.task_done()
+         try:
+            await self._refill()
+         except Exception:
+            logger.exception("Refilling the analysis job queue failed")
+
+   async def _claim(self, job_id: str) -> bool:
+      async with AsyncSessionLocal() as db:
+         result = await db.execute(
+            update(AnalysisJob)
+            .where(AnalysisJob.id == job_id, AnalysisJob.status == JobStatus.QUEUED)
+            .values(status=JobStatus.RUNNING, attempts=AnalysisJob.attempts + 1)
+         )
+         await db.commit()
+      return result.rowcount == 1
+
+   async def _heartbeat(self, job_id: str) -> None:
+      while True:
+         await asyncio.sleep(self.heartbeat)
+         try:
+            async with AsyncSessionLocal() as db:
+               await db.execute(
+                  update(AnalysisJob)
+                  .where(AnalysisJob.id == job_id, AnalysisJob.status == JobStatus.RUNNING)
+                  .values(updated_at=datetime.now(timezone.utc))
+               )
+               await db.commit()
+         except Exception:
+            logger.exception("Heartbeat for analysis job %s failed", job_id)
+
+   async def _run(self, job_id: str) -> None:
+      # Another process claimed it, or it already finished
+      if not await self._claim(job_id):
+         return
+      self._notify(job_id)
+      heartbeat = asyncio.create_task(self._heartbeat(job_id))
+      db = AsyncSessionLocal()
+      try:
+         job = await db.get(AnalysisJob, job_id)
+         resume = await db.get(Resume, job.resume_id)
+         if resume is None:
+            job.status = JobStatus.FAILED
+            job.error = "Resume not found."
+            await db.commit()
+            return
+
+         while True:
+            try:
+               analysis = await run_analysis(
+                  db, async_mongo_db, resume, job.user_id, force=job.force
+               )
+            except AIAnalysisError as e:
+               if job.attempts >= settings.JOB_MAX_ATTEMPTS:
+                  job.status = JobStatus.FAILED
+                  job.error = f"AI analysis failed: {e}"
+                  await db.commit()
+                  return
+               job.error = str(e)
+               await db.commit()
+               await asyncio.sleep(
+                  max(
+                     settings.JOB_RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1),
+                     getattr(e, "retry_after", 0),
+                  )
+               )
+               job.attempts += 1
+               await db.commit()
+               self._notify(job_id)
+               continue
+            except Exception as e:
+               logger.exception("Analysis job %s failed", job_id)
+               await db.rollback()
+               job.status = JobStatus.FAILED
+               job.error = f"Unexpected error: {e}"
+               await db.commit()
+               return
+
+            job.status = JobStatus.SUCCEEDED
+            job.error = None
+            job.analysis_id = analysis.id
+            await db.commit()
+            return
+      finally:
+         heartbeat.cancel()
+         await db.close()
+         self._notify(job_id)
+
+job_queue = AnalysisJobQueue(
+   concurrency=settings.JOB_WORKER_CONCURRENCY,
+   max_size=settings.JOB_QUEUE_MAX_SIZE,
+   heartbeat=settings.JOB_HEARTBEAT_SECONDS,
+   stale_after=settings.JOB_STALE_SECONDS,
+)
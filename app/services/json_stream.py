@@ -0,0 +1,101 @@
+import json
+from typing import Any, Dict, List, Tuple
+
+# Parser states while inside the top-level object
+_KEY, _COLON, _VALUE, _IN_VALUE, _AFTER = range(5)
+
+
+class IncrementalJsonParser:
+   # Feeds a model's streamed text through a small state machine and returns
+   # each top-level member of the JSON object as soon as its value is
+   # complete. Text before the first "{" (e.g. a ```json fence) and after the
+   # closing "}" is ignored. Nested values are only bracket/string-tracked and
+   # decoded with json.loads once they close, so each byte is scanned once.
+
+   def __init__(self):
+      self._text = ""
+      self._pos = 0
+      self._depth = 0
+      self._state = _KEY
+      self._in_string = False
+      self._escape = False
+      self._key = None
+      self._start = 0
+      self.finished = False
+      self.result: Dict[str, Any] = {}
+
+   def _emit(self, end: int, out: List[Tuple[str, Any]]) -> None:
+      raw = self._text[self._start:end]
+      try:
+         value = json.loads(raw)
+      except json.JSONDecodeError as e:
+         raise ValueError(f"Invalid JSON value for {self._key!r}: {e}") from e
+      self.result[self._key] = value
+      out.append((self._key, value))
+      self._key = None
+
+   def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+      out: List[Tuple[str, Any]] = []
+      if self.finished:
+         return out
+      self._text += chunk
+      text = self._text
+      i = self._pos
+      while i < len(text):
+         c = text[i]
+
+         if self._in_string:
+            if self._escape:
+               self._escape = False
+            elif c == "\\":
+               self._escape = True
+            elif c == '"':
+               self._in_string = False
+               if self._depth == 1:
+                  if self._state == _KEY:
+                     self._key = json.loads(text[self._start:i + 1])
+                     self._state = _COLON
+                  elif self._state == _IN_VALUE:
+                     self._emit(i + 1, out)
+                     self._state = _AFTER
+         elif self._depth == 0:
+            if c == "{":
+               self._depth = 1
+         elif c == '"':
+            self._in_string = True
+            if self._depth == 1 and self._state in (_KEY, _VALUE):
+               self._start = i
+               if self._state == _VALUE:
+                  self._state = _IN_VALUE
+         elif c in "{[":
+            if self._depth == 1 and self._state == _VALUE:
+               self._start = i
+               self._state = _IN_VALUE
+            self._depth += 1
+         elif c in "}]":
+            if self._depth == 1:
+               # Closing the top-level object, possibly ending a bare scalar
+               if self._state == _IN_VALUE:
+                  self._emit(i, out)
+               self.finished = True
+               self._pos = i + 1
+               return out
+            self._depth -= 1
+            if self._depth == 1 and self._state == _IN_VALUE:
+               self._emit(i + 1, out)
+               self._state = _AFTER
+         elif self._depth == 1:
+            if c == ":" and self._state == _COLON:
+               self._state = _VALUE
+            elif c == ",":
+               if self._state == _IN_VALUE:
+                  self._emit(i, out)
+               self._state = _KEY
+            elif self._state == _VALUE and not c.isspace():
+               # Number, true/false/null: ends at the next "," or "}"
+               self._start = i
+               self._state = _IN_VALUE
+         i += 1
+
+      self._pos = i
+      return out
@@ -0,0 +1,798 @@
+import asyncio
+import json
+import random
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+import httpx
+
+from app.core.config import get_settings
+from app.core.metrics import (
+   LLM_BACKEND_REQUEST_SECONDS,
+   LLM_HEDGED_REQUESTS,
+   LLM_RETRIES,
+   LLM_TOKENS,
+   service_stats,
+)
+from app.services.local_scorer import score_resume
+from app.services.prompt_budget import count_tokens
+
+settings = get_settings()
+
+
+class AIAnalysisError(Exception):
+   pass
+
+
+class AIServiceUnavailableError(AIAnalysisError):
+   # Rate limited past all retries, upstream down, or circuit open; retry later
+   def __init__(self, message: str, retry_after: float):
+      super().__init__(message)
+      self.retry_after = retry_after
+
+
+class TokenBucket:
+   # Bursts are capped at `burst_seconds` worth of quota; Azure enforces its
+   # per-minute limits over ~10 s windows, so a full minute's burst would 429.
+   def __init__(self, per_minute: int, burst_seconds: float = 10.0):
+      self.rate = per_minute / 60.0
+      self.capacity = max(1.0, self.rate * burst_seconds)
+      self.tokens = self.capacity
+      self.updated = time.monotonic()
+      self._lock = asyncio.Lock()
+
+   async def acquire(self, amount: float) -> None:
+      if self.rate <= 0:
+         return
+      # A single oversized request may drain the bucket but never deadlocks it
+      amount = min(amount, self.capacity)
+      async with self._lock:
+         while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= amount:
+               self.tokens -= amount
+               return
+            await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class CircuitBreaker:
+   # Opens after `failure_threshold` consecutive failed calls and fails fast
+   # for `reset_timeout` seconds; then lets one probe call through (half-open).
+
+   def __init__(self, failure_threshold: int, reset_timeout: float, label: str = "Azure OpenAI"):
+      self.label = label
+      self.failure_threshold = failure_threshold
+      self.reset_timeout = reset_timeout
+      self.failures = 0
+      self.opened_at: Optional[float] = None
+      self._probing = False
+
+   @property
+   def state(self) -> str:
+      if self.opened_at is None:
+         return "closed"
+      if time.monotonic() - self.opened_at < self.reset_timeout:
+         return "open"
+      return "half_open"
+
+   def before_call(self) -> bool:
+      # Returns True when this call is the half-open probe
+      state = self.state
+      if state == "closed":
+         return False
+      if state == "open" or self._probing:
+         remaining = max(1.0, self.opened_at + self.reset_timeout - time.monotonic())
+         raise AIServiceUnavailableError(
+            f"{self.label} circuit breaker is open.", retry_after=remaining
+         )
+      self._probing = True
+      return True
+
+   def record_success(self) -> None:
+      self.failures = 0
+      self.opened_at = None
+      self._probing = False
+
+   def record_failure(self) -> None:
+      self.failures += 1
+      if self._probing or self.failures >= self.failure_threshold:
+         self.opened_at = time.monotonic()
+      self._probing = False
+
+   def release_probe(self) -> None:
+      self._probing = False
+
+
+def estimate_tokens(payload: Dict[str, Any]) -> int:
+   # Prompt tokens plus the expected completion
+   prompt_tokens = sum(count_tokens(m.get("content")) for m in payload.get("messages", []))
+   return prompt_tokens + settings.LLM_COMPLETION_TOKENS_ESTIMATE
+
+
+def _retry_after(resp: httpx.Response) -> Optional[float]:
+   if "retry-after-ms" in resp.headers:
+      try:
+         return float(resp.headers["retry-after-ms"]) / 1000
+      except ValueError:
+         pass
+   value = resp.headers.get("retry-after")
+   if value is None:
+      return None
+   try:
+      return float(value)
+   except ValueError:
+      pass
+   try:
+      return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+   except (TypeError, ValueError):
+      return None
+
+
+class LLMScheduler:
+   # Client-side admission control for chat completions: caps requests in
+   # flight, paces requests and estimated tokens per minute with token
+   # buckets, retries 429/5xx/transport errors (Retry-After when given,
+   # otherwise full-jitter exponential backoff) and trips a circuit breaker
+   # when retries keep failing. A 429 pauses every caller, not just the one
+   # that saw it, because the quota is shared.
+
+   RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+   def __init__(
+      self,
+      max_in_flight: int,
+      requests_per_minute: int,
+      tokens_per_minute: int,
+      max_retries: int,
+      backoff_base: float,
+      backoff_max: float,
+      breaker: CircuitBreaker,
+   ):
+      self.max_retries = max_retries
+      self.backoff_base = backoff_base
+      self.backoff_max = backoff_max
+      self.breaker = breaker
+      self._semaphore = asyncio.Semaphore(max_in_flight)
+      self._requests = TokenBucket(requests_per_minute)
+      self._tokens = TokenBucket(tokens_per_minute)
+      self._paused_until = 0.0
+      self.retries = 0
+      self.throttled = 0
+
+   def _backoff(self, attempt: int) -> float:
+      return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+   @asynccontextmanager
+   async def request(
+      self, client: httpx.AsyncClient, request: httpx.Request, tokens: int, stream: bool = False
+   ) -> AsyncIterator[httpx.Response]:
+      probe = recorded = False
+      try:
+         async with self._semaphore:
+            # Checked after queueing so waiters fail fast once the circuit opens
+            probe = self.breaker.before_call()
+            attempt = 0
+            while True:
+               pause = self._paused_until - time.monotonic()
+               if pause > 0:
+                  await asyncio.sleep(pause)
+               await self._requests.acquire(1)
+               await self._tokens.acquire(tokens)
+
+               delay = resp = None
+               try:
+                  resp = await client.send(request, stream=stream)
+               except httpx.TransportError as e:
+                  failure = f"{self.breaker.label} request failed: {e}"
+               else:
+                  if resp.status_code not in self.RETRYABLE_STATUS:
+                     break
+                  delay = _retry_after(resp)
+                  body = (await resp.aread()).decode(errors="replace")
+                  await resp.aclose()
+                  failure = f"{self.breaker.label} returned {resp.status_code}: {body}"
+                  if resp.status_code == 429:
+                     self.throttled += 1
+
+               attempt += 1
+               throttled = resp is not None and resp.status_code == 429
+               if throttled and delay is not None:
+                  self._paused_until = max(self._paused_until, time.monotonic() + delay)
+               if delay is None:
+                  delay = self._backoff(attempt)
+               # 429s are pacing, not an outage; only exhausting retries on them counts
+               if not throttled or attempt > self.max_retries:
+                  self.breaker.record_failure()
+                  recorded = True
+               if self.breaker.state == "open":
+                  raise AIServiceUnavailableError(failure, retry_after=self.breaker.reset_timeout)
+               if attempt > self.max_retries:
+                  raise AIServiceUnavailableError(failure, retry_after=delay)
+               self.retries += 1
+               LLM_RETRIES.labels(str(resp.status_code) if resp is not None else "transport").inc()
+               await asyncio.sleep(delay)
+               if self.breaker.state == "open":
+                  raise AIServiceUnavailableError(failure, retry_after=self.breaker.reset_timeout)
+
+            # Non-retryable statuses (e.g. 400/401) are caller errors, not outages
+            self.breaker.record_success()
+            recorded = True
+            try:
+               yield resp
+            finally:
+               await resp.aclose()
+      finally:
+         if probe and not recorded:
+            self.breaker.release_probe()
+
+   def stats(self) -> Dict[str, Any]:
+      return {
+         "circuit": self.breaker.state,
+         "consecutive_failures": self.breaker.failures,
+         "retries": self.retries,
+         "throttled": self.throttled,
+      }
+
+
+def create_scheduler(label: str = "Azure OpenAI") -> LLMScheduler:
+   # Each backend gets its own: quotas and outages are per provider
+   return LLMScheduler(
+      max_in_flight=settings.LLM_MAX_IN_FLIGHT,
+      requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+      tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+      max_retries=settings.LLM_MAX_RETRIES,
+      backoff_base=settings.LLM_BACKOFF_BASE_SECONDS,
+      backoff_max=settings.LLM_BACKOFF_MAX_SECONDS,
+      breaker=CircuitBreaker(
+         failure_threshold=settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+         reset_timeout=settings.LLM_CIRCUIT_RESET_SECONDS,
+         label=label,
+      ),
+   )
+
+
+_http_client: httpx.AsyncClient | None = None
+
+
+def _build_http_client() -> httpx.AsyncClient:
+   return httpx.AsyncClient(
+      http2=settings.LLM_HTTP2,
+      limits=httpx.Limits(
+         max_connections=settings.LLM_MAX_CONNECTIONS,
+         max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+         keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY,
+      ),
+      timeout=httpx.Timeout(
+         connect=settings.LLM_CONNECT_TIMEOUT,
+         read=settings.LLM_READ_TIMEOUT,
+         write=settings.LLM_WRITE_TIMEOUT,
+         pool=settings.LLM_POOL_TIMEOUT,
+      ),
+   )
+
+
+def get_http_client() -> httpx.AsyncClient:
+   # One client per process so connections (and TLS sessions) are reused
+   global _http_client
+   if _http_client is None or _http_client.is_closed:
+      _http_client = _build_http_client()
+   return _http_client
+
+
+async def init_http_client() -> httpx.AsyncClient:
+   return get_http_client()
+
+
+async def close_http_client() -> None:
+   global _http_client
+   if _http_client is not None:
+      await _http_client.aclose()
+      _http_client = None
+
+
+def _record_usage(usage: Optional[Dict[str, Any]]) -> None:
+   if usage:
+      LLM_TOKENS.labels("prompt").inc(usage.get("prompt_tokens") or 0)
+      LLM_TOKENS.labels("completion").inc(usage.get("completion_tokens") or 0)
+
+
+@dataclass
+class ChatRequest:
+   payload: Dict[str, Any]
+   # The analysis inputs, for backends that don't take prompts (LocalBackend);
+   # None for requests only a model can answer, e.g. incremental updates
+   resume_text: Optional[str] = None
+   job_description: Optional[str] = None
+
+
+class LatencyTracker:
+   # Recent latencies and outcomes of one backend, for routing and hedging
+
+   def __init__(self, window: int):
+      self.latencies: Deque[float] = deque(maxlen=window)
+      self.outcomes: Deque[bool] = deque(maxlen=window)
+      self.ewma: Optional[float] = None
+
+   def record(self, seconds: float, ok: bool) -> None:
+      self.outcomes.append(ok)
+      if ok:
+         self.latencies.append(seconds)
+         self.ewma = seconds if self.ewma is None else 0.8 * self.ewma + 0.2 * seconds
+
+   def quantile(self, q: float) -> Optional[float]:
+      if not self.latencies:
+         return None
+      ordered = sorted(self.latencies)
+      return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+   @property
+   def error_rate(self) -> float:
+      return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+   def stats(self) -> Dict[str, Any]:
+      def ms(seconds: Optional[float]) -> Optional[float]:
+         return round(seconds * 1000, 1) if seconds is not None else None
+
+      return {
+         "samples": len(self.latencies),
+         "ewma_ms": ms(self.ewma),
+         "p50_ms": ms(self.quantile(0.5)),
+         "p95_ms": ms(self.quantile(0.95)),
+         "error_rate": round(self.error_rate, 3),
+      }
+
+
+class LLMBackend(ABC):
+   # A chat completions provider. complete() returns the assistant message
+   # content and stream() yields it in pieces; both raise AIAnalysisError.
+
+   name = "backend"
+
+   def __init__(self, window: int):
+      self.tracker = LatencyTracker(window)
+      self.requests = 0
+
+   @property
+   def model_id(self) -> str:
+      # What answers: part of the analysis cache key
+      return self.name
+
+   def supports(self, request: ChatRequest) -> bool:
+      return True
+
+   @property
+   def available(self) -> bool:
+      return True
+
+   @abstractmethod
+   async def complete(self, request: ChatRequest) -> str:
+      ...
+
+   @abstractmethod
+   def stream(self, request: ChatRequest) -> AsyncIterator[str]:
+      ...
+
+   def stats(self) -> Dict[str, Any]:
+      return {"requests": self.requests, **self.tracker.stats()}
+
+
+class HTTPChatBackend(LLMBackend):
+   # OpenAI-style /chat/completions over the shared HTTP client, paced and
+   # retried by this backend's own LLMScheduler
+
+   def __init__(
+      self,
+      name: str,
+      url: str,
+      headers: Dict[str, str],
+      scheduler: LLMScheduler,
+      window: int,
+      model: Optional[str] = None,
+   ):
+      super().__init__(window)
+      self.name = name
+      self.url = url
+      self.headers = headers
+      self.scheduler = scheduler
+      self.model = model
+
+   @property
+   def model_id(self) -> str:
+      return f"{self.name}:{self.model}" if self.model else self.name
+
+   @property
+   def label(self) -> str:
+      return self.scheduler.breaker.label
+
+   @property
+   def available(self) -> bool:
+      return self.scheduler.breaker.state != "open"
+
+   def _build(self, payload: Dict[str, Any], stream: bool = False):
+      body = {**payload, "stream": True} if stream else dict(payload)
+      if self.model:
+         body["model"] = self.model
+      client = get_http_client()
+      return client, client.build_request("POST", self.url, json=body, headers=self.headers)
+
+   async def complete(self, request: ChatRequest) -> str:
+      client, http_request = self._build(request.payload)
+      try:
+         async with self.scheduler.request(
+            client, http_request, estimate_tokens(request.payload)
+         ) as resp:
+            if resp.status_code != 200:
+               raise AIAnalysisError(f"{self.label} returned {resp.status_code}: {resp.text}")
+            data = resp.json()
+      except httpx.HTTPError as e:
+         raise AIAnalysisError(f"{self.label} request failed: {e}") from e
+      except ValueError as e:
+         raise AIAnalysisError(f"{self.label} returned a malformed response.") from e
+      try:
+         _record_usage(data.get("usage"))
+         return data["choices"][0]["message"]["content"] or ""
+      except (AttributeError, KeyError, IndexError, TypeError) as e:
+         raise AIAnalysisError(f"{self.label} returned an unexpected response.") from e
+
+   async def stream(self, request: ChatRequest) -> AsyncIterator[str]:
+      client, http_request = self._build(request.payload, stream=True)
+      try:
+         async with self.scheduler.request(
+            client, http_request, estimate_tokens(request.payload), stream=True
+         ) as resp:
+            if resp.status_code != 200:
+               body = (await resp.aread()).decode(errors="replace")
+               raise AIAnalysisError(f"{self.label} returned {resp.status_code}: {body}")
+
+            async for line in resp.aiter_lines():
+               if not line.startswith("data:"):
+                  continue
+               data = line[len("data:"):].strip()
+               if data == "[DONE]":
+                  break
+               # A malformed chunk fails the stream so the router can fail over
+               try:
+                  chunk = json.loads(data)
+               except ValueError as e:
+                  raise AIAnalysisError(f"{self.label} sent a malformed stream chunk.") from e
+               if not isinstance(chunk, dict):
+                  raise AIAnalysisError(f"{self.label} sent a malformed stream chunk.")
+               _record_usage(chunk.get("usage"))
+               # Azure sends prompt-filter chunks with no choices
+               for choice in chunk.get("choices") or []:
+                  delta = (choice.get("delta") or {}).get("content")
+                  if delta:
+                     yield delta
+      except httpx.HTTPError as e:
+         raise AIAnalysisError(f"{self.label} request failed: {e}") from e
+
+   def stats(self) -> Dict[str, Any]:
+      return {**super().stats(), **self.scheduler.stats()}
+
+
+class AzureOpenAIBackend(HTTPChatBackend):
+   def __init__(
+      self,
+      endpoint: str,
+      deployment: str,
+      api_version: str,
+      api_key: str,
+      scheduler: LLMScheduler,
+      window: int,
+      name: str = "azure",
+   ):
+      url = (
+         f"{endpoint.rstrip('/')}/openai/deployments/{deployment}/chat/completions"
+         f"?api-version={api_version}"
+      )
+      headers = {"Content-Type": "application/json", "api-key": api_key}
+      super().__init__(name, url, headers, scheduler, window)
+      self.deployment = deployment
+
+   @property
+   def model_id(self) -> str:
+      return f"{self.name}:{self.deployment}"
+
+
+class OpenAICompatibleBackend(HTTPChatBackend):
+   # OpenAI itself or any server with the same API (vLLM, Ollama, LiteLLM, ...);
+   # base_url includes the version prefix, e.g. https://api.openai.com/v1
+   def __init__(
+      self,
+      base_url: str,
+      model: str,
+      api_key: Optional[str],
+      scheduler: LLMScheduler,
+      window: int,
+      name: str = "openai",
+   ):
+      headers = {"Content-Type": "application/json"}
+      if api_key:
+         headers["Authorization"] = f"Bearer {api_key}"
+      super().__init__(
+         name, f"{base_url.rstrip('/')}/chat/completions", headers, scheduler, window, model=model
+      )
+
+
+class LocalBackend(LLMBackend):
+   # The rule-based local scorer answering in the model's JSON shape: offline
+   # and fast, but far less thorough, so results carry "degraded": true and
+   # are neither cached nor used as a base for incremental re-analysis. Only
+   # full analyses are supported.
+
+   name = "local"
+
+   def supports(self, request: ChatRequest) -> bool:
+      return request.resume_text is not None
+
+   async def complete(self, request: ChatRequest) -> str:
+      if request.resume_text is None:
+         raise AIAnalysisError("The local backend only runs full analyses.")
+      result = score_resume(request.resume_text, request.job_description)
+      return json.dumps({**result, "degraded": True})
+
+   async def stream(self, request: ChatRequest) -> AsyncIterator[str]:
+      yield await self.complete(request)
+
+
+class LLMRouter:
+   # Sends each request to the backend with the lowest recent latency
+   # (EWMA, penalised by error rate). Backends without samples rank first so
+   # they get measured, and `explore_ratio` of requests try another backend
+   # first so stale rankings recover. A request still running after the
+   # chosen backend's `hedge_quantile` latency is hedged: a copy goes to the
+   # next-ranked backend (the same one if there is no other), the first
+   # answer wins and the other request is cancelled. Hedges are capped at
+   # `hedge_max_ratio` of requests. Failed requests fail over down the
+   # ranking and, once every backend failed, to the fallbacks. Streams fail
+   # over only before their first chunk and are never hedged.
+
+   HEDGE_BURST = 5.0
+
+   def __init__(
+      self,
+      backends: List[LLMBackend],
+      fallbacks: List[LLMBackend],
+      hedge_enabled: bool,
+      hedge_quantile: float,
+      hedge_min_samples: int,
+      hedge_min_delay: float,
+      hedge_max_ratio: float,
+      error_penalty: float,
+      explore_ratio: float,
+   ):
+      self.backends = backends
+      self.fallbacks = fallbacks
+      self.hedge_enabled = hedge_enabled
+      self.hedge_quantile = hedge_quantile
+      self.hedge_min_samples = hedge_min_samples
+      self.hedge_min_delay = hedge_min_delay
+      self.hedge_max_ratio = hedge_max_ratio
+      self.error_penalty = error_penalty
+      self.explore_ratio = explore_ratio
+      self._hedge_credit = 0.0
+      self.requests = 0
+      self.hedges = 0
+      self.hedge_wins = 0
+      self.failovers = 0
+      self.fallback_answers = 0
+
+   def _score(self, backend: LLMBackend) -> float:
+      tracker = backend.tracker
+      if tracker.ewma is None:
+         return 0.0
+      return tracker.ewma * (1 + self.error_penalty * tracker.error_rate)
+
+   def model_ids(self) -> List[str]:
+      # The models a non-degraded answer can come from, whichever served it
+      return sorted({backend.model_id for backend in self.backends})
+
+   def rank(self, request: ChatRequest) -> List[LLMBackend]:
+      # Backends with an open circuit go last; list order breaks ties
+      ranked = sorted(
+         (b for b in self.backends if b.supports(request)),
+         key=lambda b: (not b.available, self._score(b)),
+      )
+      if len(ranked) > 1 and random.random() < self.explore_ratio:
+         ranked.insert(0, ranked.pop(random.randrange(1, len(ranked))))
+      return ranked + [b for b in self.fallbacks if b.supports(request)]
+
+   def _observe(self, backend: LLMBackend, started: float, outcome: str) -> None:
+      elapsed = time.perf_counter() - started
+      # A cancelled request (lost hedge) took at least this long; keeping it
+      # as a sample stops a straggling backend from looking fast
+      backend.tracker.record(elapsed, outcome != "error")
+      LLM_BACKEND_REQUEST_SECONDS.labels(backend.name, outcome).observe(elapsed)
+
+   async def _call(self, backend: LLMBackend, request: ChatRequest) -> str:
+      backend.requests += 1
+      started = time.perf_counter()
+      outcome = "error"
+      try:
+         content = await backend.complete(request)
+         outcome = "ok"
+         return content
+      except asyncio.CancelledError:
+         outcome = "cancelled"
+         raise
+      finally:
+         self._observe(backend, started, outcome)
+
+   def _hedge_delay(self, backend: LLMBackend) -> Optional[float]:
+      if not self.hedge_enabled or backend in self.fallbacks:
+         return None
+      if len(backend.tracker.latencies) < self.hedge_min_samples:
+         return None
+      return max(self.hedge_min_delay, backend.tracker.quantile(self.hedge_quantile))
+
+   async def _hedged(
+      self, backend: LLMBackend, remaining: List[LLMBackend], request: ChatRequest
+   ) -> str:
+      delay = self._hedge_delay(backend)
+      if delay is None:
+         return await self._call(backend, request)
+
+      first = asyncio.ensure_future(self._call(backend, request))
+      tasks = {first}
+      try:
+         done, _ = await asyncio.wait(tasks, timeout=delay)
+         if not done and self._hedge_credit >= 1:
+            self._hedge_credit -= 1
+            self.hedges += 1
+            target = next((b for b in remaining if b not in self.fallbacks), backend)
+            if target in remaining:
+               remaining.remove(target)
+            tasks.add(asyncio.ensure_future(self._call(target, request)))
+         hedged = len(tasks) > 1
+         error: Optional[BaseException] = None
+         while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+               if task.exception() is None:
+                  if hedged:
+                     won = "primary" if task is first else "hedge"
+                     self.hedge_wins += won == "hedge"
+                     LLM_HEDGED_REQUESTS.labels(f"{won}_won").inc()
+                  return task.result()
+               error = error or task.exception()
+         if hedged:
+            LLM_HEDGED_REQUESTS.labels("both_failed").inc()
+         raise error
+      finally:
+         for task in tasks:
+            task.cancel()
+
+   def _failure(self, errors: List[AIAnalysisError]) -> AIAnalysisError:
+      if len(errors) == 1:
+         return errors[0]
+      summary = "; ".join(str(e) for e in errors)
+      if all(isinstance(e, AIServiceUnavailableError) for e in errors):
+         return AIServiceUnavailableError(
+            f"All LLM backends are unavailable: {summary}",
+            retry_after=min(e.retry_after for e in errors),
+         )
+      return AIAnalysisError(f"All LLM backends failed: {summary}")
+
+   async def complete(self, request: ChatRequest) -> str:
+      ranked = self.rank(request)
+      if not ranked:
+         raise AIAnalysisError("No LLM backend is configured (see LLM_BACKENDS).")
+      self.requests += 1
+      self._hedge_credit = min(self.HEDGE_BURST, self._hedge_credit + self.hedge_max_ratio)
+      errors: List[AIAnalysisError] = []
+      while ranked:
+         backend = ranked.pop(0)
+         if errors:
+            self.failovers += 1
+         try:
+            content = await self._hedged(backend, ranked, request)
+         except AIAnalysisError as e:
+            errors.append(e)
+            continue
+         if backend in self.fallbacks:
+            self.fallback_answers += 1
+         return content
+      raise self._failure(errors)
+
+   async def stream(self, request: ChatRequest) -> AsyncIterator[str]:
+      ranked = self.rank(request)
+      if not ranked:
+         raise AIAnalysisError("No LLM backend is configured (see LLM_BACKENDS).")
+      self.requests += 1
+      errors: List[AIAnalysisError] = []
+      for backend in ranked:
+         if errors:
+            self.failovers += 1
+         backend.requests += 1
+         started = time.perf_counter()
+         streamed = False
+         outcome = "error"
+         try:
+            async for delta in backend.stream(request):
+               streamed = True
+               yield delta
+            outcome = "ok"
+         except AIAnalysisError as e:
+            if streamed:
+               raise
+            errors.append(e)
+            continue
+         finally:
+            self._observe(backend, started, outcome)
+         if backend in self.fallbacks:
+            self.fallback_answers += 1
+         return
+      raise self._failure(errors)
+
+   def stats(self) -> Dict[str, Any]:
+      return {
+         "requests": self.requests,
+         "hedges": self.hedges,
+         "hedge_wins": self.hedge_wins,
+         "failovers": self.failovers,
+         "fallback_answers": self.fallback_answers,
+         "backends": {b.name: b.stats() for b in self.backends},
+         "fallbacks": {b.name: b.stats() for b in self.fallbacks},
+      }
+
+
+def create_router() -> LLMRouter:
+   window = settings.LLM_ROUTER_WINDOW
+   names = [name.strip().lower() for name in settings.LLM_BACKENDS.split(",") if name.strip()]
+   backends: List[LLMBackend] = []
+   for name in names:
+      # Backends listed but not configured are skipped
+      if name == "azure":
+         if settings.AZURE_OPENAI_ENDPOINT and settings.AZURE_OPENAI_API_KEY:
+            backends.append(
+               AzureOpenAIBackend(
+                  str(settings.AZURE_OPENAI_ENDPOINT),
+                  settings.AZURE_OPENAI_DEPLOYMENT or "",
+                  settings.AZURE_OPENAI_API_VERSION,
+                  settings.AZURE_OPENAI_API_KEY,
+                  create_scheduler("Azure OpenAI"),
+                  window,
+               )
+            )
+      elif name == "openai":
+         if settings.OPENAI_BASE_URL and settings.OPENAI_MODEL:
+            backends.append(
+               OpenAICompatibleBackend(
+                  str(settings.OPENAI_BASE_URL),
+                  settings.OPENAI_MODEL,
+                  settings.OPENAI_API_KEY,
+                  create_scheduler("OpenAI-compatible endpoint"),
+                  window,
+               )
+            )
+      elif name == "local":
+         backends.append(LocalBackend(window))
+      else:
+         raise ValueError(f"Unknown LLM backend in LLM_BACKENDS: {name!r}")
+   fallbacks: List[LLMBackend] = []
+   if settings.LLM_LOCAL_FALLBACK and "local" not in names:
+      fallbacks.append(LocalBackend(window))
+   return LLMRouter(
+      backends,
+      fallbacks,
+      hedge_enabled=settings.LLM_HEDGE_ENABLED,
+      hedge_quantile=settings.LLM_HEDGE_QUANTILE,
+      hedge_min_samples=settings.LLM_HEDGE_MIN_SAMPLES,
+      hedge_min_delay=settings.LLM_HEDGE_MIN_DELAY_SECONDS,
+      hedge_max_ratio=settings.LLM_HEDGE_MAX_RATIO,
+      error_penalty=settings.LLM_ROUTER_ERROR_PENALTY,
+      explore_ratio=settings.LLM_ROUTER_EXPLORE_RATIO,
+   )
+
+
+llm_router = create_router()
+# Looked up at scrape time: llm_router may be replaced
+service_stats.register("llm_router", lambda: llm_router.stats())
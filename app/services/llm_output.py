@@ -0,0 +1,206 @@
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+
+from pydantic import ValidationError
+
+from app.core.metrics import LLM_OUTPUT_PARSES
+from app.schemas.analysis import LLMAnalysis
+
+# Parsing and validation of the model's analysis JSON. Replies are often
+# not clean JSON: prose around the object, a ```json fence with or without
+# its closing half, trailing commas, or a reply cut off by the token limit.
+# These are repaired locally; what is still missing or invalid afterwards is
+# reported so the caller can ask the model for just those fields.
+
+ANALYSIS_FIELDS = (
+   "overall_score",
+   "experience_summary",
+   "skills",
+   "strengths",
+   "gaps",
+   "improvement_suggestions",
+)
+
+_FENCE = re.compile(r"```[ \t]*(?:json|JSON)?[ \t]*\r?\n?")
+_DECODER = json.JSONDecoder(strict=False)
+
+
+class LLMOutputError(ValueError):
+   pass
+
+
+@dataclass
+class ParsedAnalysis:
+   result: Dict[str, Any]
+   # ANALYSIS_FIELDS absent from or invalid in the reply, in that order
+   missing: List[str] = field(default_factory=list)
+   repaired: bool = False
+
+
+def extract_json(text: str) -> List[str]:
+   # Where the object may start: the first "{" of the reply and, if a fence
+   # comes after it (prose with braces before a ```json block, or an
+   # unfenced object whose values contain ```), the first "{" after the
+   # fence. Anything after the object, closing fence included, is left for
+   # the decoder to ignore.
+   start = text.find("{")
+   if start == -1:
+      raise LLMOutputError("no JSON object in the reply")
+   candidates = [text[start:]]
+   match = _FENCE.search(text, start)
+   if match:
+      fenced = text.find("{", match.end())
+      if fenced != -1:
+         candidates.append(text[fenced:])
+   return candidates
+
+
+def _strip_trailing_comma(out: List[str]) -> None:
+   i = len(out) - 1
+   while i >= 0 and out[i].isspace():
+      i -= 1
+   if i >= 0 and out[i] == ",":
+      del out[i]
+
+
+def repair_json(text: str) -> Tuple[str, bool]:
+   # One pass over `text` (starting at "{"): drops trailing commas, stops at
+   # the end of the top-level object and, if the text ends first, closes the
+   # open string and containers, cutting a value that can't be closed back
+   # to the last point where the object was well formed. Also returns
+   # whether the text ended inside a top-level member before its value was
+   # visibly complete (a number may have lost digits).
+   out: List[str] = []
+   closers: List[str] = []
+   # (length of out, closers) after each "{" / "[" and before each ","
+   safe: Tuple[int, Tuple[str, ...]] = (0, ())
+   in_string = escape = False
+   member_open = in_value = False
+   for c in text:
+      if closers and not c.isspace():
+         member_open = True
+      if in_string:
+         out.append(c)
+         if escape:
+            escape = False
+         elif c == "\\":
+            escape = True
+         elif c == '"':
+            in_string = False
+            if len(closers) == 1 and in_value:
+               member_open = False
+         continue
+      if c == '"':
+         in_string = True
+      elif c in "{[":
+         closers.append("}" if c == "{" else "]")
+         out.append(c)
+         safe = (len(out), tuple(closers))
+         continue
+      elif c in "}]":
+         _strip_trailing_comma(out)
+         if not closers:
+            break
+         # A mismatched closer is taken to mean the expected one
+         out.append(closers.pop())
+         if not closers:
+            return "".join(out), False
+         member_open = len(closers) != 1
+         continue
+      elif c == ",":
+         _strip_trailing_comma(out)
+         safe = (len(out), tuple(closers))
+         if len(closers) == 1:
+            member_open = in_value = False
+      elif c == ":" and len(closers) == 1:
+         in_value = True
+      out.append(c)
+
+   # Truncated: close what is open, or cut back to the last safe point
+   if in_string:
+      if escape:
+         out.pop()
+      out.append('"')
+   _strip_trailing_comma(out)
+   candidate = "".join(out) + "".join(reversed(closers))
+   try:
+      _DECODER.decode(candidate)
+   except json.JSONDecodeError:
+      length, open_closers = safe
+      candidate = "".join(out[:length]).rstrip().rstrip(",") + "".join(reversed(open_closers))
+      # Cut back to a top-level "," or "{": the open member is gone entirely
+      member_open = member_open and len(open_closers) > 1
+   return candidate, member_open
+
+
+def loads_object(text: str) -> Tuple[Dict[str, Any], bool]:
+   # (object, whether it needed repair); raises LLMOutputError
+   error = "the reply's JSON is not an object"
+   for candidate in extract_json(text):
+      try:
+         value, _ = _DECODER.raw_decode(candidate)
+         if isinstance(value, dict):
+            return value, False
+      except json.JSONDecodeError:
+         pass
+      repaired_text, truncated = repair_json(candidate)
+      try:
+         value = _DECODER.decode(repaired_text)
+      except json.JSONDecodeError as e:
+         error = str(e)
+         continue
+      if isinstance(value, dict):
+         if truncated and value:
+            # The member being written when the reply was cut off
+            value.pop(next(reversed(value)))
+         return value, True
+   raise LLMOutputError(error)
+
+
+def validate_analysis(data: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+   # (validated result, missing fields). Invalid fields are dropped and
+   # reported as missing rather than failing the whole reply.
+   data = dict(data)
+   while True:
+      try:
+         model = LLMAnalysis.model_validate(data)
+         break
+      except ValidationError as e:
+         invalid = {error["loc"][0] for error in e.errors() if error["loc"]}
+         if not invalid & data.keys():
+            raise LLMOutputError(str(e)) from e
+         for key in invalid:
+            data.pop(key, None)
+   result = model.model_dump(exclude_none=True)
+   return result, [name for name in ANALYSIS_FIELDS if name not in result]
+
+
+def parse_analysis(text: str) -> ParsedAnalysis:
+   try:
+      data, repaired = loads_object(text)
+      result, missing = validate_analysis(data)
+   except LLMOutputError:
+      LLM_OUTPUT_PARSES.labels("failed").inc()
+      raise
+   LLM_OUTPUT_PARSES.labels(
+      "incomplete" if missing else "repaired" if repaired else "clean"
+   ).inc()
+   return ParsedAnalysis(result, missing, repaired)
+
+
+def merge_fields(parsed: ParsedAnalysis, text: str) -> ParsedAnalysis:
+   # Fills parsed.missing from a follow-up reply holding just those fields;
+   # an unusable reply leaves them missing
+   try:
+      data, repaired = loads_object(text)
+      extra, _ = validate_analysis({k: v for k, v in data.items() if k in parsed.missing})
+   except LLMOutputError:
+      return parsed
+   result = {**parsed.result, **extra}
+   return ParsedAnalysis(
+      result,
+      [name for name in parsed.missing if name not in result],
+      parsed.repaired or repaired,
+   )
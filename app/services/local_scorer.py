@@ -0,0 +1,424 @@
+import re
+import zlib
+from collections import Counter
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.models.resume import Resume
+
+# Canonical skill name -> lowercase surface forms. Multi-word forms are matched
+# token by token, so "machine learning" matches across any whitespace.
+TECHNICAL_SKILLS: Dict[str, List[str]] = {
+   "Python": ["python"],
+   "Java": ["java"],
+   "JavaScript": ["javascript", "js", "ecmascript"],
+   "TypeScript": ["typescript", "ts"],
+   "C": ["ansi c", "c programming", "c language"],
+   "C++": ["c++", "cpp"],
+   "C#": ["c#", "csharp"],
+   "Go": ["golang"],
+   "Rust": ["rust"],
+   "Ruby": ["ruby"],
+   "PHP": ["php"],
+   "Kotlin": ["kotlin"],
+   "Swift": ["swift"],
+   "Scala": ["scala"],
+   "R": ["r programming", "rstudio"],
+   "MATLAB": ["matlab"],
+   "SQL": ["sql"],
+   "NoSQL": ["nosql"],
+   "PostgreSQL": ["postgresql", "postgres"],
+   "MySQL": ["mysql"],
+   "SQLite": ["sqlite"],
+   "MongoDB": ["mongodb", "mongo"],
+   "Redis": ["redis"],
+   "Elasticsearch": ["elasticsearch"],
+   "Cassandra": ["cassandra"],
+   "Snowflake": ["snowflake"],
+   "BigQuery": ["bigquery"],
+   "HTML": ["html", "html5"],
+   "CSS": ["css", "css3"],
+   "React": ["react", "reactjs", "react.js"],
+   "Angular": ["angular", "angularjs"],
+   "Vue": ["vue", "vuejs", "vue.js"],
+   "Node.js": ["node.js", "nodejs", "node"],
+   "Express": ["express.js", "expressjs"],
+   "Django": ["django"],
+   "Flask": ["flask"],
+   "FastAPI": ["fastapi"],
+   "Spring": ["spring boot", "spring framework"],
+   ".NET": [".net", "dotnet", "asp.net"],
+   "Ruby on Rails": ["rails", "ruby on rails"],
+   "GraphQL": ["graphql"],
+   "REST APIs": ["restful", "rest api", "rest apis"],
+   "gRPC": ["grpc"],
+   "Microservices": ["microservices", "microservice"],
+   "Docker": ["docker"],
+   "Kubernetes": ["kubernetes", "k8s"],
+   "Terraform": ["terraform"],
+   "Ansible": ["ansible"],
+   "Jenkins": ["jenkins"],
+   "CI/CD": ["ci/cd", "cicd", "continuous integration", "continuous delivery"],
+   "GitHub Actions": ["github actions"],
+   "Git": ["git"],
+   "Linux": ["linux", "unix"],
+   "Bash": ["bash", "shell scripting"],
+   "AWS": ["aws", "amazon web services"],
+   "Azure": ["azure", "microsoft azure"],
+   "GCP": ["gcp", "google cloud", "google cloud platform"],
+   "Kafka": ["kafka"],
+   "RabbitMQ": ["rabbitmq"],
+   "Spark": ["spark", "pyspark", "apache spark"],
+   "Hadoop": ["hadoop"],
+   "Airflow": ["airflow"],
+   "dbt": ["dbt"],
+   "ETL": ["etl", "elt"],
+   "Data Pipelines": ["data pipeline", "data pipelines"],
+   "Data Analysis": ["data analysis", "data analytics"],
+   "Data Visualization": ["data visualization"],
+   "Tableau": ["tableau"],
+   "Power BI": ["power bi", "powerbi"],
+   "Excel": ["excel"],
+   "Pandas": ["pandas"],
+   "NumPy": ["numpy"],
+   "SciPy": ["scipy"],
+   "scikit-learn": ["scikit-learn", "sklearn"],
+   "TensorFlow": ["tensorflow"],
+   "PyTorch": ["pytorch", "torch"],
+   "Keras": ["keras"],
+   "Machine Learning": ["machine learning", "ml"],
+   "Deep Learning": ["deep learning"],
+   "NLP": ["nlp", "natural language processing"],
+   "Computer Vision": ["computer vision"],
+   "LLMs": ["llm", "llms", "large language models"],
+   "Generative AI": ["generative ai", "genai"],
+   "Artificial Intelligence": ["artificial intelligence", "ai"],
+   "Statistics": ["statistics", "statistical analysis"],
+   "A/B Testing": ["a/b testing", "ab testing", "experimentation"],
+   "Algorithms": ["algorithms", "data structures"],
+   "Operating Systems": ["operating systems"],
+   "Software Engineering": ["software engineering", "software development"],
+   "System Design": ["system design", "distributed systems"],
+   "Object-Oriented Programming": ["oop", "object-oriented programming"],
+   "Unit Testing": ["unit testing", "pytest", "junit", "tdd"],
+   "Selenium": ["selenium"],
+   "Agile": ["agile", "scrum", "kanban"],
+   "Jira": ["jira"],
+   "Figma": ["figma"],
+   "Android": ["android"],
+   "iOS": ["ios"],
+   "Flutter": ["flutter"],
+   "React Native": ["react native"],
+   "Security": ["cybersecurity", "application security", "owasp"],
+   "OAuth": ["oauth", "oauth2", "jwt"],
+   "Networking": ["tcp/ip", "networking"],
+   "SAP": ["sap"],
+   "Salesforce": ["salesforce"],
+}
+
+SOFT_SKILLS: Dict[str, List[str]] = {
+   "Communication": ["communication", "communicated", "presented", "presentation"],
+   "Leadership": ["leadership", "led", "mentored", "managed"],
+   "Teamwork": ["teamwork", "collaboration", "collaborated", "cross-functional"],
+   "Problem Solving": ["problem solving", "problem-solving", "troubleshooting"],
+   "Ownership": ["ownership", "owned", "drove", "spearheaded"],
+   "Adaptability": ["adaptability", "fast-paced"],
+   "Time Management": ["time management", "prioritization", "deadlines"],
+   "Stakeholder Management": ["stakeholder", "stakeholders", "client-facing"],
+}
+
+STOP_WORDS = frozenset(
+   """
+   a about above after again against all also am an and any are as at be because been before
+   being below between both but by can could did do does doing down during each few for from
+   further had has have having he her here hers herself him himself his how i if in into is it
+   its itself just me more most my myself no nor not now of off on once only or other our ours
+   ourselves out over own same she should so some such than that the their theirs them
+   themselves then there these they this those through to too under until up very was we were
+   what when where which while who whom why will with would you your yours yourself
+   yourselves etc e.g i.e per via using use used within across including ability able strong
+   experience experienced work working role team years year plus preferred required
+   requirements responsibilities must looking candidate company job will new
+   """.split()
+)
+
+# Keeps "c++", "c#", "node.js", "ci/cd" intact but drops trailing punctuation
+_TOKEN = re.compile(r"[a-z0-9](?:[a-z0-9+#./-]*[a-z0-9+#])?")
+_HASH_BITS = 18
+_HASH_MASK = (1 << _HASH_BITS) - 1
+
+
+def tokenize(text: str) -> List[str]:
+   return _TOKEN.findall(text.lower())
+
+
+class AhoCorasick:
+   # Aho-Corasick automaton over tokens rather than characters: tokenization
+   # runs in C via the regex engine and phrases match on word boundaries.
+
+   def __init__(self, patterns: Dict[Hashable, Iterable[str]]):
+      self._goto: List[Dict[str, int]] = [{}]
+      self._fail: List[int] = [0]
+      self._out: List[List[Tuple[Hashable, int]]] = [[]]
+
+      for label, forms in patterns.items():
+         for form in forms:
+            tokens = tokenize(form)
+            if tokens:
+               self._add(tokens, label)
+      self._build()
+
+   def _add(self, tokens: List[str], label: Hashable) -> None:
+      state = 0
+      for token in tokens:
+         nxt = self._goto[state].get(token)
+         if nxt is None:
+            nxt = len(self._goto)
+            self._goto[state][token] = nxt
+            self._goto.append({})
+            self._fail.append(0)
+            self._out.append([])
+         state = nxt
+      self._out[state].append((label, len(tokens)))
+
+   def _build(self) -> None:
+      queue = list(self._goto[0].values())
+      for state in queue:
+         for token, nxt in self._goto[state].items():
+            queue.append(nxt)
+            fallback = self._fail[state]
+            while fallback and token not in self._goto[fallback]:
+               fallback = self._fail[fallback]
+            candidate = self._goto[fallback].get(token, 0)
+            self._fail[nxt] = candidate if candidate != nxt else 0
+            self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+   def find(self, tokens: List[str]) -> Dict[Hashable, int]:
+      goto, fail, out = self._goto, self._fail, self._out
+      root = goto[0]
+      counts: Dict[Hashable, int] = {}
+      state = 0
+      for token in tokens:
+         if state:
+            while state and token not in goto[state]:
+               state = fail[state]
+            state = goto[state].get(token, 0)
+         else:
+            # Fast path: most tokens never leave the root state
+            state = root.get(token, 0)
+            if not state:
+               continue
+         for label, _ in out[state]:
+            counts[label] = counts.get(label, 0) + 1
+      return counts
+
+
+def _hash(token: str) -> int:
+   return zlib.crc32(token.encode("utf-8")) & _HASH_MASK
+
+
+# token -> feature index, or -1 for stop words; memoized since vocabularies are small
+_feature_ids: Dict[str, int] = {}
+
+
+def _feature_id(token: str) -> int:
+   feature = _feature_ids.get(token)
+   if feature is None:
+      feature = -1 if token in STOP_WORDS or len(token) < 2 else _hash(token)
+      if len(_feature_ids) > 1_000_000:
+         _feature_ids.clear()
+      _feature_ids[token] = feature
+   return feature
+
+
+def _feature_array(tokens: List[str]) -> np.ndarray:
+   ids = list(map(_feature_ids.get, tokens))
+   if None in ids:
+      ids = [_feature_id(t) if i is None else i for t, i in zip(tokens, ids)]
+   features = np.array(ids, dtype=np.int64)
+   return features[features >= 0]
+
+
+def feature_ids(text: str) -> np.ndarray:
+   # Hashed term ids of `text` with stop words dropped, one per occurrence
+   return _feature_array(tokenize(text))
+
+
+class TfidfVectorizer:
+   # Hashing-trick TF-IDF. Document frequencies are accumulated incrementally
+   # with partial_fit (sign=-1 takes documents back out); with no corpus every
+   # term gets the same idf.
+
+   def __init__(self, n_features: int = 1 << _HASH_BITS):
+      self.n_features = n_features
+      self.doc_freq = np.zeros(n_features, dtype=np.float32)
+      self.n_docs = 0
+      self._idf: Optional[np.ndarray] = None
+
+   def partial_fit(self, token_lists: Iterable[List[str]], sign: int = 1) -> "TfidfVectorizer":
+      for tokens in token_lists:
+         self.doc_freq[np.unique(_feature_array(tokens))] += sign
+         self.n_docs += sign
+      if sign < 0:
+         # Removing a document this process never counted (bootstrapped elsewhere)
+         np.maximum(self.doc_freq, 0, out=self.doc_freq)
+         self.n_docs = max(self.n_docs, 0)
+      self._idf = None
+      return self
+
+   @property
+   def idf(self) -> np.ndarray:
+      if self._idf is None:
+         self._idf = (
+            np.log((1.0 + self.n_docs) / (1.0 + self.doc_freq)) + 1.0
+         ).astype(np.float32)
+      return self._idf
+
+   def transform(self, tokens: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+      # Sparse, L2-normalized vector as (sorted indices, values)
+      hashed = _feature_array(tokens)
+      if not len(hashed):
+         return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+      ids, counts = np.unique(hashed, return_counts=True)
+      values = (1.0 + np.log(counts)).astype(np.float32) * self.idf[ids]
+      norm = np.linalg.norm(values)
+      if norm:
+         values /= norm
+      return ids, values
+
+   def dense(self, tokens: List[str]) -> np.ndarray:
+      ids, values = self.transform(tokens)
+      vector = np.zeros(self.n_features, dtype=np.float32)
+      vector[ids] = values
+      return vector
+
+
+class LocalScorer:
+   def __init__(self, vectorizer: Optional[TfidfVectorizer] = None):
+      self.vectorizer = vectorizer or TfidfVectorizer()
+      # One automaton for both dictionaries so each resume is scanned once
+      patterns: Dict[Tuple[str, str], List[str]] = {}
+      patterns.update({("technical", k): v for k, v in TECHNICAL_SKILLS.items()})
+      patterns.update({("soft", k): v for k, v in SOFT_SKILLS.items()})
+      self.skills = AhoCorasick(patterns)
+      self._jd_cache: Dict[str, Tuple[np.ndarray, List[str], List[str]]] = {}
+
+   def _find_skills(self, tokens: List[str]) -> Tuple[List[str], List[str]]:
+      found = self.skills.find(tokens)
+      ranked = sorted(found, key=lambda key: (-found[key], key[1]))
+      technical = [name for kind, name in ranked if kind == "technical"]
+      soft = [name for kind, name in ranked if kind == "soft"]
+      return technical, soft
+
+   def _prepare_jd(self, job_description: str):
+      prepared = self._jd_cache.get(job_description)
+      if prepared is None:
+         tokens = tokenize(job_description)
+         jd_skills, _ = self._find_skills(tokens)
+         skill_terms = set(tokenize(" ".join(jd_skills)))
+         keywords = [k for k in self._top_keywords(tokens) if k not in skill_terms]
+         prepared = (self.vectorizer.dense(tokens), jd_skills, keywords)
+         # Dense JD vectors are 1 MB each; keep only a handful around
+         if len(self._jd_cache) >= 16:
+            self._jd_cache.clear()
+         self._jd_cache[job_description] = prepared
+      return prepared
+
+   def partial_fit(self, texts: Iterable[str], sign: int = 1) -> "LocalScorer":
+      # Update idf statistics from a corpus (e.g. stored resumes); sign=-1
+      # removes texts that were counted before (an edited or deleted resume)
+      self.vectorizer.partial_fit((tokenize(text or "") for text in texts), sign)
+      self._jd_cache.clear()
+      return self
+
+   def bootstrap(self, bind: Engine) -> None:
+      # idf from the stored resumes; later creates, edits and deletes adjust it
+      with Session(bind) as db:
+         self.partial_fit(
+            db.scalars(select(Resume.resume_text).execution_options(yield_per=1000))
+         )
+
+   def _top_keywords(self, tokens: List[str], limit: int = 15) -> List[str]:
+      counts = Counter(t for t in tokens if t not in STOP_WORDS and len(t) > 2 and not t.isdigit())
+      idf = self.vectorizer.idf
+      ranked = sorted(counts, key=lambda t: counts[t] * idf[_hash(t)], reverse=True)
+      return ranked[:limit]
+
+   def score(self, resume_text: str, job_description: Optional[str] = None) -> Dict[str, Any]:
+      tokens = tokenize(resume_text)
+      tech_skills, soft_skills = self._find_skills(tokens)
+
+      if not job_description:
+         # No target: reward breadth of recognised skills only
+         overall = min(100, 30 + 5 * len(tech_skills) + 2 * len(soft_skills))
+         return self._result(overall, tech_skills, soft_skills, [], [], None, None)
+
+      jd_vector, jd_skills, jd_keywords = self._prepare_jd(job_description)
+      ids, values = self.vectorizer.transform(tokens)
+      similarity = float(values @ jd_vector[ids]) if len(ids) else 0.0
+
+      tech = set(tech_skills)
+      matched = [s for s in jd_skills if s in tech]
+      missing = [s for s in jd_skills if s not in tech]
+      resume_terms = set(tokens)
+      missing_keywords = [k for k in jd_keywords if k not in resume_terms]
+
+      # Cosine similarity between unrelated texts rarely exceeds ~0.5, so it is
+      # rescaled before being blended with required-skill coverage.
+      similarity_score = min(1.0, similarity / 0.5)
+      if jd_skills:
+         coverage = len(matched) / len(jd_skills)
+         overall = round(100 * (0.6 * coverage + 0.4 * similarity_score))
+      else:
+         overall = round(100 * similarity_score)
+
+      return self._result(
+         overall, tech_skills, soft_skills, matched, missing, missing_keywords, similarity
+      )
+
+   def score_many(
+      self, resume_texts: Iterable[str], job_description: Optional[str] = None
+   ) -> List[Dict[str, Any]]:
+      return [self.score(text, job_description) for text in resume_texts]
+
+   @staticmethod
+   def _result(
+      overall: int,
+      tech_skills: List[str],
+      soft_skills: List[str],
+      matched: List[str],
+      missing: List[str],
+      missing_keywords: Optional[List[str]],
+      similarity: Optional[float],
+   ) -> Dict[str, Any]:
+      gaps = list(missing) + list(missing_keywords or [])
+
+      if similarity is None:
+         summary = f"Local keyword scan found {len(tech_skills)} technical skills."
+      else:
+         summary = (
+            f"Local keyword match: {len(matched)} of {len(matched) + len(missing)} "
+            f"job description skills found; text similarity {similarity:.2f}."
+         )
+
+      return {
+         "overall_score": int(overall),
+         "experience_summary": summary,
+         "skills": {"technical": tech_skills, "soft": soft_skills},
+         "strengths": [f"Matches required skill: {s}" for s in matched],
+         "gaps": gaps,
+         "improvement_suggestions": [
+            f"Add concrete evidence of {s} experience if you have it." for s in missing[:5]
+         ],
+      }
+
+
+local_scorer = LocalScorer()
+
+
+def score_resume(resume_text: str, job_description: Optional[str] = None) -> Dict[str, Any]:
+   return local_scorer.score(resume_text, job_description)
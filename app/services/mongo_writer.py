@@ -0,0 +1,264 @@
+import asyncio
+import fcntl
+import logging
+import os
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import json_util
+from pymongo import DeleteMany, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from app.core.config import get_settings
+from app.core.metrics import service_stats
+from app.core.mongo import async_mongo_db
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# (collection, op, args) where op is "insert", "update" or "delete"
+MongoOp = Tuple[str, str, Dict[str, Any]]
+
+
+def _to_request(op: str, args: Dict[str, Any]):
+   if op == "insert":
+      return InsertOne(args["document"])
+   if op == "update":
+      return UpdateOne(args["filter"], args["update"], upsert=args.get("upsert", False))
+   if op == "delete":
+      return DeleteMany(args["filter"])
+   raise ValueError(f"Unknown Mongo op: {op}")
+
+
+class MongoWriter:
+   # Buffers mirror/log writes off the request path and flushes them with one
+   # ordered bulk_write per collection once a batch fills or the flush interval
+   # passes. When Mongo is unreachable (or the queue stays full) operations are
+   # appended to a local JSON-lines spill file and replayed once Mongo is back;
+   # spilled operations may land after newer queued ones. Only operations that
+   # were not written are spilled; replays run unordered and treat duplicate
+   # _ids (inserts written before the failure was noticed) as written.
+   # The spill file may be shared by several worker processes, so appends and
+   # takes hold an exclusive flock on a side lock file.
+
+   def __init__(
+      self,
+      mongo_db,
+      max_size: int,
+      batch_size: int,
+      flush_interval: float,
+      enqueue_timeout: float,
+      spill_path: str,
+   ):
+      self.mongo_db = mongo_db
+      self.max_size = max_size
+      self.batch_size = batch_size
+      self.flush_interval = flush_interval
+      self.enqueue_timeout = enqueue_timeout
+      self.spill_path = spill_path
+      self._queue: Optional[asyncio.Queue[MongoOp]] = None
+      self._task: Optional[asyncio.Task] = None
+      self._stopping = False
+      self._next_replay = 0.0
+      self.enqueued = 0
+      self.written = 0
+      self.batches = 0
+      self.failed_batches = 0
+      self.backpressure_waits = 0
+      self.spilled = 0
+      self.replayed = 0
+      self.dropped = 0
+
+   @property
+   def running(self) -> bool:
+      return self._task is not None
+
+   async def start(self) -> None:
+      if self.running:
+         return
+      self._queue = asyncio.Queue(maxsize=self.max_size)
+      self._stopping = False
+      self._task = asyncio.create_task(self._run(), name="mongo-writer")
+
+   async def stop(self) -> None:
+      # Drains everything still queued before returning
+      if not self.running:
+         return
+      self._stopping = True
+      await self._task
+      self._task = None
+
+   async def insert(self, collection: str, document: Dict[str, Any]) -> None:
+      await self._enqueue((collection, "insert", {"document": document}))
+
+   async def insert_many(self, collection: str, documents: List[Dict[str, Any]]) -> None:
+      for document in documents:
+         await self.insert(collection, document)
+
+   async def update(
+      self, collection: str, filter: Dict[str, Any], update: Dict[str, Any], upsert: bool = False
+   ) -> None:
+      await self._enqueue((collection, "update", {"filter": filter, "update": update, "upsert": upsert}))
+
+   async def delete(self, collection: str, filter: Dict[str, Any]) -> None:
+      await self._enqueue((collection, "delete", {"filter": filter}))
+
+   async def _enqueue(self, op: MongoOp) -> None:
+      if not self.running or self._stopping:
+         await self._flush([op])
+         return
+      try:
+         self._queue.put_nowait(op)
+      except asyncio.QueueFull:
+         # Backpressure: hold the caller briefly, then spill rather than block it
+         self.backpressure_waits += 1
+         try:
+            await asyncio.wait_for(self._queue.put(op), self.enqueue_timeout)
+         except asyncio.TimeoutError:
+            await asyncio.to_thread(self._spill, [op])
+            return
+      self.enqueued += 1
+
+   async def _collect(self) -> List[MongoOp]:
+      loop = asyncio.get_running_loop()
+      deadline = loop.time() + self.flush_interval
+      batch: List[MongoOp] = []
+      while len(batch) < self.batch_size:
+         try:
+            batch.append(self._queue.get_nowait())
+            continue
+         except asyncio.QueueEmpty:
+            pass
+         remaining = deadline - loop.time()
+         if remaining <= 0 or self._stopping:
+            break
+         try:
+            batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+         except asyncio.TimeoutError:
+            break
+      return batch
+
+   async def _run(self) -> None:
+      loop = asyncio.get_running_loop()
+      while not (self._stopping and self._queue.empty()):
+         batch = await self._collect()
+         if batch:
+            try:
+               await self._flush(batch)
+            except Exception:
+               logger.exception("Dropping %d unwritable Mongo operations", len(batch))
+               self.dropped += len(batch)
+         # On a timer rather than when idle, so a steady load doesn't starve it
+         if loop.time() >= self._next_replay and os.path.exists(self.spill_path):
+            self._next_replay = loop.time() + self.flush_interval * 20
+            await self._replay_spill()
+
+   async def _write(self, ops: List[MongoOp], replay: bool = False) -> List[MongoOp]:
+      # Returns the operations left unwritten because Mongo failed: those of
+      # the collection being written and of every collection after it
+      by_collection: Dict[str, List[MongoOp]] = defaultdict(list)
+      for op in ops:
+         by_collection[op[0]].append(op)
+      collections = list(by_collection)
+      for i, collection in enumerate(collections):
+         requests = [_to_request(op, args) for _, op, args in by_collection[collection]]
+         try:
+            await self.mongo_db[collection].bulk_write(requests, ordered=not replay)
+         except BulkWriteError as e:
+            # Rejected documents are not retryable; on replay a duplicate _id
+            # means the insert already landed before the spill
+            errors = [
+               error
+               for error in e.details.get("writeErrors", [])
+               if not (replay and error.get("code") == 11000)
+            ]
+            if errors:
+               logger.warning("Mongo bulk write to %s partially failed: %s", collection, errors)
+         except PyMongoError:
+            logger.exception("Mongo write to %s failed", collection)
+            return [op for c in collections[i:] for op in by_collection[c]]
+      return []
+
+   async def _flush(self, batch: List[MongoOp], replay: bool = False) -> bool:
+      unwritten = await self._write(batch, replay)
+      self.written += len(batch) - len(unwritten)
+      if unwritten:
+         logger.warning("Mongo unavailable, spilling %d operations", len(unwritten))
+         self.failed_batches += 1
+         await asyncio.to_thread(self._spill, unwritten)
+         self._next_replay = asyncio.get_running_loop().time() + self.flush_interval * 20
+         return False
+      self.batches += 1
+      return True
+
+   @contextmanager
+   def _spill_lock(self):
+      with open(self.spill_path + ".lock", "a") as lock_file:
+         fcntl.flock(lock_file, fcntl.LOCK_EX)
+         try:
+            yield
+         finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+   def _spill(self, ops: List[MongoOp]) -> None:
+      lines = "".join(
+         json_util.dumps(
+            {"collection": c, "op": op, "args": args},
+            json_options=json_util.RELAXED_JSON_OPTIONS,
+         )
+         + "\n"
+         for c, op, args in ops
+      )
+      with self._spill_lock(), open(self.spill_path, "a", encoding="utf-8") as f:
+         f.write(lines)
+      self.spilled += len(ops)
+
+   def _take_spill(self) -> List[MongoOp]:
+      with self._spill_lock():
+         if not os.path.exists(self.spill_path):
+            return []
+         with open(self.spill_path, encoding="utf-8") as f:
+            records = [json_util.loads(line) for line in f if line.strip()]
+         os.remove(self.spill_path)
+      return [(r["collection"], r["op"], r["args"]) for r in records]
+
+   async def _replay_spill(self) -> None:
+      ops = await asyncio.to_thread(self._take_spill)
+      for start in range(0, len(ops), self.batch_size):
+         chunk = ops[start:start + self.batch_size]
+         if not await self._flush(chunk, replay=True):
+            # Mongo went away again: the failed chunk was re-spilled, keep the rest too
+            await asyncio.to_thread(self._spill, ops[start + self.batch_size:])
+            return
+         self.replayed += len(chunk)
+
+   def stats(self) -> Dict[str, int]:
+      try:
+         spill_bytes = os.path.getsize(self.spill_path)
+      except OSError:
+         spill_bytes = 0
+      return {
+         "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+         "queue_max_size": self.max_size,
+         "enqueued": self.enqueued,
+         "written": self.written,
+         "batches": self.batches,
+         "failed_batches": self.failed_batches,
+         "backpressure_waits": self.backpressure_waits,
+         "spilled": self.spilled,
+         "replayed": self.replayed,
+         "dropped": self.dropped,
+         "spill_file_bytes": spill_bytes,
+      }
+
+
+mongo_writer = MongoWriter(
+   async_mongo_db,
+   max_size=settings.MONGO_WRITER_QUEUE_MAX_SIZE,
+   batch_size=settings.MONGO_WRITER_BATCH_SIZE,
+   flush_interval=settings.MONGO_WRITER_FLUSH_INTERVAL_SECONDS,
+   enqueue_timeout=settings.MONGO_WRITER_ENQUEUE_TIMEOUT_SECONDS,
+   spill_path=settings.MONGO_WRITER_SPILL_PATH,
+)
+service_stats.register("mongo_writer", mongo_writer.stats)
@@ -0,0 +1,235 @@
+import math
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from app.core.config import get_settings
+from app.core.metrics import LLM_PROMPT_TOKENS_SAVED, service_stats
+
+settings = get_settings()
+
+_SPACES = re.compile(r"[^\S\n]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+# Whole lines that carry no signal for the reviewer: page furniture, bare
+# document titles, separators and stock closing phrases
+_BOILERPLATE = [
+   re.compile(pattern, re.IGNORECASE)
+   for pattern in (
+      r"page \d+( of \d+)?",
+      # "2 / 5" page counters, not "06/2019" or "2019 / 2021" date lines
+      r"\d{1,3} ?/ ?\d{1,3}",
+      r"(curriculum vitae|resume|résumé|cv)",
+      r"[-_=*~•·.|\s]+",
+      r"references (are )?available (up)?on request\.?",
+      r"(this (document|resume|cv) is )?(strictly )?(private and )?confidential\.?",
+   )
+]
+
+# Lines shorter than this (skill bullets, dates) may legitimately repeat
+_DEDUPE_MIN_CHARS = 20
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+   # tiktoken ships the BPE ranks separately; without a cached copy (offline
+   # hosts can point TIKTOKEN_CACHE_DIR at one) fall back to the heuristic.
+   try:
+      import tiktoken
+
+      return tiktoken.get_encoding(settings.LLM_TOKENIZER_ENCODING)
+   except Exception:
+      return None
+
+
+def count_tokens(text: Optional[str]) -> int:
+   if not text:
+      return 0
+   encoding = _encoding()
+   if encoding is None:
+      return math.ceil(len(text) / 4)
+   return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+   if count_tokens(text) <= max_tokens:
+      return text
+   encoding = _encoding()
+   if encoding is None:
+      cut = text[: max_tokens * 4]
+   else:
+      cut = encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+   # Prefer ending on a line boundary when one is reasonably close
+   newline = cut.rfind("\n")
+   if newline > len(cut) // 2:
+      cut = cut[:newline]
+   return cut.rstrip()
+
+
+def compact_text(text: Optional[str]) -> str:
+   if not text:
+      return ""
+   text = unicodedata.normalize("NFKC", text).replace("\r\n", "\n").replace("\r", "\n")
+   seen = set()
+   lines = []
+   for line in text.split("\n"):
+      line = _SPACES.sub(" ", line).strip()
+      if line and any(pattern.fullmatch(line) for pattern in _BOILERPLATE):
+         continue
+      if len(line) >= _DEDUPE_MIN_CHARS:
+         key = line.casefold()
+         if key in seen:
+            continue
+         seen.add(key)
+      lines.append(line)
+   return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+
+def split_chunks(text: str, max_tokens: int) -> List[str]:
+   # Greedy packing on line boundaries; a single overlong line is cut
+   chunks: List[str] = []
+   current: List[str] = []
+   used = 0
+   for line in text.split("\n"):
+      tokens = count_tokens(line) + 1
+      if tokens > max_tokens:
+         line = truncate_tokens(line, max_tokens - 1)
+         tokens = max_tokens
+      if current and used + tokens > max_tokens:
+         chunks.append("\n".join(current).strip())
+         current, used = [], 0
+      current.append(line)
+      used += tokens
+   if current:
+      chunks.append("\n".join(current).strip())
+   return [chunk for chunk in chunks if chunk]
+
+
+@dataclass
+class PreparedPrompt:
+   resume_chunks: List[str]
+   job_description: Optional[str]
+   original_tokens: int
+   prompt_tokens: int
+
+   @property
+   def tokens_saved(self) -> int:
+      return max(0, self.original_tokens - self.prompt_tokens)
+
+
+class PromptBudget:
+   # Compacts the resume and job description before they are interpolated
+   # into the prompt and keeps the resume within LLM_RESUME_TOKEN_BUDGET per
+   # call: longer resumes are split for map-reduce analysis (up to
+   # LLM_MAX_CHUNKS calls) and anything beyond that is trimmed.
+
+   def __init__(self, resume_budget: int, jd_budget: int, max_chunks: int, compaction: bool = True):
+      self.resume_budget = resume_budget
+      self.jd_budget = jd_budget
+      self.max_chunks = max_chunks
+      self.compaction = compaction
+      self._lock = threading.Lock()
+      self.requests = 0
+      self.chunked = 0
+      self.trimmed = 0
+      self.original_tokens = 0
+      self.prompt_tokens = 0
+
+   def prepare(self, resume_text: str, job_description: Optional[str]) -> PreparedPrompt:
+      original = count_tokens(resume_text) + count_tokens(job_description)
+      if self.compaction:
+         resume_text = compact_text(resume_text)
+         job_description = compact_text(job_description) or None
+
+      trimmed = False
+      if job_description and count_tokens(job_description) > self.jd_budget:
+         job_description = truncate_tokens(job_description, self.jd_budget)
+         trimmed = True
+
+      limit = self.resume_budget * max(1, self.max_chunks)
+      if count_tokens(resume_text) > limit:
+         resume_text = truncate_tokens(resume_text, limit)
+         trimmed = True
+      if count_tokens(resume_text) > self.resume_budget:
+         chunks = split_chunks(resume_text, self.resume_budget)[: max(1, self.max_chunks)]
+      else:
+         chunks = [resume_text]
+
+      jd_tokens = count_tokens(job_description)
+      prepared = PreparedPrompt(
+         resume_chunks=chunks,
+         job_description=job_description,
+         original_tokens=original,
+         # The JD is repeated in every chunk's prompt
+         prompt_tokens=sum(count_tokens(chunk) for chunk in chunks) + jd_tokens * len(chunks),
+      )
+      with self._lock:
+         self.requests += 1
+         self.chunked += len(chunks) > 1
+         self.trimmed += trimmed
+         self.original_tokens += prepared.original_tokens
+         self.prompt_tokens += prepared.prompt_tokens
+      LLM_PROMPT_TOKENS_SAVED.inc(prepared.tokens_saved)
+      return prepared
+
+   def stats(self) -> Dict[str, Any]:
+      saved = max(0, self.original_tokens - self.prompt_tokens)
+      return {
+         "tokenizer": settings.LLM_TOKENIZER_ENCODING if _encoding() is not None else "chars/4",
+         "requests": self.requests,
+         "chunked": self.chunked,
+         "trimmed": self.trimmed,
+         "original_tokens": self.original_tokens,
+         "prompt_tokens": self.prompt_tokens,
+         "tokens_saved": saved,
+         "tokens_saved_per_request": round(saved / self.requests, 1) if self.requests else 0.0,
+      }
+
+
+prompt_budget = PromptBudget(
+   resume_budget=settings.LLM_RESUME_TOKEN_BUDGET,
+   jd_budget=settings.LLM_JD_TOKEN_BUDGET,
+   max_chunks=settings.LLM_MAX_CHUNKS,
+   compaction=settings.LLM_PROMPT_COMPACTION,
+)
+service_stats.register("prompt_budget", prompt_budget.stats)
+
+
+def _dedupe(items: List[Any]) -> List[Any]:
+   seen = set()
+   out = []
+   for item in items:
+      key = str(item).strip().casefold()
+      if key and key not in seen:
+         seen.add(key)
+         out.append(item)
+   return out
+
+
+def merge_results(partials: List[Dict[str, Any]], weights: List[int]) -> Dict[str, Any]:
+   # Reduce step for chunked analysis: token-weighted score, summaries joined
+   # in document order, list fields unioned without duplicates.
+   scored = [
+      (float(p["overall_score"]), w)
+      for p, w in zip(partials, weights)
+      if isinstance(p.get("overall_score"), (int, float))
+   ]
+   total = sum(w for _, w in scored)
+   merged: Dict[str, Any] = {
+      "overall_score": round(sum(s * w for s, w in scored) / total) if total else None,
+      "experience_summary": " ".join(
+         str(p["experience_summary"]).strip() for p in partials if p.get("experience_summary")
+      ),
+      "skills": {
+         kind: _dedupe(
+            [s for p in partials for s in ((p.get("skills") or {}).get(kind) or [])]
+         )
+         for kind in ("technical", "soft")
+      },
+   }
+   for field in ("strengths", "gaps", "improvement_suggestions"):
+      merged[field] = _dedupe([item for p in partials for item in (p.get(field) or [])])
+   return merged
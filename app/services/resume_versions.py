@@ -0,0 +1,231 @@
+import difflib
+import hashlib
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+# Section splitting for delta-aware re-analysis, and the reverse-delta
+# version history kept in Mongo resume_texts.
+#
+# A resume_texts document holds the current text in full plus `history`, the
+# previous versions oldest first, each stored as a delta that rebuilds it
+# from the version after it:
+#
+#   {"resume_id", "user_id", "resume_text", "job_description", "version",
+#    "history": [{"version", "superseded_at", "delta", ["job_description"]}]}
+#
+# A delta is a list of ops over lines (keepends): [i, j] copies lines i:j of
+# the newer version, a string is literal text. Small edits cost a few bytes.
+
+SECTION_NAMES = {
+   "summary", "professional summary", "profile", "objective", "about", "about me",
+   "experience", "work experience", "professional experience", "employment",
+   "employment history", "work history", "career history", "education",
+   "skills", "technical skills", "core competencies", "key skills",
+   "projects", "personal projects", "certifications", "certificates", "licenses",
+   "awards", "honors", "achievements", "publications", "languages", "interests",
+   "volunteering", "volunteer experience", "leadership", "activities",
+   "references", "training", "courses", "contact",
+}
+
+_HEADING_MARKUP = re.compile(r"^[#*=_\-\s]+|[#*=_:\-\s]+$")
+_BULLET = re.compile(r"^\s*(?:[-*•▪●–]|\d+[.)])\s+", re.MULTILINE)
+_WHITESPACE = re.compile(r"\s+")
+
+Delta = List[Union[List[int], str]]
+
+
+def _heading(line: str) -> Optional[str]:
+   stripped = line.strip()
+   if not stripped or len(stripped) > 60:
+      return None
+   name = _HEADING_MARKUP.sub("", stripped)
+   if not name or len(name.split()) > 5:
+      return None
+   key = name.casefold()
+   if key in SECTION_NAMES or stripped.startswith("#"):
+      return key
+   # "EXPERIENCE", "WORK HISTORY:" and "Experience:" on a line of their own
+   letters = [c for c in name if c.isalpha()]
+   if len(letters) >= 3 and (name.isupper() or stripped.endswith(":")):
+      return key
+   return None
+
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+   # [(key, text)] in document order. Lines before the first heading form the
+   # "header" section; repeated headings get "#2", "#3" suffixes.
+   sections: List[Tuple[str, List[str]]] = [("header", [])]
+   seen: Dict[str, int] = {}
+   for line in text.splitlines():
+      key = _heading(line)
+      if key is None:
+         sections[-1][1].append(line)
+         continue
+      seen[key] = seen.get(key, 0) + 1
+      if seen[key] > 1:
+         key = f"{key}#{seen[key]}"
+      sections.append((key, [line]))
+   return [(key, "\n".join(lines)) for key, lines in sections if key != "header" or any(lines)]
+
+
+def _canonical(text: str) -> str:
+   # Formatting-only edits (spacing, bullet style, case) don't change a section
+   text = unicodedata.normalize("NFKC", text)
+   return _WHITESPACE.sub(" ", _BULLET.sub("", text)).strip().casefold()
+
+
+def text_digest(text: Optional[str]) -> str:
+   return hashlib.sha256(_canonical(text or "").encode("utf-8")).hexdigest()[:16]
+
+
+def section_digests(sections: List[Tuple[str, str]]) -> Dict[str, str]:
+   return {key: text_digest(text) for key, text in sections}
+
+
+@dataclass
+class SectionDiff:
+   added: List[str] = field(default_factory=list)
+   removed: List[str] = field(default_factory=list)
+   changed: List[str] = field(default_factory=list)
+   unchanged: List[str] = field(default_factory=list)
+
+   @property
+   def modified(self) -> bool:
+      return bool(self.added or self.removed or self.changed)
+
+
+def diff_sections(old: Dict[str, str], new: Dict[str, str]) -> SectionDiff:
+   # Both arguments are {key: digest}, in document order
+   diff = SectionDiff()
+   for key, digest in new.items():
+      if key not in old:
+         diff.added.append(key)
+      elif old[key] != digest:
+         diff.changed.append(key)
+      else:
+         diff.unchanged.append(key)
+   diff.removed = [key for key in old if key not in new]
+   return diff
+
+
+# Version history
+
+
+def encode_delta(newer: str, older: str) -> Delta:
+   new_lines = newer.splitlines(keepends=True)
+   old_lines = older.splitlines(keepends=True)
+   matcher = difflib.SequenceMatcher(None, new_lines, old_lines, autojunk=False)
+   delta: Delta = []
+   for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+      if tag == "equal":
+         delta.append([i1, i2])
+      elif j2 > j1:
+         literal = "".join(old_lines[j1:j2])
+         if delta and isinstance(delta[-1], str):
+            delta[-1] += literal
+         else:
+            delta.append(literal)
+   return delta
+
+
+def apply_delta(newer: str, delta: Delta) -> str:
+   lines = newer.splitlines(keepends=True)
+   return "".join(op if isinstance(op, str) else "".join(lines[op[0] : op[1]]) for op in delta)
+
+
+def history_entry(
+   version: int,
+   newer_text: str,
+   older_text: str,
+   superseded_at: Any,
+   older_job_description: Optional[str] = None,
+   job_description_changed: bool = False,
+) -> Dict[str, Any]:
+   entry = {
+      "version": version,
+      "superseded_at": superseded_at,
+      "delta": encode_delta(newer_text, older_text),
+   }
+   # Stored only when it differs from the next version's
+   if job_description_changed:
+      entry["job_description"] = older_job_description
+   return entry
+
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+   # SQLite returns naive datetimes and Mongo naive UTC ones unless tz_aware
+   if value is not None and value.tzinfo is None:
+      return value.replace(tzinfo=timezone.utc)
+   return value
+
+
+def with_current(
+   document: Optional[Dict[str, Any]],
+   version: int,
+   updated_at: Optional[datetime],
+   resume_text: Optional[str] = None,
+   job_description: Optional[str] = None,
+) -> Dict[str, Any]:
+   # The SQL row is authoritative for the current version; the Mongo copy
+   # trails it by up to a writer batch, or is missing until its insert lands.
+   # While it trails, its own version is served as the newest history entry.
+   # resume_text is needed only to rebuild texts (diffs), not to list versions.
+   document = document or {}
+   kept = document.get("version", 1)
+   if document and kept >= version:
+      return document
+   history = list(document.get("history") or [])
+   if document:
+      if resume_text is None:
+         history.append({"version": kept, "superseded_at": updated_at})
+      else:
+         history.append(
+            history_entry(
+               kept,
+               resume_text,
+               document.get("resume_text") or "",
+               updated_at,
+               document.get("job_description"),
+               job_description_changed=document.get("job_description") != job_description,
+            )
+         )
+   return {
+      **document,
+      "version": version,
+      "resume_text": resume_text,
+      "job_description": job_description,
+      "history": history,
+   }
+
+
+def version_list(document: Dict[str, Any], created_at: Optional[datetime]) -> List[Dict[str, Any]]:
+   # Newest first. Version v was created when v-1 was superseded, so the
+   # oldest kept version has no timestamp once earlier ones were trimmed.
+   history = document.get("history") or []
+   started = {
+      1: _utc(created_at),
+      **{entry["version"] + 1: _utc(entry["superseded_at"]) for entry in history},
+   }
+   versions = [document.get("version", 1)] + [entry["version"] for entry in reversed(history)]
+   return [
+      {"version": version, "created_at": started.get(version), "current": i == 0}
+      for i, version in enumerate(versions)
+   ]
+
+
+def reconstruct(document: Dict[str, Any], version: int) -> Optional[Tuple[str, Optional[str]]]:
+   # (resume_text, job_description) of `version`, or None if it isn't kept
+   text = document.get("resume_text") or ""
+   job_description = document.get("job_description")
+   if version == document.get("version", 1):
+      return text, job_description
+   for entry in reversed(document.get("history") or []):
+      text = apply_delta(text, entry["delta"])
+      if "job_description" in entry:
+         job_description = entry["job_description"]
+      if entry["version"] == version:
+         return text, job_description
+   return None
@@ -0,0 +1,312 @@
+import heapq
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.database import engine
+from app.models.resume import Resume
+from app.models.analysis import ResumeAnalysis, AnalysisSkill, SkillKind
+from app.services.local_scorer import STOP_WORDS, tokenize
+
+# Relative importance of each indexed field when ranking
+FIELD_WEIGHTS = {"title": 3.0, "target_role": 2.0, "skills": 2.5, "resume_text": 1.0}
+
+_FTS_TERM = re.compile(r"\w[\w+#.]*")
+
+# SQLite-only (group_concat); used by the FTS5 backfill
+_LATEST_SKILLS_SQL = (
+   "(SELECT group_concat(s.name, ' ') FROM analysis_skills s "
+   "WHERE s.kind = 'technical' AND s.analysis_id = ("
+   "SELECT a.id FROM resume_analyses a WHERE a.resume_id = r.id "
+   "ORDER BY a.created_at DESC, a.id DESC LIMIT 1))"
+)
+
+
+def _skills_text(skills: Optional[List[str]]) -> str:
+   return " ".join(skills or [])
+
+
+async def latest_skills(db: AsyncSession, resume_id: int) -> List[str]:
+   latest = (
+      select(ResumeAnalysis.id)
+      .where(ResumeAnalysis.resume_id == resume_id)
+      .order_by(ResumeAnalysis.created_at.desc(), ResumeAnalysis.id.desc())
+      .limit(1)
+      .scalar_subquery()
+   )
+   result = await db.execute(
+      select(AnalysisSkill.name)
+      .where(AnalysisSkill.analysis_id == latest, AnalysisSkill.kind == SkillKind.TECHNICAL)
+      .order_by(AnalysisSkill.position)
+   )
+   return list(result.scalars())
+
+
+class Fts5SearchIndex:
+   # SQLite FTS5 table kept in the same transaction as the resume row. The owner
+   # column holds a "u<user_id>" token so per-user scoping is a posting-list
+   # intersection rather than a post-filter.
+
+   def bootstrap(self, bind: Engine) -> None:
+      with bind.begin() as conn:
+         conn.execute(
+            text(
+               "CREATE VIRTUAL TABLE IF NOT EXISTS resume_search USING fts5("
+               "owner, title, target_role, skills, resume_text, "
+               "tokenize='porter unicode61 remove_diacritics 2')"
+            )
+         )
+         indexed = conn.execute(text("SELECT count(*) FROM resume_search")).scalar()
+         if indexed == 0:
+            conn.execute(
+               text(
+                  "INSERT INTO resume_search"
+                  "(rowid, owner, title, target_role, skills, resume_text) "
+                  "SELECT r.id, 'u' || r.user_id, r.title, coalesce(r.target_role, ''), "
+                  f"coalesce({_LATEST_SKILLS_SQL}, ''), r.resume_text "
+                  "FROM resumes r"
+               )
+            )
+
+   async def upsert(self, db: AsyncSession, resume: Resume, skills=None) -> None:
+      await db.execute(text("DELETE FROM resume_search WHERE rowid = :id"), {"id": resume.id})
+      await db.execute(
+         text(
+            "INSERT INTO resume_search"
+            "(rowid, owner, title, target_role, skills, resume_text) "
+            "VALUES (:id, :owner, :title, :target_role, :skills, :resume_text)"
+         ),
+         {
+            "id": resume.id,
+            "owner": f"u{resume.user_id}",
+            "title": resume.title,
+            "target_role": resume.target_role or "",
+            "skills": _skills_text(skills),
+            "resume_text": resume.resume_text,
+         },
+      )
+
+   async def add_many(self, db: AsyncSession, rows: List[dict]) -> None:
+      # New resumes only (bulk import): one executemany, nothing to replace
+      await db.execute(
+         text(
+            "INSERT INTO resume_search"
+            "(rowid, owner, title, target_role, skills, resume_text) "
+            "VALUES (:id, :owner, :title, :target_role, '', :resume_text)"
+         ),
+         [
+            {
+               "id": row["id"],
+               "owner": f"u{row['user_id']}",
+               "title": row["title"],
+               "target_role": row.get("target_role") or "",
+               "resume_text": row["resume_text"],
+            }
+            for row in rows
+         ],
+      )
+
+   async def delete(self, db: AsyncSession, resume_id: int) -> None:
+      await db.execute(text("DELETE FROM resume_search WHERE rowid = :id"), {"id": resume_id})
+
+   @staticmethod
+   def _match_expression(query: str, user_id: int) -> Optional[str]:
+      # Quote every term so user input can never inject FTS5 syntax
+      terms = [t for t in _FTS_TERM.findall(query.lower()) if t not in STOP_WORDS]
+      if not terms:
+         return None
+      quoted = " ".join('"' + t.replace('"', '""') + '"' for t in terms)
+      return f'owner:"u{user_id}" AND ({quoted})'
+
+   async def search(
+      self, db: AsyncSession, user_id: int, query: str, limit: int, offset: int
+   ) -> Tuple[int, List[Tuple[int, float]]]:
+      match = self._match_expression(query, user_id)
+      if match is None:
+         return 0, []
+      total = (await db.execute(
+         text("SELECT count(*) FROM resume_search WHERE resume_search MATCH :q"),
+         {"q": match},
+      )).scalar()
+      weights = ", ".join(
+         str(w) for w in (0.0, *(FIELD_WEIGHTS[f] for f in ("title", "target_role", "skills", "resume_text")))
+      )
+      rows = (await db.execute(
+         text(
+            f"SELECT rowid, bm25(resume_search, {weights}) AS rank FROM resume_search "
+            "WHERE resume_search MATCH :q ORDER BY rank LIMIT :limit OFFSET :offset"
+         ),
+         {"q": match, "limit": limit, "offset": offset},
+      )).all()
+      # FTS5 bm25() is negative (lower is better); flip it for API consumers
+      return total, [(row[0], -row[1]) for row in rows]
+
+
+class _UserIndex:
+   def __init__(self):
+      self.postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+      self.doc_terms: Dict[int, Counter] = {}
+      self.doc_length: Dict[int, float] = {}
+      self.total_length = 0.0
+
+   def add(self, resume_id: int, terms: Counter) -> None:
+      self.remove(resume_id)
+      for term, tf in terms.items():
+         self.postings[term][resume_id] = tf
+      length = sum(terms.values())
+      self.doc_terms[resume_id] = terms
+      self.doc_length[resume_id] = length
+      self.total_length += length
+
+   def remove(self, resume_id: int) -> None:
+      terms = self.doc_terms.pop(resume_id, None)
+      if terms is None:
+         return
+      for term in terms:
+         docs = self.postings.get(term)
+         if docs is not None:
+            docs.pop(resume_id, None)
+            if not docs:
+               del self.postings[term]
+      self.total_length -= self.doc_length.pop(resume_id)
+
+
+class InMemorySearchIndex:
+   # Per-user BM25F-style inverted index for databases without FTS5. It lives
+   # in process memory and is rebuilt from the database at startup, so with
+   # several workers each keeps its own copy, updated by its own writes.
+
+   k1 = 1.2
+   b = 0.75
+
+   def __init__(self):
+      self._users: Dict[int, _UserIndex] = defaultdict(_UserIndex)
+      self._owner: Dict[int, int] = {}
+      self._lock = threading.Lock()
+
+   @staticmethod
+   def _terms(fields: Dict[str, str]) -> Counter:
+      terms: Counter = Counter()
+      for field, value in fields.items():
+         weight = FIELD_WEIGHTS[field]
+         for token in tokenize(value or ""):
+            if token not in STOP_WORDS:
+               terms[token] += weight
+      return terms
+
+   def _add(self, resume_id, user_id, title, target_role, skills, resume_text) -> None:
+      terms = self._terms(
+         {
+            "title": title,
+            "target_role": target_role,
+            "skills": _skills_text(skills),
+            "resume_text": resume_text,
+         }
+      )
+      with self._lock:
+         previous = self._owner.get(resume_id)
+         if previous is not None and previous != user_id:
+            self._users[previous].remove(resume_id)
+         self._users[user_id].add(resume_id, terms)
+         self._owner[resume_id] = user_id
+
+   def bootstrap(self, bind: Engine) -> None:
+      with Session(bind) as db:
+         latest = dict(
+            db.query(ResumeAnalysis.resume_id, func.max(ResumeAnalysis.id))
+            .group_by(ResumeAnalysis.resume_id)
+            .all()
+         )
+         latest_ids = set(latest.values())
+         skills: Dict[int, List[str]] = defaultdict(list)
+         rows = (
+            db.query(AnalysisSkill.analysis_id, AnalysisSkill.name)
+            .filter(AnalysisSkill.kind == SkillKind.TECHNICAL)
+            .order_by(AnalysisSkill.analysis_id, AnalysisSkill.position)
+            .yield_per(5000)
+         )
+         for analysis_id, name in rows:
+            if analysis_id in latest_ids:
+               skills[analysis_id].append(name)
+
+         resumes = db.query(
+            Resume.id, Resume.user_id, Resume.title, Resume.target_role, Resume.resume_text
+         ).yield_per(1000)
+         for resume_id, user_id, title, target_role, resume_text in resumes:
+            self._add(
+               resume_id,
+               user_id,
+               title,
+               target_role,
+               skills.get(latest.get(resume_id)),
+               resume_text,
+            )
+
+   async def upsert(self, db: AsyncSession, resume: Resume, skills=None) -> None:
+      self._add(
+         resume.id,
+         resume.user_id,
+         resume.title,
+         resume.target_role,
+         skills,
+         resume.resume_text,
+      )
+
+   async def add_many(self, db: AsyncSession, rows: List[dict]) -> None:
+      for row in rows:
+         self._add(
+            row["id"], row["user_id"], row["title"], row.get("target_role"), None, row["resume_text"]
+         )
+
+   async def delete(self, db: AsyncSession, resume_id: int) -> None:
+      with self._lock:
+         user_id = self._owner.pop(resume_id, None)
+         if user_id is not None:
+            self._users[user_id].remove(resume_id)
+
+   async def search(
+      self, db: AsyncSession, user_id: int, query: str, limit: int, offset: int
+   ) -> Tuple[int, List[Tuple[int, float]]]:
+      terms = [t for t in dict.fromkeys(tokenize(query)) if t not in STOP_WORDS]
+      index = self._users.get(user_id)
+      if not terms or index is None or not index.doc_length:
+         return 0, []
+
+      with self._lock:
+         postings = [index.postings.get(term) for term in terms]
+         if not all(postings):
+            return 0, []
+         # AND semantics: walk the shortest posting list, probe the others
+         postings.sort(key=len)
+         n_docs = len(index.doc_length)
+         avg_length = index.total_length / n_docs
+         scores: Dict[int, float] = {}
+         for resume_id in postings[0]:
+            if not all(resume_id in p for p in postings[1:]):
+               continue
+            norm = self.k1 * (1 - self.b + self.b * index.doc_length[resume_id] / avg_length)
+            score = 0.0
+            for docs in postings:
+               idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+               tf = docs[resume_id]
+               score += idf * tf * (self.k1 + 1) / (tf + norm)
+            scores[resume_id] = score
+
+      ranked = heapq.nsmallest(offset + limit, scores.items(), key=lambda item: (-item[1], item[0]))
+      return len(scores), ranked[offset:]
+
+
+def _create_search_index():
+   if engine.dialect.name == "sqlite":
+      return Fts5SearchIndex()
+   return InMemorySearchIndex()
+
+
+search_index = _create_search_index()
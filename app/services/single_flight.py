@@ -0,0 +1,49 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+   # Concurrent calls with the same key share one task: the first caller
+   # starts it, later callers await the same result (or exception). Waiters
+   # go through asyncio.shield, so a cancelled request only stops waiting and
+   # the call keeps running for everyone else. The key is forgotten as soon as
+   # the task finishes, so this never serves stale results.
+
+   def __init__(self):
+      self._calls: Dict[str, asyncio.Task] = {}
+      self.calls = 0
+      self.coalesced = 0
+      self.cancelled_waiters = 0
+
+   def _forget(self, key: str, task: asyncio.Task) -> None:
+      if self._calls.get(key) is task:
+         del self._calls[key]
+      # Mark the exception retrieved when every waiter has gone away
+      if not task.cancelled():
+         task.exception()
+
+   async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+      task = self._calls.get(key)
+      if task is None or task.get_loop() is not asyncio.get_running_loop():
+         self.calls += 1
+         task = asyncio.ensure_future(fn())
+         self._calls[key] = task
+         task.add_done_callback(lambda t: self._forget(key, t))
+      else:
+         self.coalesced += 1
+      try:
+         return await asyncio.shield(task)
+      except asyncio.CancelledError:
+         if not task.done():
+            self.cancelled_waiters += 1
+         raise
+
+   def stats(self) -> Dict[str, Any]:
+      return {
+         "in_flight": len(self._calls),
+         "calls": self.calls,
+         "coalesced": self.coalesced,
+         "cancelled_waiters": self.cancelled_waiters,
+      }
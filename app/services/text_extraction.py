@@ -0,0 +1,313 @@
+import asyncio
+import hashlib
+import io
+import os
+import re
+import tempfile
+import threading
+import unicodedata
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Union
+from xml.etree import ElementTree
+
+from app.core.config import get_settings
+from app.core.metrics import service_stats
+from app.services.single_flight import SingleFlight
+
+settings = get_settings()
+
+TEXT_EXTENSIONS = {".txt", ".text", ".md"}
+DOCUMENT_EXTENSIONS = {".pdf", ".docx"}
+
+_CONTROL = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]")
+_TRAILING_SPACE = re.compile(r"[ \t]+\n")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+# word/document.xml is decompressed in full, so cap it (zip bombs)
+_DOCX_MAX_XML_BYTES = 50_000_000
+
+# Uploads up to this size stay in memory; larger ones are spooled to disk
+_SPOOL_MEMORY_BYTES = 1024 * 1024
+
+
+class ExtractionError(Exception):
+   pass
+
+
+class UnsupportedFileError(ExtractionError):
+   pass
+
+
+class FileTooLargeError(ExtractionError):
+   pass
+
+
+class ExtractionTimeoutError(ExtractionError):
+   pass
+
+
+def _extension(name: str) -> str:
+   return os.path.splitext(name)[1].lower()
+
+
+def decode_bytes(data: bytes) -> str:
+   if data.startswith((b"\xff\xfe", b"\xfe\xff")):
+      return data.decode("utf-16", errors="replace")
+   try:
+      return data.decode("utf-8-sig")
+   except UnicodeDecodeError:
+      # Word/Windows exports are the usual non-UTF-8 input
+      return data.decode("cp1252", errors="replace")
+
+
+def normalize_text(text: str) -> str:
+   text = unicodedata.normalize("NFC", text).replace("\r\n", "\n").replace("\r", "\n")
+   text = _CONTROL.sub("", text)
+   text = _TRAILING_SPACE.sub("\n", text)
+   return _BLANK_LINES.sub("\n\n", text).strip()
+
+
+def title_from_filename(name: str) -> str:
+   # "cvs/jane_doe.pdf" -> "jane doe"; JSONL sources are named "file:line"
+   stem = os.path.splitext(os.path.basename(name.split(":")[0]))[0]
+   return re.sub(r"[_\s]+", " ", stem).strip()[:200] or "Imported resume"
+
+
+def _extract_pdf(fileobj) -> str:
+   from pypdf import PdfReader
+
+   try:
+      reader = PdfReader(fileobj)
+      # Many PDFs are "encrypted" with an empty user password
+      if reader.is_encrypted and not reader.decrypt(""):
+         raise ExtractionError("PDF is password protected.")
+      pages = [
+         page.extract_text() or ""
+         for page in reader.pages[: settings.EXTRACTION_MAX_PAGES]
+      ]
+   except ExtractionError:
+      raise
+   except Exception as e:
+      # Malformed PDFs surface as anything from PdfReadError to KeyError
+      raise ExtractionError(f"Unreadable PDF ({type(e).__name__}).")
+   return "\n\n".join(pages)
+
+
+def _extract_docx(fileobj) -> str:
+   try:
+      with zipfile.ZipFile(fileobj) as archive:
+         info = archive.getinfo("word/document.xml")
+         if info.file_size > _DOCX_MAX_XML_BYTES:
+            raise ExtractionError("Word document is too large.")
+         root = ElementTree.fromstring(archive.read(info))
+   except (zipfile.BadZipFile, KeyError, ElementTree.ParseError):
+      raise ExtractionError("Unreadable Word document.")
+
+   # Table cells hold their own paragraphs, so tables come out one cell per line
+   paragraphs = []
+   for paragraph in root.iter(f"{_W}p"):
+      parts = []
+      for node in paragraph.iter():
+         if node.tag == f"{_W}t":
+            parts.append(node.text or "")
+         elif node.tag == f"{_W}tab":
+            parts.append("\t")
+         elif node.tag in (f"{_W}br", f"{_W}cr"):
+            parts.append("\n")
+      paragraphs.append("".join(parts))
+   return "\n".join(paragraphs)
+
+
+def extract_text(name: str, source: Union[bytes, str]) -> str:
+   # Runs in a worker process. `source` is the file content or the path of
+   # a spooled copy. Returns normalized text or raises ExtractionError.
+   extension = _extension(name)
+   if isinstance(source, bytes):
+      fileobj = io.BytesIO(source)
+   else:
+      fileobj = open(source, "rb")
+   with fileobj:
+      head = fileobj.read(8)
+      fileobj.seek(0)
+      # Trust the content over the extension for PDFs
+      if head.startswith(b"%PDF-"):
+         text = _extract_pdf(fileobj)
+      elif extension == ".docx":
+         text = _extract_docx(fileobj)
+      elif extension in TEXT_EXTENSIONS:
+         text = decode_bytes(fileobj.read())
+      else:
+         raise UnsupportedFileError("Upload a PDF, DOCX or plain-text resume.")
+
+   text = normalize_text(text)
+   if not text:
+      # Scanned PDFs have no text layer; OCR is out of scope here
+      raise ExtractionError("No text could be extracted from the file.")
+   return text
+
+
+@dataclass
+class SpooledUpload:
+   name: str
+   sha256: str
+   size: int
+   source: Union[bytes, str]
+
+   def cleanup(self) -> None:
+      if isinstance(self.source, str):
+         try:
+            os.unlink(self.source)
+         except OSError:
+            pass
+
+
+async def spool_upload(upload, max_bytes: int) -> SpooledUpload:
+   # Reads the upload in chunks, hashing as it goes. Small files stay in
+   # memory; larger ones go to a named temp file that the worker reads from,
+   # so they are never held in memory whole.
+   name = upload.filename or "upload"
+   digest = hashlib.sha256()
+   buffer = bytearray()
+   spool = None
+   size = 0
+   try:
+      while chunk := await upload.read(256 * 1024):
+         size += len(chunk)
+         if size > max_bytes:
+            raise FileTooLargeError(f"File exceeds {max_bytes} bytes.")
+         digest.update(chunk)
+         if spool is None and len(buffer) + len(chunk) <= _SPOOL_MEMORY_BYTES:
+            buffer += chunk
+            continue
+         if spool is None:
+            spool = tempfile.NamedTemporaryFile(suffix=_extension(name), delete=False)
+            await asyncio.to_thread(spool.write, bytes(buffer))
+            buffer.clear()
+         await asyncio.to_thread(spool.write, chunk)
+   except BaseException:
+      if spool is not None:
+         spool.close()
+         os.unlink(spool.name)
+      raise
+
+   if spool is None:
+      return SpooledUpload(name, digest.hexdigest(), size, bytes(buffer))
+   spool.close()
+   return SpooledUpload(name, digest.hexdigest(), size, spool.name)
+
+
+class TextExtractor:
+   # Extraction runs on a process pool so PDF parsing neither blocks the
+   # event loop nor holds the GIL. A file that exceeds the timeout gets its
+   # pool torn down (hung parser processes can't be cancelled any other way);
+   # other extractions that were on that pool are retried once on the new
+   # one. Results are cached by content hash and concurrent uploads of the
+   # same file share one extraction.
+
+   def __init__(self, workers: int, timeout: float, cache_entries: int):
+      self.workers = workers
+      self.timeout = timeout
+      self.cache_entries = cache_entries
+      self._executor: Optional[Executor] = None
+      self._cache: OrderedDict[str, str] = OrderedDict()
+      self._lock = threading.Lock()
+      self._flights = SingleFlight()
+      self.extracted = 0
+      self.cache_hits = 0
+      self.failures = 0
+      self.timeouts = 0
+
+   def _get_executor(self) -> Executor:
+      if self._executor is None:
+         self._executor = ProcessPoolExecutor(max_workers=self.workers)
+      return self._executor
+
+   def _kill_executor(self, executor: Executor) -> None:
+      if self._executor is executor:
+         self._executor = None
+      processes = getattr(executor, "_processes", None) or {}
+      for process in list(processes.values()):
+         process.terminate()
+      executor.shutdown(wait=False, cancel_futures=True)
+
+   def shutdown(self) -> None:
+      if self._executor is not None:
+         self._executor.shutdown(wait=True, cancel_futures=True)
+         self._executor = None
+
+   def _cache_get(self, key: str) -> Optional[str]:
+      with self._lock:
+         text = self._cache.get(key)
+         if text is not None:
+            self._cache.move_to_end(key)
+         return text
+
+   def _cache_put(self, key: str, text: str) -> None:
+      with self._lock:
+         self._cache[key] = text
+         self._cache.move_to_end(key)
+         while len(self._cache) > self.cache_entries:
+            self._cache.popitem(last=False)
+
+   async def _run(self, upload: SpooledUpload) -> str:
+      loop = asyncio.get_running_loop()
+      for attempt in range(2):
+         executor = self._get_executor()
+         future = loop.run_in_executor(executor, extract_text, upload.name, upload.source)
+         try:
+            return await asyncio.wait_for(future, self.timeout)
+         except asyncio.TimeoutError:
+            self.timeouts += 1
+            self._kill_executor(executor)
+            raise ExtractionTimeoutError(f"Text extraction took longer than {self.timeout:g}s.")
+         except BrokenProcessPool:
+            # Another upload's timeout (or a crashed worker) took the pool down
+            self._kill_executor(executor)
+            if attempt:
+               raise ExtractionError("Text extraction failed.")
+
+   async def extract(self, upload: SpooledUpload) -> str:
+      # The extension is part of the key: the same bytes named .txt and .docx
+      # extract differently
+      key = f"{upload.sha256}:{_extension(upload.name)}"
+      text = self._cache_get(key)
+      if text is not None:
+         self.cache_hits += 1
+         return text
+
+      async def call() -> str:
+         try:
+            text = await self._run(upload)
+         except ExtractionError:
+            self.failures += 1
+            raise
+         self.extracted += 1
+         self._cache_put(key, text)
+         return text
+
+      return await self._flights.do(key, call)
+
+   def stats(self) -> Dict[str, Any]:
+      return {
+         "workers": self.workers,
+         "timeout_s": self.timeout,
+         "cached": len(self._cache),
+         "extracted": self.extracted,
+         "cache_hits": self.cache_hits,
+         "coalesced": self._flights.coalesced,
+         "failures": self.failures,
+         "timeouts": self.timeouts,
+      }
+
+
+text_extractor = TextExtractor(
+   workers=settings.EXTRACTION_WORKERS,
+   timeout=settings.EXTRACTION_TIMEOUT_SECONDS,
+   cache_entries=settings.EXTRACTION_CACHE_MAX_ENTRIES,
+)
+service_stats.register("text_extraction", text_extractor.stats)
@@ -0,0 +1,78 @@
+"""Compare a fresh httpx client per call against the shared pooled client.
+
+Usage:
+   python -m benchmarks.bench_ai_client --requests 500 --concurrency 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+from benchmarks.fake_azure import FakeAzureServer
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+   ordered = sorted(samples)
+   index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+   return ordered[index]
+
+
+async def _run(label: str, call, total: int, concurrency: int) -> dict:
+   latencies: list[float] = []
+   sem = asyncio.Semaphore(concurrency)
+
+   async def one():
+      async with sem:
+         start = time.perf_counter()
+         await call()
+         latencies.append((time.perf_counter() - start) * 1000)
+
+   started = time.perf_counter()
+   await asyncio.gather(*(one() for _ in range(total)))
+   elapsed = time.perf_counter() - started
+   return {
+      "mode": label,
+      "requests": total,
+      "throughput_rps": round(total / elapsed, 1),
+      "p50_ms": round(statistics.median(latencies), 2),
+      "p99_ms": round(_percentile(latencies, 99), 2),
+   }
+
+
+async def main(total: int, concurrency: int) -> list[dict]:
+   import httpx
+   from app.services import ai_client, llm_backends
+
+   url = llm_backends.llm_router.backends[0].url
+   payload = {"messages": [{"role": "user", "content": "ping"}]}
+
+   async def per_call_client():
+      # Previous behaviour: new client (and connection) for every analysis
+      async with httpx.AsyncClient(timeout=30.0) as client:
+         await client.post(url, json=payload)
+
+   async def pooled_client():
+      await ai_client.analyze_resume("Python developer", "Backend engineer")
+
+   results = [
+      await _run("per_call_client", per_call_client, total, concurrency),
+      await _run("pooled_client", pooled_client, total, concurrency),
+   ]
+   await llm_backends.close_http_client()
+   return results
+
+
+if __name__ == "__main__":
+   parser = argparse.ArgumentParser()
+   parser.add_argument("--requests", type=int, default=500)
+   parser.add_argument("--concurrency", type=int, default=20)
+   parser.add_argument("--latency", type=float, default=0.0)
+   args = parser.parse_args()
+
+   with FakeAzureServer(latency=args.latency) as server:
+      os.environ["AZURE_OPENAI_ENDPOINT"] = server.url
+      os.environ["AZURE_OPENAI_API_KEY"] = "bench"
+      os.environ["AZURE_OPENAI_DEPLOYMENT"] = "bench"
+      print(json.dumps(asyncio.run(main(args.requests, args.concurrency)), indent=2))
@@ -0,0 +1,195 @@
+"""/analytics/* latency from rollups vs aggregating the analysis tables.
+
+Seeds a throwaway SQLite database with one user holding --analyses
+analyses (scores, skills and gaps drawn from small vocabularies, spread
+over the last 180 days), builds the rollups with a compaction pass, then
+times each /analytics endpoint against the naive alternative: pulling every
+analysis, skill and gap row for the user and aggregating in Python.
+
+Usage:
+   python -m benchmarks.bench_analytics --analyses 100000 --repeat 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+ROLES = ["Backend Engineer", "Data Scientist", "Frontend Engineer", "SRE", ""]
+SKILLS = (
+   "Python SQL Docker Kubernetes AWS Terraform React TypeScript Go Rust Java Spark "
+   "Airflow PyTorch Pandas Redis Kafka GraphQL Linux Bash"
+).split()
+SOFT = ["Communication", "Leadership", "Mentoring", "Ownership", "Teamwork"]
+GAPS = [f"Limited {skill} experience" for skill in SKILLS] + [
+   "No production on-call experience",
+   "No quantified impact in bullet points",
+   "Missing certifications",
+]
+
+
+def _seed(engine, user_id: int, analyses: int, rng: random.Random) -> None:
+   from sqlalchemy import insert
+
+   from app.models.analysis import AnalysisPoint, AnalysisSkill, PointKind, ResumeAnalysis, SkillKind
+   from app.models.resume import Resume
+
+   now = datetime.now(timezone.utc)
+   resumes = [
+      {"id": i + 1, "user_id": user_id, "title": f"Resume {i}", "resume_text": "x", "target_role": role}
+      for i, role in enumerate(ROLES)
+   ]
+   with engine.begin() as conn:
+      conn.execute(insert(Resume), resumes)
+      for start in range(0, analyses, 10000):
+         rows, skills, points = [], [], []
+         for analysis_id in range(start + 1, min(start + 10000, analyses) + 1):
+            resume_id = rng.randint(1, len(ROLES))
+            rows.append(
+               {
+                  "id": analysis_id,
+                  "resume_id": resume_id,
+                  "overall_score": min(100, max(0, int(rng.gauss(62, 15)))),
+                  "created_at": now - timedelta(days=rng.randint(0, 179), minutes=rng.randint(0, 1439)),
+               }
+            )
+            for kind, names, k in ((SkillKind.TECHNICAL, SKILLS, 6), (SkillKind.SOFT, SOFT, 2)):
+               for position, name in enumerate(rng.sample(names, k)):
+                  skills.append(
+                     {
+                        "analysis_id": analysis_id,
+                        "resume_id": resume_id,
+                        "kind": kind,
+                        "position": position,
+                        "name": name,
+                        "name_normalized": name.casefold(),
+                     }
+                  )
+            for position, text in enumerate(rng.sample(GAPS, 3)):
+               points.append(
+                  {"analysis_id": analysis_id, "kind": PointKind.GAP, "position": position, "text": text}
+               )
+         conn.execute(insert(ResumeAnalysis), rows)
+         conn.execute(insert(AnalysisSkill), skills)
+         conn.execute(insert(AnalysisPoint), points)
+
+
+def _naive(session, user_id: int) -> None:
+   # What a dashboard query costs without rollups
+   from collections import Counter
+
+   from app.models.analysis import AnalysisPoint, AnalysisSkill, PointKind, ResumeAnalysis
+   from app.models.resume import Resume
+
+   buckets = Counter()
+   for role, score in (
+      session.query(Resume.target_role, ResumeAnalysis.overall_score)
+      .join(ResumeAnalysis, ResumeAnalysis.resume_id == Resume.id)
+      .filter(Resume.user_id == user_id)
+   ):
+      buckets[(role, min(score // 10, 9))] += 1
+   gaps = Counter(
+      text.casefold()
+      for (text,) in session.query(AnalysisPoint.text)
+      .join(ResumeAnalysis, ResumeAnalysis.id == AnalysisPoint.analysis_id)
+      .join(Resume, Resume.id == ResumeAnalysis.resume_id)
+      .filter(Resume.user_id == user_id, AnalysisPoint.kind == PointKind.GAP)
+   )
+   gaps.most_common(20)
+   trend = Counter(
+      (name, created_at.isocalendar()[:2])
+      for name, created_at in session.query(AnalysisSkill.name_normalized, ResumeAnalysis.created_at)
+      .join(ResumeAnalysis, ResumeAnalysis.id == AnalysisSkill.analysis_id)
+      .join(Resume, Resume.id == AnalysisSkill.resume_id)
+      .filter(Resume.user_id == user_id)
+   )
+   len(trend)
+
+
+def _timed(fn, repeat: int) -> dict:
+   samples = []
+   for _ in range(repeat):
+      started = time.perf_counter()
+      fn()
+      samples.append((time.perf_counter() - started) * 1000)
+   samples.sort()
+   return {
+      "p50_ms": round(statistics.median(samples), 2),
+      "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 2),
+   }
+
+
+def main(args) -> dict:
+   workdir = tempfile.mkdtemp()
+   os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+   from benchmarks import mongo_standin
+
+   mongo_standin.install()
+
+   from fastapi.testclient import TestClient
+
+   from app.core.database import SessionLocal, async_engine, engine
+   from app.core.security import create_access_token
+   from app.main import app
+   from app.models.user import User
+   from app.services.analytics import analytics_rollups
+
+   db = SessionLocal()
+   user = User(email="bench@example.com", hashed_password="x")
+   db.add(user)
+   db.commit()
+   user_id, token = user.id, create_access_token({"sub": user.email})
+   db.close()
+
+   started = time.perf_counter()
+   _seed(engine, user_id, args.analyses, random.Random(args.seed))
+   seed_s = time.perf_counter() - started
+
+   async def compact():
+      started = time.perf_counter()
+      await analytics_rollups.compact()
+      elapsed = time.perf_counter() - started
+      # The TestClient runs its own event loop
+      await async_engine.dispose()
+      return elapsed
+
+   compact_s = asyncio.run(compact())
+
+   client = TestClient(app)
+   headers = {"Authorization": f"Bearer {token}"}
+
+   def get(path):
+      def call():
+         response = client.get(path, headers=headers)
+         assert response.status_code == 200, response.text
+
+      return call
+
+   session = SessionLocal()
+   try:
+      naive = _timed(lambda: _naive(session, user_id), max(1, args.repeat // 10))
+   finally:
+      session.close()
+
+   return {
+      "analyses": args.analyses,
+      "seed_s": round(seed_s, 1),
+      "compaction_s": round(compact_s, 1),
+      "naive_all_dashboards": naive,
+      "scores": _timed(get("/analytics/scores"), args.repeat),
+      "gaps": _timed(get("/analytics/gaps?limit=20"), args.repeat),
+      "skills_trend_week": _timed(get("/analytics/skills/trend?interval=week&days=180"), args.repeat),
+      "skills_trend_day": _timed(get("/analytics/skills/trend?interval=day&days=180"), args.repeat),
+   }
+
+
+if __name__ == "__main__":
+   parser = argparse.ArgumentParser()
+   parser.add_argument("--analyses", type=int, default=100000)
+   parser.add_argument("--repeat", type=int, default=20)
+   parser.add_argument("--seed", type=int, default=1)
+   print(json.dumps(main(parser.parse_args()), indent=2))
@@ -0,0 +1,88 @@
+"""Throughput of the get_current_user dependency with and without the auth cache.
+
+Seeds a throwaway SQLite database with one user, then resolves the same bearer
+token from many concurrent coroutines, each with its own AsyncSession as a
+request would have, and reports calls/s and SQL statements per call.
+
+Usage:
+   python -m benchmarks.bench_auth --calls 5000 --concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+
+async def main(calls: int, concurrency: int) -> list[dict]:
+   workdir = tempfile.mkdtemp()
+   os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+
+   from fastapi.security import HTTPAuthorizationCredentials
+   from sqlalchemy import event
+
+   from app.core.auth_cache import auth_cache
+   from app.core.config import get_settings
+   from app.core.database import AsyncSessionLocal, Base, async_engine
+   from app.core.security import create_access_token, get_current_user
+   from app.models.user import User
+
+   settings = get_settings()
+   async with async_engine.begin() as conn:
+      await conn.run_sync(Base.metadata.create_all)
+   async with AsyncSessionLocal() as db:
+      user = User(email="bench@example.com", hashed_password="x")
+      db.add(user)
+      await db.commit()
+      user_id = user.id
+
+   credentials = HTTPAuthorizationCredentials(
+      scheme="Bearer",
+      credentials=create_access_token({"sub": "bench@example.com", "uid": user_id}),
+   )
+
+   queries = 0
+
+   def count(*args):
+      nonlocal queries
+      queries += 1
+
+   event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+
+   async def measure(label: str, enabled: bool) -> dict:
+      nonlocal queries
+      settings.AUTH_CACHE_ENABLED = enabled
+      auth_cache.clear()
+      remaining = calls
+
+      async def worker():
+         nonlocal remaining
+         while remaining > 0:
+            remaining -= 1
+            async with AsyncSessionLocal() as db:
+               await get_current_user(credentials, db)
+
+      queries = 0
+      started = time.perf_counter()
+      await asyncio.gather(*(worker() for _ in range(concurrency)))
+      elapsed = time.perf_counter() - started
+      return {
+         "mode": label,
+         "calls": calls,
+         "concurrency": concurrency,
+         "calls_per_s": round(calls / elapsed),
+         "queries_per_call": round(queries / calls, 3),
+      }
+
+   results = [await measure("no_cache", False), await measure("cache", True)]
+   await async_engine.dispose()
+   return results
+
+
+if __name__ == "__main__":
+   parser = argparse.ArgumentParser()
+   parser.add_argument("--calls", type=int, default=5000)
+   parser.add_argument("--concurrency", type=int, default=64)
+   args = parser.parse_args()
+   print(json.dumps(asyncio.run(main(args.calls, args.concurrency)), indent=2))
@@ -0,0 +1,133 @@
+"""Bulk import throughput and memory against one-at-a-time inserts.
+
+Generates --docs synthetic resumes as JSONL records and imports them into a
+throwaway SQLite database twice: once the way POST /resumes/ does it (one
+ORM add and commit per resume, one Mongo insert each) and once through
+BulkImporter. Peak RSS growth is reported for the bulk run at --docs and at
+--docs * 4 to show memory stays flat as the input grows.
+
+Requires ``pip install mongomock`` (see benchmarks.mongo_standin).
+
+Usage:
+   python -m benchmarks.bench_bulk_import --docs 2000 --workers 2 --batch-size 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import tempfile
+import time
+
+
+def _configure(args) -> None:
+   workdir = tempfile.mkdtemp()
+   os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+   os.environ["MONGO_WRITER_SPILL_PATH"] = os.path.join(workdir, "mongo-spill.jsonl")
+   os.environ["BULK_IMPORT_WORKERS"] = str(args.workers)
+   os.environ["BULK_IMPORT_BATCH_SIZE"] = str(args.batch_size)
+   from benchmarks import mongo_standin
+
+   mongo_standin.install()
+
+
+def _records(n: int):
+   for i in range(n):
+      yield f"doc-{i}", {
+         "title": f"Engineer {i}",
+         "resume_text": f"Candidate {i}\n" + "Built Python services and SQL pipelines.\n" * 40,
+         "target_role": "Backend Engineer",
+      }
+
+
+def _rss_mb() -> float:
+   return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def _setup():
+   from app.core.database import AsyncSessionLocal, Base, engine
+   from app.models.user import User
+   from app.services.search_index import search_index
+
+   Base.metadata.create_all(bind=engine)
+   search_index.bootstrap(engine)
+   async with AsyncSessionLocal() as db:
+      user = User(email="bulk@example.com", full_name="Bulk", hashed_password="x")
+      db.add(user)
+      await db.commit()
+      return user.id
+
+
+async def _one_at_a_time(user_id: int, n: int) -> float:
+   from app.core.database import AsyncSessionLocal
+   from app.models.resume import Resume
+   from app.services.mongo_writer import mongo_writer
+   from app.services.search_index import search_index
+
+   started = time.perf_counter()
+   async with AsyncSessionLocal() as db:
+      for _, record in _records(n):
+         resume = Resume(user_id=user_id, **record)
+         db.add(resume)
+         await db.flush()
+         await search_index.upsert(db, resume)
+         await db.commit()
+         await mongo_writer.insert(
+            "resume_texts",
+            {"resume_id": resume.id, "user_id": user_id, "resume_text": resume.resume_text},
+         )
+   return time.perf_counter() - started
+
+
+async def _bulk(user_id: int, n: int) -> dict:
+   from app.services.bulk_import import bulk_importer
+
+   async def items():
+      for item in _records(n):
+         yield item
+
+   rss_before = _rss_mb()
+   started = time.perf_counter()
+   done = {}
+   async for event in bulk_importer.run(items(), user_id):
+      if event["type"] == "done":
+         done = event
+   return {
+      "seconds": time.perf_counter() - started,
+      "imported": done.get("imported"),
+      "peak_rss_growth_mb": round(_rss_mb() - rss_before, 1),
+   }
+
+
+async def main(args) -> dict:
+   from app.services.bulk_import import bulk_importer
+   from app.services.mongo_writer import mongo_writer
+
+   user_id = await _setup()
+   await mongo_writer.start()
+   try:
+      single = await _one_at_a_time(user_id, args.docs)
+      bulk = await _bulk(user_id, args.docs)
+      bulk_large = await _bulk(user_id, args.docs * 4)
+   finally:
+      await mongo_writer.stop()
+      bulk_importer.shutdown()
+   return {
+      "docs": args.docs,
+      "one_at_a_time_docs_per_s": round(args.docs / single, 1),
+      "bulk_docs_per_s": round(args.docs / bulk["seconds"], 1),
+      "speedup": round(single / bulk["seconds"], 1),
+      "bulk_peak_rss_growth_mb": bulk["peak_rss_growth_mb"],
+      f"bulk_{args.docs * 4}_docs_per_s": round(args.docs * 4 / bulk_large["seconds"], 1),
+      f"bulk_{args.docs * 4}_peak_rss_growth_mb": bulk_large["peak_rss_growth_mb"],
+   }
+
+
+if __name__ == "__main__":
+   parser = argparse.ArgumentParser()
+   parser.add_argument("--docs", type=int, default=2000)
+   parser.add_argument("--workers", type=int, default=2)
+   parser.add_argument("--batch-size", type=int, default=500)
+   args = parser.parse_args()
+   _configure(args)
+   print(json.dumps(asyncio.run(main(args)), indent=2))
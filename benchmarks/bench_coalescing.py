@@ -0,0 +1,88 @@
+"""Duplicate concurrent analyses with and without request coalescing.
+
+Fires bursts of identical get_analysis_result calls (a double-clicked
+"Analyze" or a batch with duplicate rows) at the fake Azure endpoint with an
+empty cache and counts how many LLM requests reach the server. Also cancels
+one waiter mid-flight to check the others still get their result.
+
+Usage:
+   python -m benchmarks.bench_coalescing --duplicates 20 --distinct 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from benchmarks.fake_azure import FakeAzureServer
+
+
+async def _burst(duplicates: int, distinct: int) -> dict:
+   from app.services import analysis_service, llm_backends
+
+   analysis_service.analysis_cache.clear()
+   texts = [f"Python developer #{i} with FastAPI experience." for i in range(distinct)]
+   started = time.perf_counter()
+   await asyncio.gather(
+      *(
+         analysis_service.get_analysis_result(text, None, None)
+         for text in texts
+         for _ in range(duplicates)
+      )
+   )
+   elapsed = time.perf_counter() - started
+
+   # Cancelling one waiter must leave the shared call running for the rest
+   analysis_service.analysis_cache.clear()
+   waiters = [
+      asyncio.create_task(analysis_service.get_analysis_result("cancel check", None, None))
+      for _ in range(3)
+   ]
+   await asyncio.sleep(0.05)
+   waiters[0].cancel()
+   outcomes = await asyncio.gather(*waiters, return_exceptions=True)
+   survivors = sum(isinstance(o, tuple) for o in outcomes)
+
+   await llm_backends.close_http_client()
+   return {"elapsed_s": round(elapsed, 2), "survivors_after_cancel": f"{survivors}/2"}
+
+
+def _run(label: str, enabled: bool, duplicates: int, distinct: int) -> dict:
+   from app.core.config import get_settings
+   from app.services import analysis_service, llm_backends
+
+   settings = get_settings()
+   settings.ANALYSIS_COALESCE_ENABLED = enabled
+   # Hedged copies would be counted as LLM requests
+   settings.LLM_HEDGE_ENABLED = False
+   analysis_service.analysis_flights = analysis_service.SingleFlight()
+   with FakeAzureServer(latency=0.5) as server:
+      settings.AZURE_OPENAI_ENDPOINT = server.url
+      llm_backends.llm_router = llm_backends.create_router()
+      result = asyncio.run(_burst(duplicates, distinct))
+      return {
+         "mode": label,
+         "analyses": duplicates * distinct,
+         "llm_requests": server.stats["requests"],
+         **result,
+         **analysis_service.analysis_flights.stats(),
+      }
+
+
+def main(duplicates: int, distinct: int) -> list[dict]:
+   os.environ["AZURE_OPENAI_API_KEY"] = "bench"
+   os.environ["AZURE_OPENAI_DEPLOYMENT"] = "bench"
+   os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "http://127.0.0.1:9")
+   os.environ["ANALYSIS_CACHE_PERSISTENT"] = "false"
+   return [
+      _run("uncoalesced", False, duplicates, distinct),
+      _run("coalesced", True, duplicates, distinct),
+   ]
+
+
+if __name__ == "__main__":
+   parser = argparse.ArgumentParser()
+   parser.add_argument("--duplicates", type=int, default=20)
+   parser.add_argument("--distinct", type=int, default=5)
+   args = parser.parse_args()
+   print(json.dumps(main(args.duplicates, args.distinct), indent=2))
@@ -0,0 +1,112 @@
+"""Query count and payload size of GET /resumes/ before and after pagination.
+
+Seeds a throwaway SQLite database with one heavy user and compares the old
+listing (every resume, full text, lazily loaded analyses) against keyset
+pages with and without field projection.
+
+Usage:
+   python -m benchmarks.bench_list_resumes --resumes 500
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+
+def main(n_resumes: int, page_size: int) -> list[dict]:
+   workdir = tempfile.mkdtemp()
+   os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+
+   from fastapi.testclient import TestClient
+   from sqlalchemy import event
+
+   from app.core.database import SessionLocal, async_engine, engine
+   from app.core.security import create_access_token
+   from app.main import app
+   from app.models.resume import Resume
+   from app.models.user import User
+   from app.schemas.resume import ResumeRead
+   from app.services.analysis_service import build_analysis
+   from benchmarks.fake_azure import FAKE_ANALYSIS
+
+   db = SessionLocal()
+   user = User(email="bench@example.com", hashed_password="x")
+   db.add(user)
+   db.flush()
+   resume_text = "Experienced backend engineer. " * 100
+   job_description = "We need a Python engineer. " * 40
+   for i in range(n_resumes):
+      resume = Resume(
+         user_id=user.id,
+         title=f"Resume {i}",
+         resume_text=resume_text,
+         target_role="Backend Engineer",
+         job_description=job_description,
+      )
+      db.add(resume)
+      db.flush()
+      db.add_all([build_analysis(resume.id, FAKE_ANALYSIS) for _ in range(2)])
+   db.commit()
+   token = create_access_token({"sub": user.email})
+   user_id = user.id
+   db.close()
+
+   queries = 0
+
+   def count(*args):
+      nonlocal queries
+      queries += 1
+
+   event.listen(engine, "before_cursor_execute", count)
+   event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+
+   def measure(label, fn):
+      nonlocal queries
+      queries = 0
+      started = time.perf_counter()
+      body = fn()
+      return {
+         "mode": label,
+         "queries": queries,
+         "response_bytes": len(body),
+         "ms": round((time.perf_counter() - started) * 1000, 1),
+      }
+
+   def old_listing():
+      # Previous implementation: unbounded list serialized through ResumeRead
+      session = SessionLocal()
+      try:
+         session.query(User).filter(User.email == "bench@example.com").first()
+         resumes = (
+            session.query(Resume)
+            .filter(Resume.user_id == user_id)
+            .order_by(Resume.created_at.desc())
+            .all()
+         )
+         return json.dumps(
+            [ResumeRead.model_validate(r).model_dump(mode="json") for r in resumes]
+         ).encode()
+      finally:
+         session.close()
+
+   client = TestClient(app)
+   headers = {"Authorization": f"Bearer {token}"}
+
+   def page(query):
+      return lambda: client.get(f"/resumes/?limit={page_size}{query}", headers=headers).content
+
+   return [
+      measure("before_full_list", old_listing),
+      measure("page_all_fields", page("")),
+      measure("page_without_analyses", page("&fields=id,title,target_role,created_at,updated_at")),
+      measure("page_id_title", page("&fields=id,title")),
+   ]
+
+
+if __name__ == "__main__":
+   parser = argparse.ArgumentParser()
+   parser.add_argument("--resumes", type=int, default=500)
+   parser.add_argument("--page-size", type=int, default=50)
+   args = parser.parse_args()
+   print(json.dumps(main(args.resumes, args.page_size), indent=2))
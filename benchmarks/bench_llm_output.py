@@ -0,0 +1,114 @@
+"""Model reply parsing throughput, and the cost of truncated replies.
+
+Part 1 times parse_analysis (extraction, repair when needed, validation)
+on a typical analysis reply in each shape a model produces, next to the
+previous fence regex + json.loads (which only handled fenced replies).
+
+Part 2 runs --calls analyze_resume calls against the fake endpoint with
+--truncate-rate of replies cut off and reports how many model requests
+were needed: targeted follow-ups ask only for the fields lost with the
+cut, where a full retry would regenerate the whole analysis.
+
+Usage:
+   python -m benchmarks.bench_llm_output --repeat 20000 --calls 200 --truncate-rate 0.3
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+
+from benchmarks.fake_azure import FAKE_ANALYSIS, FakeAzureServer
+
+_OLD_FENCE = re.compile(r"```(?:json)?\s*([\s\S]*?)\s*```")
+
+
+def _old_parse(text: str) -> dict:
+   match = _OLD_FENCE.search(text)
+   return json.loads(match.group(1).strip())
+
+
+def _replies() -> dict:
+   raw = json.dumps(FAKE_ANALYSIS)
+   fenced = f"```json\n{raw}\n```"
+   trailing = raw.replace("]", ",]").replace("[,]", "[]")
+   return {
+      "fenced": fenced,
+      "unfenced": raw,
+      "prose_and_fence": f"Here is the analysis:\n\n{fenced}\n\nHope this helps!",
+      "pretty_printed": f"```json\n{json.dumps(FAKE_ANALYSIS, indent=2)}\n```",
+      "trailing_commas": f"```json\n{trailing}\n```",
+      "truncated": fenced[: len(fenced) * 2 // 3],
+   }
+
+
+def _time(fn, text: str, repeat: int) -> dict:
+   fn(text)
+   started = time.perf_counter()
+   for _ in range(repeat):
+      fn(text)
+   elapsed = time.perf_counter() - started
+   return {"us_per_parse": round(elapsed / repeat * 1e6, 2), "parses_per_s": round(repeat / elapsed)}
+
+
+def _throughput(repeat: int) -> dict:
+   from app.services.llm_output import parse_analysis
+
+   results = {"old_regex_fenced": _time(_old_parse, _replies()["fenced"], repeat)}
+   for shape, text in _replies().items():
+      parsed = parse_analysis(text)
+      results[shape] = {
+         **_time(parse_analysis, text, repeat),
+         "repaired": parsed.repaired,
+         "missing": parsed.missing,
+      }
+   return results
+
+
+async def _calls(calls: int) -> dict:
+   from app.services import ai_client, llm_backends
+
+   complete = 0
+   for i in range(calls):
+      result = await ai_client.analyze_resume(f"Python developer #{i}", None)
+      complete += all(key in result for key in FAKE_ANALYSIS)
+   await llm_backends.close_http_client()
+   return {"complete_results": complete}
+
+
+def _end_to_end(calls: int, truncate_rate: float) -> dict:
+   from app.core.config import get_settings
+   from app.services import llm_backends
+
+   settings = get_settings()
+   with FakeAzureServer(truncate_rate=truncate_rate) as server:
+      settings.AZURE_OPENAI_ENDPOINT = server.url
+      llm_backends.llm_router = llm_backends.create_router()
+      result = asyncio.run(_calls(calls))
+      stats = server.stats
+   return {
+      "calls": calls,
+      **result,
+      "truncated_replies": stats["truncated"],
+      "followup_requests": stats["followups"],
+      "model_requests": stats["requests"],
+   }
+
+
+def main(args) -> dict:
+   os.environ["AZURE_OPENAI_API_KEY"] = "bench"
+   os.environ["AZURE_OPENAI_DEPLOYMENT"] = "bench"
+   os.environ["LLM_HEDGE_ENABLED"] = "false"
+   return {
+      "throughput": _throughput(args.repeat),
+      "end_to_end": _end_to_end(args.calls, args.truncate_rate),
+   }
+
+
+if __name__ == "__main__":
+   parser = argparse.ArgumentParser()
+   parser.add_argument("--repeat", type=int, default=20000)
+   parser.add_argument("--calls", type=int, default=200)
+   parser.add_argument("--truncate-rate", type=float, default=0.3)
+   print(json.dumps(main(parser.parse_args()), indent=2))
@@ -0,0 +1,125 @@
+"""LLM backend routing: tail latency with hedging, failover and local fallback.
+
+Starts two fake endpoints, one serving the Azure route and one the
+OpenAI-compatible route, and runs --calls analyze_resume calls
+(--concurrency at a time) through the router in each scenario:
+
+   single_no_hedge     Azure only, 5% of requests take --slow-latency s
+   single_hedged       same, slow requests hedged to Azure again
+   two_backends_hedged same tail, hedged to the OpenAI-compatible backend
+   azure_outage        every Azure request fails; router fails over
+   all_down_fallback   both fail; LLM_LOCAL_FALLBACK answers (degraded)
+
+Reports p50/p95/p99 latency, errors, degraded answers, hedges and requests
+per backend. Scheduler retries are capped at 1 to keep outages short.
+
+Usage:
+   python -m benchmarks.bench_llm_router --calls 400 --concurrency 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from benchmarks.fake_azure import FakeAzureServer
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+   ordered = sorted(samples)
+   return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def _burst(calls: int, concurrency: int) -> dict:
+   from app.services import ai_client, llm_backends
+
+   latencies: list[float] = []
+   errors: dict[str, int] = {}
+   degraded = 0
+   semaphore = asyncio.Semaphore(concurrency)
+
+   async def one(i: int):
+      nonlocal degraded
+      async with semaphore:
+         started = time.perf_counter()
+         try:
+            result = await ai_client.analyze_resume(f"Python developer #{i} with FastAPI.", None)
+         except ai_client.AIAnalysisError as e:
+            name = type(e).__name__
+            errors[name] = errors.get(name, 0) + 1
+            return
+         latencies.append((time.perf_counter() - started) * 1000)
+         degraded += bool(result.get("degraded"))
+
+   await asyncio.gather(*(one(i) for i in range(calls)))
+   stats = llm_backends.llm_router.stats()
+   await llm_backends.close_http_client()
+   return {
+      "succeeded": len(latencies),
+      "failed": errors,
+      "degraded": degraded,
+      "p50_ms": round(_percentile(latencies, 50)) if latencies else None,
+      "p95_ms": round(_percentile(latencies, 95)) if latencies else None,
+      "p99_ms": round(_percentile(latencies, 99)) if latencies else None,
+      "hedges": stats["hedges"],
+      "hedge_wins": stats["hedge_wins"],
+      "failovers": stats["failovers"],
+      "backend_requests": {
+         name: backend["requests"]
+         for name, backend in {**stats["backends"], **stats["fallbacks"]}.items()
+      },
+   }
+
+
+def _run(label: str, args, backends: str, azure_faults: dict, openai_faults: dict, **overrides) -> dict:
+   from app.core.config import get_settings
+   from app.services import llm_backends
+
+   settings = get_settings()
+   settings.LLM_BACKENDS = backends
+   settings.LLM_HEDGE_ENABLED = overrides.get("hedge", True)
+   settings.LLM_LOCAL_FALLBACK = overrides.get("fallback", False)
+   settings.LLM_HEDGE_MIN_DELAY_SECONDS = args.hedge_min_delay
+   slow = dict(slow_rate=0.05, slow_latency=args.slow_latency)
+   with FakeAzureServer(latency=args.latency, **{**slow, **azure_faults}) as azure, FakeAzureServer(
+      latency=args.latency * 1.5, **openai_faults
+   ) as openai:
+      settings.AZURE_OPENAI_ENDPOINT = azure.url
+      settings.OPENAI_BASE_URL = f"{openai.url}/v1"
+      llm_backends.llm_router = llm_backends.create_router()
+      result = asyncio.run(_burst(args.calls, args.concurrency))
+      return {
+         "scenario": label,
+         **result,
+         "server_requests": {"azure": azure.stats["requests"], "openai": openai.stats["requests"]},
+      }
+
+
+def main(args) -> list[dict]:
+   os.environ["AZURE_OPENAI_API_KEY"] = "bench"
+   os.environ["AZURE_OPENAI_DEPLOYMENT"] = "bench"
+   os.environ["OPENAI_MODEL"] = "bench"
+   os.environ["LLM_MAX_RETRIES"] = "1"
+   os.environ["LLM_BACKOFF_BASE_SECONDS"] = "0.05"
+   os.environ["LLM_REQUESTS_PER_MINUTE"] = "0"
+   os.environ["LLM_TOKENS_PER_MINUTE"] = "0"
+   os.environ["ANALYSIS_CACHE_PERSISTENT"] = "false"
+
+   outage = dict(server_error_rate=1.0)
+   return [
+      _run("single_no_hedge", args, "azure", {}, {}, hedge=False),
+      _run("single_hedged", args, "azure", {}, {}),
+      _run("two_backends_hedged", args, "azure,openai", {}, {}),
+      _run("azure_outage", args, "azure,openai", outage, {}),
+      _run("all_down_fallback", args, "azure,openai", outage, outage, fallback=True),
+   ]
+
+
+if __name__ == "__main__":
+   parser = argparse.ArgumentParser()
+   parser.add_argument("--calls", type=int, default=400)
+   parser.add_argument("--concurrency", type=int, default=20)
+   parser.add_argument("--latency", type=float, default=0.1)
+   parser.add_argument("--slow-latency", type=float, default=2.0)
+   parser.add_argument("--hedge-min-delay", type=float, default=0.2)
+   print(json.dumps(main(parser.parse_args()), indent=2))
@@ -0,0 +1,109 @@
+"""Fault-injection harness for the LLM scheduler.
+
+Runs bursts of concurrent analyze_resume calls against the fake Azure
+endpoint while it enforces a request quota, injects random 429s and adds
+latency, then during a full outage (every request 503s). Compares the old
+behaviour (no pacing, no retries) with the configured scheduler and reports
+successes, failures, 429s/503s served and latency.
+
+Usage:
+   python -m benchmarks.bench_llm_scheduler --calls 100
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+from benchmarks.fake_azure import FakeAzureServer
+
+# Fake deployment quota: 40 requests per 10 s window (240 RPM)
+QUOTA, WINDOW = 40, 10.0
+
+
+async def _burst(calls: int) -> dict:
+   from app.services import ai_client, llm_backends
+
+   latencies: list[float] = []
+   errors: dict[str, int] = {}
+
+   async def one():
+      started = time.perf_counter()
+      try:
+         await ai_client.analyze_resume("Python developer with FastAPI experience.", None)
+      except ai_client.AIAnalysisError as e:
+         name = type(e).__name__
+         errors[name] = errors.get(name, 0) + 1
+      else:
+         latencies.append(time.perf_counter() - started)
+
+   started = time.perf_counter()
+   await asyncio.gather(*(one() for _ in range(calls)))
+   elapsed = time.perf_counter() - started
+   stats = llm_backends.llm_router.backends[0].scheduler.stats()
+   await llm_backends.close_http_client()
+   return {
+      "succeeded": len(latencies),
+      "failed": errors,
+      "elapsed_s": round(elapsed, 2),
+      "p50_ms": round(statistics.median(latencies) * 1000) if latencies else None,
+      "max_ms": round(max(latencies) * 1000) if latencies else None,
+      "client_retries": stats["retries"],
+      "circuit": stats["circuit"],
+   }
+
+
+def _run(label: str, calls: int, scheduler_kwargs: dict, failure_threshold: int, **faults) -> dict:
+   from app.core.config import get_settings
+   from app.services import llm_backends
+
+   settings = get_settings()
+   # One backend, no hedging: this measures the scheduler alone
+   settings.LLM_BACKENDS = "azure"
+   settings.LLM_HEDGE_ENABLED = False
+   with FakeAzureServer(latency=0.2, **faults) as server:
+      settings.AZURE_OPENAI_ENDPOINT = server.url
+      llm_backends.llm_router = llm_backends.create_router()
+      llm_backends.llm_router.backends[0].scheduler = llm_backends.LLMScheduler(
+         breaker=llm_backends.CircuitBreaker(failure_threshold, reset_timeout=30.0),
+         **scheduler_kwargs,
+      )
+      result = asyncio.run(_burst(calls))
+      return {
+         "mode": label,
+         **result,
+         "server_requests": server.stats["requests"],
+         "server_429s": server.stats["throttled"],
+         "server_503s": server.stats["failed"],
+      }
+
+
+def main(calls: int) -> list[dict]:
+   os.environ["AZURE_OPENAI_API_KEY"] = "bench"
+   os.environ["AZURE_OPENAI_DEPLOYMENT"] = "bench"
+   os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "http://127.0.0.1:9")
+
+   naive = dict(
+      max_in_flight=10_000, requests_per_minute=0, tokens_per_minute=0,
+      max_retries=0, backoff_base=0.5, backoff_max=30.0,
+   )
+   scheduled = dict(
+      max_in_flight=16, requests_per_minute=int(QUOTA * 60 / WINDOW), tokens_per_minute=0,
+      max_retries=4, backoff_base=0.5, backoff_max=10.0,
+   )
+   quota = dict(rate_limit=QUOTA, rate_window=WINDOW, error_rate=0.05, retry_after=1.0)
+   outage = dict(server_error_rate=1.0)
+   return [
+      _run("quota_naive", calls, naive, 10**9, **quota),
+      _run("quota_scheduler", calls, scheduled, 5, **quota),
+      _run("outage_naive", calls, naive, 10**9, **outage),
+      _run("outage_scheduler", calls, scheduled, 5, **outage),
+   ]
+
+
+if __name__ == "__main__":
+   parser = argparse.ArgumentParser()
+   parser.add_argument("--calls", type=int, default=100)
+   args = parser.parse_args()
+   print(json.dumps(main(args.calls), indent=2))
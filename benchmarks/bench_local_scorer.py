@@ -0,0 +1,85 @@
+"""Throughput of the local pre-scoring engine on one core, and the effect
+of fitting idf on the corpus.
+
+Builds a corpus of resume variants from Example_dataset/ (sentences shuffled
+and recombined) and scores each against a fixed job description. Reports
+the idf of a few job description terms before and after partial_fit (the
+app fits on the stored resumes at startup): unfitted, every term weighs 1,
+so terms found in every resume count as much as distinguishing ones.
+
+Usage:
+   python -m benchmarks.bench_local_scorer --resumes 5000
+"""
+import argparse
+import json
+import random
+import re
+import time
+from pathlib import Path
+
+from app.services.local_scorer import LocalScorer, _hash
+
+DATASET_DIR = Path(__file__).resolve().parent.parent / "Example_dataset"
+
+JOB_DESCRIPTION = """
+Data Scientist. We are looking for a data scientist with strong Python and SQL,
+experience building data pipelines with Airflow or Spark, machine learning with
+scikit-learn or PyTorch, and dashboards in Tableau or Power BI. Experience with
+AWS, Docker and Kubernetes is a plus. Excellent communication and stakeholder
+management skills required.
+"""
+
+IDF_TERMS = ["data", "python", "sql", "pipelines", "tableau", "airflow", "kubernetes"]
+
+
+def load_corpus(size: int, seed: int = 0) -> list[str]:
+   texts = [p.read_text(encoding="utf-8") for p in sorted(DATASET_DIR.glob("*resume*.txt"))]
+   sentences = [s for t in texts for s in re.split(r"(?<=[.;])\s+|\s{2,}", t) if s.strip()]
+   rng = random.Random(seed)
+   corpus = list(texts)
+   while len(corpus) < size:
+      corpus.append(" ".join(rng.sample(sentences, k=min(len(sentences), 25))))
+   return corpus[:size]
+
+
+def _idf(scorer: LocalScorer) -> dict:
+   idf = scorer.vectorizer.idf
+   return {term: round(float(idf[_hash(term)]), 3) for term in IDF_TERMS}
+
+
+def main(size: int) -> dict:
+   corpus = load_corpus(size)
+   scorer = LocalScorer()
+   unfitted = _idf(scorer)
+   unfitted_scores = [scorer.score(text, JOB_DESCRIPTION)["overall_score"] for text in corpus[:200]]
+
+   started = time.perf_counter()
+   scorer.partial_fit(corpus)
+   fit_seconds = time.perf_counter() - started
+
+   scorer.score(corpus[0], JOB_DESCRIPTION)  # warm the JD cache
+   started = time.perf_counter()
+   results = scorer.score_many(corpus, JOB_DESCRIPTION)
+   elapsed = time.perf_counter() - started
+
+   return {
+      "resumes": size,
+      "avg_chars": round(sum(map(len, corpus)) / size),
+      "fit_seconds": round(fit_seconds, 3),
+      "score_seconds": round(elapsed, 3),
+      "resumes_per_second": round(size / elapsed),
+      "mean_score": round(sum(r["overall_score"] for r in results) / size, 1),
+      "idf_unfitted": unfitted,
+      "idf_fitted": _idf(scorer),
+      "distinct_idf_values": len(set(scorer.vectorizer.idf.tolist())),
+      "scores_changed_by_fit": sum(
+         a != b["overall_score"] for a, b in zip(unfitted_scores, results[:200])
+      ),
+   }
+
+
+if __name__ == "__main__":
+   parser = argparse.ArgumentParser()
+   parser.add_argument("--resumes", type=int, default=5000)
+   args = parser.parse_args()
+   print(json.dumps(main(args.resumes), indent=2))
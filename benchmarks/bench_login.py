@@ -0,0 +1,121 @@
+"""Login throughput and its impact on unrelated routes.
+
+Runs the API with uvicorn in a background thread against a throwaway SQLite
+database, fires a burst of concurrent logins and meanwhile probes GET /health
+(a sync route served from the shared threadpool). Compares Argon2 running on
+the shared threadpool (the previous behaviour) with the dedicated hashing
+executor.
+
+Usage:
+   python -m benchmarks.bench_login --concurrency 32 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+
+
+def _free_port() -> int:
+   with socket.socket() as s:
+      s.bind(("127.0.0.1", 0))
+      return s.getsockname()[1]
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+   ordered = sorted(samples)
+   return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def _burst(base_url: str, concurrency: int, duration: float) -> dict:
+   import httpx
+
+   credentials = {"email": "bench@example.com", "password": "bench-password"}
+   async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+      r = await client.post("/auth/signup", json=credentials)
+      assert r.status_code in (201, 400), r.text
+
+      deadline = time.perf_counter() + duration
+      logins = 0
+      probes: list[float] = []
+
+      async def login_loop():
+         nonlocal logins
+         while time.perf_counter() < deadline:
+            r = await client.post("/auth/login", json=credentials)
+            r.raise_for_status()
+            logins += 1
+
+      async def probe_loop():
+         while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            (await client.get("/health")).raise_for_status()
+            probes.append(time.perf_counter() - started)
+            await asyncio.sleep(0.02)
+
+      started = time.perf_counter()
+      await asyncio.gather(probe_loop(), *(login_loop() for _ in range(concurrency)))
+      elapsed = time.perf_counter() - started
+
+   return {
+      "logins_per_s": round(logins / elapsed, 1),
+      "health_p50_ms": round(statistics.median(probes) * 1000, 1),
+      "health_p99_ms": round(_percentile(probes, 99) * 1000, 1),
+      "health_max_ms": round(max(probes) * 1000, 1),
+   }
+
+
+def main(concurrency: int, duration: float) -> list[dict]:
+   workdir = tempfile.mkdtemp()
+   os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+   # Login never touches Mongo; keep startup from waiting on a server
+   os.environ["ANALYSIS_CACHE_PERSISTENT"] = "false"
+   os.environ["MONGO_WRITER_ENABLED"] = "false"
+
+   import uvicorn
+   from fastapi.concurrency import run_in_threadpool
+
+   from app.core import hashing
+   from app.main import app
+
+   port = _free_port()
+   server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+   thread = threading.Thread(target=server.run, daemon=True)
+   thread.start()
+   while not server.started:
+      time.sleep(0.01)
+   base_url = f"http://127.0.0.1:{port}"
+
+   hasher = hashing.password_hasher
+   dedicated = (hasher.hash, hasher.verify_and_update)
+
+   async def shared_hash(password):
+      return await run_in_threadpool(hashing.hash_password, password)
+
+   async def shared_verify(password, hashed_password):
+      return await run_in_threadpool(hashing.verify_and_update, password, hashed_password)
+
+   results = []
+   try:
+      for mode, (hash_fn, verify_fn) in (
+         ("shared_threadpool", (shared_hash, shared_verify)),
+         (f"dedicated_{hasher.kind}_pool_{hasher.workers}", dedicated),
+      ):
+         hasher.hash, hasher.verify_and_update = hash_fn, verify_fn
+         results.append({"mode": mode, **asyncio.run(_burst(base_url, concurrency, duration))})
+   finally:
+      server.should_exit = True
+      thread.join()
+   return results
+
+
+if __name__ == "__main__":
+   parser = argparse.ArgumentParser()
+   parser.add_argument("--concurrency", type=int, default=32)
+   parser.add_argument("--duration", type=float, default=10.0)
+   args = parser.parse_args()
+   print(json.dumps(main(args.concurrency, args.duration), indent=2))
@@ -0,0 +1,109 @@
+"""Vector top-k matching: exact scan vs the IVF partition.
+
+Fills an EmbeddingIndex (in a temp directory) with --docs synthetic
+resumes for one user, drawn from a handful of skill "topics" so that
+neighbourhoods exist, then runs --queries job descriptions through exact
+search and through IVF search. Reports per-query latency for both and the
+IVF recall@k against the exact results.
+
+Usage:
+   python -m benchmarks.bench_match --docs 100000 --queries 200 --top-k 10
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+TOPICS = [
+   "python django fastapi postgresql docker kubernetes aws microservices rest redis celery",
+   "react typescript javascript css html nextjs redux webpack accessibility figma",
+   "pandas numpy scikit-learn pytorch statistics sql spark airflow tableau forecasting",
+   "kotlin android swift ios jetpack compose firebase mobile gradle xcode",
+   "java spring kafka hibernate maven jenkins oracle microservices grpc",
+   "terraform ansible linux bash prometheus grafana gcp azure networking sre",
+   "golang rust grpc distributed systems concurrency protobuf etcd raft",
+   "salesforce excel crm negotiation stakeholder budgeting forecasting reporting",
+]
+FILLER = "team led built delivered improved managed designed owned project customers product".split()
+
+
+def _document(rng: random.Random) -> str:
+   primary, secondary = rng.sample(TOPICS, 2)
+   words = rng.choices(primary.split(), k=40) + rng.choices(secondary.split(), k=10)
+   words += rng.choices(FILLER, k=30)
+   rng.shuffle(words)
+   return " ".join(words)
+
+
+def main(args) -> dict:
+   from app.services import embeddings
+
+   rng = random.Random(args.seed)
+   index = embeddings.EmbeddingIndex(
+      path=os.path.join(tempfile.mkdtemp(), "emb"),
+      dim=args.dim,
+      dtype=args.dtype,
+      ann_min_rows=args.docs + 1,
+      nprobe=args.nprobe,
+   )
+   index._persistent = index._open_lock_file()
+   if index._persistent:
+      index._open_state()
+   index._reset(1024)
+
+   started = time.perf_counter()
+   batch = []
+   for resume_id in range(1, args.docs + 1):
+      batch.append((resume_id, 1, 0, _document(rng)))
+      if len(batch) == 5000:
+         index._upsert_many(batch)
+         batch = []
+   index._upsert_many(batch)
+   build_s = time.perf_counter() - started
+
+   queries = [embeddings.embed(_document(rng), args.dim) for _ in range(args.queries)]
+
+   started = time.perf_counter()
+   exact = [index._search(1, q, args.top_k)[2] for q in queries]
+   exact_ms = (time.perf_counter() - started) / args.queries * 1000
+
+   started = time.perf_counter()
+   index.ann_min_rows = 1
+   index._maybe_train()
+   train_s = time.perf_counter() - started
+
+   started = time.perf_counter()
+   approx = [index._search(1, q, args.top_k) for q in queries]
+   ivf_ms = (time.perf_counter() - started) / args.queries * 1000
+   assert all(method == "ivf" for _, method, _ in approx)
+
+   recall = sum(
+      len({r for r, _ in e} & {r for r, _ in a[2]}) / max(1, len(e)) for e, a in zip(exact, approx)
+   ) / args.queries
+   index.close()
+   return {
+      "docs": args.docs,
+      "dim": args.dim,
+      "dtype": args.dtype,
+      "index_mb": round(args.docs * args.dim * index.dtype.itemsize / 1e6, 1),
+      "build_docs_per_s": round(args.docs / build_s),
+      "ivf_lists": len(index._centroids),
+      "ivf_train_s": round(train_s, 2),
+      "exact_ms_per_query": round(exact_ms, 2),
+      "ivf_ms_per_query": round(ivf_ms, 2),
+      f"ivf_recall_at_{args.top_k}": round(recall, 3),
+   }
+
+
+if __name__ == "__main__":
+   parser = argparse.ArgumentParser()
+   parser.add_argument("--docs", type=int, default=100000)
+   parser.add_argument("--queries", type=int, default=200)
+   parser.add_argument("--top-k", type=int, default=10)
+   parser.add_argument("--dim", type=int, default=512)
+   parser.add_argument("--dtype", default="float32")
+   parser.add_argument("--nprobe", type=int, default=16)
+   parser.add_argument("--seed", type=int, default=1)
+   print(json.dumps(main(parser.parse_args()), indent=2))
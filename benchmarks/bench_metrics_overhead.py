@@ -0,0 +1,78 @@
+"""Cost of the metrics instrumentation on the hot paths.
+
+Measures per-request overhead of MetricsMiddleware around a trivial ASGI
+app and per-statement overhead of the SQLAlchemy cursor hooks on an
+in-memory SQLite engine, each against an uninstrumented baseline.
+
+Usage:
+   python -m benchmarks.bench_metrics_overhead --requests 20000 --queries 20000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from sqlalchemy import create_engine, text
+
+
+async def _asgi_loop(app, n: int) -> float:
+   scope = {"type": "http", "method": "GET", "path": "/health", "headers": []}
+
+   async def receive():
+      return {"type": "http.request", "body": b"", "more_body": False}
+
+   async def send(message):
+      pass
+
+   started = time.perf_counter()
+   for _ in range(n):
+      await app(dict(scope), receive, send)
+   return time.perf_counter() - started
+
+
+async def _plain_app(scope, receive, send):
+   await send({"type": "http.response.start", "status": 200, "headers": []})
+   await send({"type": "http.response.body", "body": b"ok"})
+
+
+def _query_loop(engine, n: int) -> float:
+   with engine.connect() as conn:
+      for _ in range(500):
+         conn.execute(text("SELECT 1"))
+      started = time.perf_counter()
+      for _ in range(n):
+         conn.execute(text("SELECT 1"))
+      return time.perf_counter() - started
+
+
+def main(requests: int, queries: int) -> dict:
+   from app.core.metrics import MetricsMiddleware, instrument_engine
+
+   plain = asyncio.run(_asgi_loop(_plain_app, requests))
+   wrapped = asyncio.run(_asgi_loop(MetricsMiddleware(_plain_app), requests))
+
+   baseline_engine = create_engine("sqlite://")
+   instrumented_engine = create_engine("sqlite://")
+   instrument_engine(instrumented_engine)
+   baseline = _query_loop(baseline_engine, queries)
+   instrumented = _query_loop(instrumented_engine, queries)
+
+   def us(seconds, n):
+      return round(seconds / n * 1e6, 2)
+
+   return {
+      "request_baseline_us": us(plain, requests),
+      "request_instrumented_us": us(wrapped, requests),
+      "request_overhead_us": us(wrapped - plain, requests),
+      "query_baseline_us": us(baseline, queries),
+      "query_instrumented_us": us(instrumented, queries),
+      "query_overhead_us": us(instrumented - baseline, queries),
+   }
+
+
+if __name__ == "__main__":
+   parser = argparse.ArgumentParser()
+   parser.add_argument("--requests", type=int, default=20000)
+   parser.add_argument("--queries", type=int, default=20000)
+   args = parser.parse_args()
+   print(json.dumps(main(args.requests, args.queries), indent=2))
@@ -0,0 +1,107 @@
+"""Prompt tokens before and after budgeting.
+
+Builds synthetic resumes of increasing length with the usual noise of
+extracted CVs (page footers, repeated headers, separator lines, pasted
+duplicate sections) and reports, per document, the tokens the old prompt
+would have carried, the tokens actually sent, the number of LLM calls and
+the preprocessing time. The long document is also sent end-to-end through
+analyze_resume against the fake Azure endpoint.
+
+Usage:
+   python -m benchmarks.bench_prompt_budget --runs 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+from benchmarks.fake_azure import FakeAzureServer
+
+_JD = (
+   "We are hiring a backend engineer.\n\n"
+   "Requirements: Python, FastAPI, PostgreSQL, Docker, AWS.\n"
+   "This document is confidential.\n"
+)
+
+
+def _resume(jobs: int) -> str:
+   parts = ["CURRICULUM VITAE", "Jane Doe   |   jane@example.com", "-" * 40]
+   for i in range(jobs):
+      parts += [
+         f"Company {i}    —    Senior Engineer    (20{i % 20:02d} – 20{(i + 2) % 20:02d})",
+         f"• Built   event pipelines in Python processing {i + 1}M messages/day.",
+         "• Led the migration to Kubernetes and cut infrastructure costs by 30%.",
+         "• Mentored engineers and ran design reviews across three teams.",
+         "",
+         "",
+         f"Page {i + 1} of {jobs}",
+         "Jane Doe - Resume",
+      ]
+      # Copy-pasted summary that extraction tends to repeat per page
+      parts.append("Summary: backend engineer with a focus on reliability and data systems.")
+   parts.append("References available upon request")
+   return "\n".join(parts)
+
+
+def _measure(runs: int) -> list[dict]:
+   from app.services.prompt_budget import PromptBudget, count_tokens
+   from app.core.config import get_settings
+
+   settings = get_settings()
+   budget = PromptBudget(
+      resume_budget=settings.LLM_RESUME_TOKEN_BUDGET,
+      jd_budget=settings.LLM_JD_TOKEN_BUDGET,
+      max_chunks=settings.LLM_MAX_CHUNKS,
+   )
+   results = []
+   for label, jobs in (("one_page", 4), ("typical", 15), ("long", 400)):
+      text = _resume(jobs)
+      timings = []
+      for _ in range(runs):
+         started = time.perf_counter()
+         prepared = budget.prepare(text, _JD)
+         timings.append(time.perf_counter() - started)
+      results.append({
+         "document": label,
+         "raw_tokens": count_tokens(text) + count_tokens(_JD),
+         "prompt_tokens": prepared.prompt_tokens,
+         "tokens_saved": prepared.tokens_saved,
+         "llm_calls": len(prepared.resume_chunks),
+         "prepare_ms": round(statistics.median(timings) * 1000, 2),
+      })
+   return results
+
+
+async def _end_to_end() -> dict:
+   from app.services import ai_client, llm_backends
+
+   llm_backends.llm_router = llm_backends.create_router()
+   started = time.perf_counter()
+   result = await ai_client.analyze_resume(_resume(400), _JD)
+   elapsed = time.perf_counter() - started
+   await llm_backends.close_http_client()
+   return {"elapsed_s": round(elapsed, 2), "merged_fields": sorted(result)}
+
+
+def main(runs: int) -> dict:
+   os.environ["AZURE_OPENAI_API_KEY"] = "bench"
+   os.environ["AZURE_OPENAI_DEPLOYMENT"] = "bench"
+   results = {"documents": _measure(runs)}
+   with FakeAzureServer(latency=0.5) as server:
+      from app.core.config import get_settings
+
+      get_settings().AZURE_OPENAI_ENDPOINT = server.url
+      results["long_end_to_end"] = {
+         **asyncio.run(_end_to_end()),
+         "llm_requests": server.stats["requests"],
+      }
+   return results
+
+
+if __name__ == "__main__":
+   parser = argparse.ArgumentParser()
+   parser.add_argument("--runs", type=int, default=20)
+   args = parser.parse_args()
+   print(json.dumps(main(args.runs), indent=2))
@@ -0,0 +1,101 @@
+"""Delta-aware re-analysis: prompt size and version history storage.
+
+Builds a synthetic multi-section resume and applies --edits small edits
+(one bullet in one section each time), as a user polishing a resume would.
+For every edit it reports what re-analysis would send (full prompt vs the
+changed sections plus the prior analysis, in estimated tokens) and what
+storing the previous version costs (a full copy vs a reverse delta). Also
+times section splitting + digesting and delta encoding per edit.
+
+Usage:
+   python -m benchmarks.bench_resume_versions --edits 50 --bullets 12
+"""
+import argparse
+import json
+import random
+import time
+
+SECTIONS = ["Summary", "Experience", "Projects", "Education", "Skills", "Certifications"]
+WORDS = (
+   "built led designed migrated scaled reduced improved automated python sql kubernetes "
+   "terraform latency cost team customers pipeline service platform api dashboard"
+).split()
+
+
+def _bullet(rng: random.Random) -> str:
+   return "- " + " ".join(rng.choices(WORDS, k=14)).capitalize()
+
+
+def _resume(rng: random.Random, bullets: int) -> list[list[str]]:
+   return [[name.upper()] + [_bullet(rng) for _ in range(bullets)] for name in SECTIONS]
+
+
+def _text(sections) -> str:
+   return "Jane Doe\njane@example.com\n\n" + "\n\n".join("\n".join(lines) for lines in sections) + "\n"
+
+
+def main(args) -> dict:
+   from app.services.ai_client import _build_delta_payload, _build_payload, estimate_tokens
+   from app.services.resume_versions import (
+      apply_delta,
+      diff_sections,
+      encode_delta,
+      section_digests,
+      split_sections,
+   )
+   from benchmarks.fake_azure import FAKE_ANALYSIS
+
+   rng = random.Random(args.seed)
+   sections = _resume(rng, args.bullets)
+   text = _text(sections)
+   digests = section_digests(split_sections(text))
+   job_description = "Senior backend engineer: Python, Kubernetes, AWS, Terraform. " * 5
+
+   full_tokens = delta_tokens = copy_bytes = delta_bytes = 0
+   split_s = encode_s = 0.0
+   for _ in range(args.edits):
+      section = rng.randrange(len(sections))
+      sections[section][rng.randrange(1, len(sections[section]))] = _bullet(rng)
+      new_text = _text(sections)
+
+      started = time.perf_counter()
+      new_sections = split_sections(new_text)
+      new_digests = section_digests(new_sections)
+      diff = diff_sections(digests, new_digests)
+      split_s += time.perf_counter() - started
+
+      changed = [body for key, body in new_sections if key in set(diff.changed) | set(diff.added)]
+      full_tokens += estimate_tokens(_build_payload(new_text, job_description))
+      delta_tokens += estimate_tokens(
+         _build_delta_payload(FAKE_ANALYSIS, "\n\n".join(changed), diff.removed, job_description)
+      )
+
+      started = time.perf_counter()
+      delta = encode_delta(new_text, text)
+      encode_s += time.perf_counter() - started
+      assert apply_delta(new_text, delta) == text
+      copy_bytes += len(text.encode())
+      delta_bytes += len(json.dumps(delta).encode())
+
+      text, digests = new_text, new_digests
+
+   return {
+      "edits": args.edits,
+      "resume_chars": len(text),
+      "sections": len(digests),
+      "full_prompt_tokens_per_edit": round(full_tokens / args.edits),
+      "delta_prompt_tokens_per_edit": round(delta_tokens / args.edits),
+      "prompt_tokens_saved": f"{(1 - delta_tokens / full_tokens) * 100:.0f}%",
+      "history_full_copies_bytes": copy_bytes,
+      "history_reverse_deltas_bytes": delta_bytes,
+      "split_and_digest_ms_per_edit": round(split_s / args.edits * 1000, 3),
+      "encode_delta_ms_per_edit": round(encode_s / args.edits * 1000, 3),
+   }
+
+
+if __name__ == "__main__":
+   parser = argparse.ArgumentParser()
+   parser.add_argument("--edits", type=int, default=50)
+   parser.add_argument("--bullets", type=int, default=12)
+   parser.add_argument("--seed", type=int, default=1)
+   print(json.dumps(main(parser.parse_args()), indent=2))
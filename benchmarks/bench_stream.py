@@ -0,0 +1,66 @@
+"""Time to first content: streamed vs. buffered LLM analysis.
+
+Points the AI client at the fake Azure endpoint with a given generation time
+and compares when analyze_resume returns against when stream_analysis yields
+its first and last section.
+
+Usage:
+   python -m benchmarks.bench_stream --latency 3 --runs 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+from benchmarks.fake_azure import FakeAzureServer
+
+
+async def _measure(runs: int) -> dict:
+   from app.services import ai_client, llm_backends
+
+   buffered, first, last = [], [], []
+   for _ in range(runs):
+      started = time.perf_counter()
+      await ai_client.analyze_resume("Python developer", None)
+      buffered.append(time.perf_counter() - started)
+
+      started = time.perf_counter()
+      async for i, _section in _enumerate(ai_client.stream_analysis("Python developer", None)):
+         if i == 0:
+            first.append(time.perf_counter() - started)
+      last.append(time.perf_counter() - started)
+   await llm_backends.close_http_client()
+
+   def ms(samples):
+      return round(statistics.median(samples) * 1000)
+
+   return {
+      "buffered_total_ms": ms(buffered),
+      "stream_first_section_ms": ms(first),
+      "stream_total_ms": ms(last),
+   }
+
+
+async def _enumerate(iterator):
+   i = 0
+   async for item in iterator:
+      yield i, item
+      i += 1
+
+
+def main(latency: float, runs: int) -> dict:
+   with FakeAzureServer(latency=latency) as server:
+      os.environ["AZURE_OPENAI_ENDPOINT"] = server.url
+      os.environ["AZURE_OPENAI_API_KEY"] = "bench"
+      os.environ["AZURE_OPENAI_DEPLOYMENT"] = "bench"
+      return {"generation_s": latency, "runs": runs, **asyncio.run(_measure(runs))}
+
+
+if __name__ == "__main__":
+   parser = argparse.ArgumentParser()
+   parser.add_argument("--latency", type=float, default=3.0)
+   parser.add_argument("--runs", type=int, default=5)
+   args = parser.parse_args()
+   print(json.dumps(main(args.latency, args.runs), indent=2))
@@ -0,0 +1,217 @@
+"""Local stand-in for the Azure OpenAI chat completions endpoint.
+
+It also serves the OpenAI-compatible ``/v1/chat/completions`` route (base
+URL ``<url>/v1``). Besides latency it can add a latency tail (``slow_rate``
+of requests take ``slow_latency`` seconds instead) and inject 429s: randomly (``error_rate``) and/or by
+enforcing a quota of ``rate_limit`` requests per ``rate_window`` seconds, the
+way Azure deployments do, answering with a Retry-After header.
+``server_error_rate`` injects 503s to simulate an outage and
+``truncate_rate`` cuts replies short, as a model hitting its token limit
+does; a follow-up asking for specific fields gets just those. Requests with
+``"stream": true`` are answered as server-sent events spread over the latency.
+
+Usage (standalone, then point AZURE_OPENAI_ENDPOINT at it):
+   python -m benchmarks.fake_azure --port 9100 --latency 1.5 --error-rate 0.05
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import socket
+import threading
+import time
+from collections import deque
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.requests import ClientDisconnect
+
+FAKE_ANALYSIS = {
+   "overall_score": 78,
+   "experience_summary": "Backend engineer with five years of Python experience.",
+   "skills": {
+      "technical": ["Python", "FastAPI", "SQL", "Docker"],
+      "soft": ["Communication", "Ownership"],
+   },
+   "strengths": ["Solid API design", "Production experience"],
+   "gaps": ["No Kubernetes experience"],
+   "improvement_suggestions": ["Quantify impact of past projects"],
+}
+
+
+async def _stream_chunks(deployment: str, content: str, latency: float, chunk_chars: int = 16):
+   # Spreads the generation time evenly over the chunks, like a real model
+   pieces = [content[i:i + chunk_chars] for i in range(0, len(content), chunk_chars)]
+   yield 'data: {"id": "", "object": "", "choices": [], "prompt_filter_results": []}\n\n'
+   for piece in pieces:
+      if latency:
+         await asyncio.sleep(latency / len(pieces))
+      chunk = {
+         "id": "chatcmpl-fake",
+         "object": "chat.completion.chunk",
+         "model": deployment,
+         "choices": [{"index": 0, "finish_reason": None, "delta": {"content": piece}}],
+      }
+      yield f"data: {json.dumps(chunk)}\n\n"
+   yield "data: [DONE]\n\n"
+
+
+def create_app(
+   latency: float = 0.0,
+   error_rate: float = 0.0,
+   rate_limit: int = 0,
+   rate_window: float = 60.0,
+   retry_after: float = 1.0,
+   server_error_rate: float = 0.0,
+   slow_rate: float = 0.0,
+   slow_latency: float = 0.0,
+   truncate_rate: float = 0.0,
+   stats: dict | None = None,
+) -> FastAPI:
+   app = FastAPI()
+   stats = stats if stats is not None else {}
+   stats.update(requests=0, ok=0, throttled=0, failed=0, truncated=0, followups=0)
+   accepted: deque = deque()
+
+   def throttle(seconds: float) -> JSONResponse:
+      stats["throttled"] += 1
+      return JSONResponse(
+         status_code=429,
+         content={"error": {"code": "429", "message": "Rate limit is exceeded."}},
+         headers={"Retry-After": str(max(1, math.ceil(seconds)))},
+      )
+
+   async def read(request: Request) -> dict | None:
+      # Cancelled clients (e.g. the losing copy of a hedged request) may hang up early
+      try:
+         return await request.json()
+      except ClientDisconnect:
+         return None
+
+   @app.post("/openai/deployments/{deployment}/chat/completions")
+   async def chat_completions(deployment: str, request: Request):
+      body = await read(request)
+      return Response(status_code=499) if body is None else await respond(deployment, body)
+
+   @app.post("/v1/chat/completions")
+   async def openai_chat_completions(request: Request):
+      body = await read(request)
+      return Response(status_code=499) if body is None else await respond(body.get("model", ""), body)
+
+   async def respond(deployment: str, body: dict):
+      stats["requests"] += 1
+      if server_error_rate and random.random() < server_error_rate:
+         stats["failed"] += 1
+         return JSONResponse(status_code=503, content={"error": {"message": "Service unavailable."}})
+      if error_rate and random.random() < error_rate:
+         return throttle(retry_after)
+      if rate_limit:
+         now = time.monotonic()
+         while accepted and accepted[0] <= now - rate_window:
+            accepted.popleft()
+         if len(accepted) >= rate_limit:
+            return throttle(accepted[0] + rate_window - now)
+         accepted.append(now)
+      stats["ok"] += 1
+
+      messages = body.get("messages") or []
+      if len(messages) > 2 and messages[-2]["role"] == "assistant":
+         # Follow-up asking for the fields named in the last message
+         stats["followups"] += 1
+         content = json.dumps(
+            {name: value for name, value in FAKE_ANALYSIS.items() if name in messages[-1]["content"]}
+         )
+      else:
+         content = "```json\n" + json.dumps(FAKE_ANALYSIS) + "\n```"
+         if truncate_rate and random.random() < truncate_rate:
+            stats["truncated"] += 1
+            content = content[: random.randrange(len(content) // 4, len(content) - 4)]
+      delay = slow_latency if slow_rate and random.random() < slow_rate else latency
+      if body.get("stream"):
+         return StreamingResponse(
+            _stream_chunks(deployment, content, delay), media_type="text/event-stream"
+         )
+      if delay:
+         await asyncio.sleep(delay)
+      return {
+         "id": "chatcmpl-fake",
+         "object": "chat.completion",
+         "model": deployment,
+         "choices": [
+            {
+               "index": 0,
+               "finish_reason": "stop",
+               "message": {"role": "assistant", "content": content},
+            }
+         ],
+         "usage": {"prompt_tokens": 500, "completion_tokens": 120, "total_tokens": 620},
+      }
+
+   return app
+
+
+def _free_port() -> int:
+   with socket.socket() as s:
+      s.bind(("127.0.0.1", 0))
+      return s.getsockname()[1]
+
+
+class FakeAzureServer:
+   """Runs the fake endpoint with uvicorn in a background thread."""
+
+   def __init__(self, latency: float = 0.0, port: int | None = None, **faults):
+      self.port = port or _free_port()
+      self.stats: dict = {}
+      config = uvicorn.Config(
+         create_app(latency, stats=self.stats, **faults),
+         host="127.0.0.1",
+         port=self.port,
+         log_level="warning",
+      )
+      self._server = uvicorn.Server(config)
+      self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+   @property
+   def url(self) -> str:
+      return f"http://127.0.0.1:{self.port}"
+
+   def __enter__(self) -> "FakeAzureServer":
+      self._thread.start()
+      while not self._server.started:
+         time.sleep(0.01)
+      return self
+
+   def __exit__(self, *exc) -> None:
+      self._server.should_exit = True
+      self._thread.join()
+
+
+if __name__ == "__main__":
+   parser = argparse.ArgumentParser()
+   parser.add_argument("--port", type=int, default=9100)
+   parser.add_argument("--latency", type=float, default=1.0)
+   parser.add_argument("--error-rate", type=float, default=0.0, help="random 429 share")
+   parser.add_argument("--server-error-rate", type=float, default=0.0, help="random 503 share")
+   parser.add_argument("--rate-limit", type=int, default=0, help="requests per --rate-window")
+   parser.add_argument("--rate-window", type=float, default=60.0)
+   parser.add_argument("--slow-rate", type=float, default=0.0, help="share of slow requests")
+   parser.add_argument("--slow-latency", type=float, default=0.0)
+   parser.add_argument("--truncate-rate", type=float, default=0.0, help="share of cut-off replies")
+   args = parser.parse_args()
+   uvicorn.run(
+      create_app(
+         args.latency,
+         error_rate=args.error_rate,
+         server_error_rate=args.server_error_rate,
+         rate_limit=args.rate_limit,
+         rate_window=args.rate_window,
+         slow_rate=args.slow_rate,
+         slow_latency=args.slow_latency,
+         truncate_rate=args.truncate_rate,
+      ),
+      host="127.0.0.1",
+      port=args.port,
+      log_level="warning",
+   )
@@ -0,0 +1,147 @@
+"""Fuzz harness for the model reply parser (app.services.llm_output).
+
+Generates random analyses (strings with quotes, backslashes, braces,
+commas, newlines and non-ASCII text), renders each as a model might, and
+checks parse_analysis against them:
+
+   lossless   fences (full, opening or closing half only, none), prose
+              around the object, trailing commas, indentation: the parsed
+              result must equal the analysis and nothing may be missing
+   truncated  the reply cut at a random point: every field returned must
+              equal the original (a cut-off value is never passed on as
+              complete) and every other field must be reported missing
+   corrupted  random characters replaced/deleted/inserted: parse_analysis
+              may only raise LLMOutputError
+
+Exits non-zero and prints the first failing reply for each property.
+
+Usage:
+   python -m benchmarks.fuzz_llm_output --cases 20000 --seed 1
+"""
+import argparse
+import json
+import random
+import sys
+
+ALPHABET = 'abcdefghij KLMNOP 0123456789 ,.:;{}[]"\\/\n\t-_`é中🙂'
+MUTATIONS = ("fenced", "unfenced", "open_fence", "close_fence", "prose", "indented", "trailing_commas")
+
+
+def _text(rng: random.Random, max_len: int = 40) -> str:
+   return "".join(rng.choice(ALPHABET) for _ in range(rng.randint(1, max_len))).strip() or "x"
+
+
+def _analysis(rng: random.Random) -> dict:
+   def items(k):
+      return [_text(rng) for _ in range(rng.randint(0, k))]
+
+   return {
+      "overall_score": rng.randint(0, 100),
+      "experience_summary": _text(rng, 200),
+      "skills": {"technical": items(8), "soft": items(4)},
+      "strengths": items(5),
+      "gaps": items(5),
+      "improvement_suggestions": items(5),
+   }
+
+
+def _dumps_trailing(value, rng: random.Random) -> str:
+   # JSON with a trailing comma after some non-empty containers
+   if isinstance(value, dict):
+      body = ", ".join(f"{json.dumps(k)}: {_dumps_trailing(v, rng)}" for k, v in value.items())
+      return "{" + body + ("," if body and rng.random() < 0.5 else "") + "}"
+   if isinstance(value, list):
+      body = ", ".join(_dumps_trailing(v, rng) for v in value)
+      return "[" + body + ("," if body and rng.random() < 0.5 else "") + "]"
+   return json.dumps(value, ensure_ascii=rng.random() < 0.5)
+
+
+def _render(analysis: dict, mutation: str, rng: random.Random) -> str:
+   raw = json.dumps(analysis, ensure_ascii=False)
+   if mutation == "fenced":
+      return f"```json\n{raw}\n```"
+   if mutation == "unfenced":
+      return raw
+   if mutation == "open_fence":
+      return f"```json\n{raw}"
+   if mutation == "close_fence":
+      return f"{raw}\n```"
+   if mutation == "prose":
+      return f"Here is the analysis you asked for:\n\n```\n{raw}\n```\n\nLet me know if you need more."
+   if mutation == "indented":
+      return f"```JSON\n{json.dumps(analysis, indent=rng.choice([2, 4]))}\n```"
+   return f"```json\n{_dumps_trailing(analysis, rng)}\n```"
+
+
+def _corrupt(text: str, rng: random.Random) -> str:
+   chars = list(text)
+   for _ in range(rng.randint(1, 5)):
+      i = rng.randrange(len(chars) + 1)
+      op = rng.random()
+      if op < 0.33 and i < len(chars):
+         del chars[i]
+      elif op < 0.66 and i < len(chars):
+         chars[i] = rng.choice(ALPHABET)
+      else:
+         chars.insert(i, rng.choice(ALPHABET))
+   return "".join(chars)
+
+
+def main(args) -> int:
+   from app.services.llm_output import ANALYSIS_FIELDS, LLMOutputError, parse_analysis
+
+   rng = random.Random(args.seed)
+   counts = {"lossless": 0, "truncated": 0, "corrupted": 0, "truncated_unparseable": 0}
+   failures: dict[str, str] = {}
+
+   def fail(prop: str, reply: str, detail: str) -> None:
+      failures.setdefault(prop, f"{detail}\n--- reply ---\n{reply}")
+
+   for _ in range(args.cases):
+      analysis = _analysis(rng)
+      mutation = rng.choice(MUTATIONS)
+      reply = _render(analysis, mutation, rng)
+
+      counts["lossless"] += 1
+      try:
+         parsed = parse_analysis(reply)
+      except Exception as e:
+         fail(f"lossless/{mutation}", reply, repr(e))
+      else:
+         if parsed.result != analysis or parsed.missing:
+            fail(f"lossless/{mutation}", reply, f"got {parsed.result!r}, missing {parsed.missing}")
+
+      cut = reply[: rng.randrange(len(reply))]
+      counts["truncated"] += 1
+      try:
+         parsed = parse_analysis(cut)
+      except LLMOutputError:
+         counts["truncated_unparseable"] += 1
+      except Exception as e:
+         fail("truncated", cut, repr(e))
+      else:
+         wrong = {k: v for k, v in parsed.result.items() if analysis.get(k) != v}
+         unreported = [k for k in ANALYSIS_FIELDS if k not in parsed.result and k not in parsed.missing]
+         if wrong or unreported:
+            fail("truncated", cut, f"partial values {wrong!r}, unreported {unreported}")
+
+      counts["corrupted"] += 1
+      corrupted = _corrupt(reply, rng)
+      try:
+         parse_analysis(corrupted)
+      except LLMOutputError:
+         pass
+      except Exception as e:
+         fail("corrupted", corrupted, repr(e))
+
+   print(json.dumps({"cases": counts, "failed_properties": sorted(failures)}, indent=2))
+   for prop, detail in failures.items():
+      print(f"\n=== {prop} ===\n{detail}", file=sys.stderr)
+   return 1 if failures else 0
+
+
+if __name__ == "__main__":
+   parser = argparse.ArgumentParser()
+   parser.add_argument("--cases", type=int, default=20000)
+   parser.add_argument("--seed", type=int, default=1)
+   sys.exit(main(parser.parse_args()))
@@ -0,0 +1,203 @@
+"""Concurrent load test against a running API server.
+
+Signs up a throwaway user, seeds resumes, then drives a weighted request
+mix from many concurrent clients and reports throughput and latency
+percentiles per endpoint as JSON. Available operations: signup, login,
+create, list, get, search, analyze_fast, analyze (LLM, forced past the
+cache) and analyze_stream (SSE). Run it against the same deployment before
+and after a change to compare, or use benchmarks.suite to boot the app and
+check the results against a stored baseline.
+
+Usage:
+   uvicorn app.main:app --workers 1
+   python -m benchmarks.load_test --base-url http://127.0.0.1:8000 --concurrency 64
+   python -m benchmarks.load_test --mix login=3,signup=1 --concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import uuid
+from collections import defaultdict
+
+import httpx
+
+RESUME_TEXT = (
+   "Backend engineer with six years of Python, FastAPI, PostgreSQL and Docker. "
+   "Built data pipelines, REST APIs and CI/CD on AWS. Led a team of four. "
+) * 20
+JOB_DESCRIPTION = "Senior Python engineer: FastAPI, SQL, Kubernetes, AWS, mentoring."
+
+PASSWORD = "load-test-password"
+
+# (name, weight)
+MIX = [
+   ("list", 30),
+   ("get", 30),
+   ("search", 20),
+   ("analyze_fast", 15),
+   ("create", 5),
+]
+
+
+def parse_mix(spec: str) -> list[tuple[str, int]]:
+   # "list=30,get=30,create=5" -> [("list", 30), ("get", 30), ("create", 5)]
+   mix = []
+   for part in spec.split(","):
+      name, _, weight = part.partition("=")
+      mix.append((name.strip(), int(weight or 1)))
+   return mix
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+   ordered = sorted(samples)
+   index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+   return ordered[index]
+
+
+def _summary(samples: list[float]) -> dict:
+   return {
+      "p50_ms": round(statistics.median(samples) * 1000, 1) if samples else None,
+      "p95_ms": round(_percentile(samples, 95) * 1000, 1) if samples else None,
+      "p99_ms": round(_percentile(samples, 99) * 1000, 1) if samples else None,
+   }
+
+
+async def _setup(client: httpx.AsyncClient, n_resumes: int) -> tuple[str, dict, list[int]]:
+   email = f"load-{uuid.uuid4().hex[:12]}@example.com"
+   r = await client.post("/auth/signup", json={"email": email, "password": PASSWORD})
+   r.raise_for_status()
+   r = await client.post("/auth/login", json={"email": email, "password": PASSWORD})
+   r.raise_for_status()
+   headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+   resume_ids = []
+   for i in range(n_resumes):
+      r = await client.post(
+         "/resumes/",
+         json={
+            "title": f"Load resume {i}",
+            # Distinct texts so LLM analyses don't all share one cache entry
+            "resume_text": f"{RESUME_TEXT}Resume #{i}.",
+            "target_role": "Backend Engineer",
+            "job_description": JOB_DESCRIPTION,
+         },
+         headers=headers,
+      )
+      r.raise_for_status()
+      resume_ids.append(r.json()["id"])
+   return email, headers, resume_ids
+
+
+def _request(name: str, resume_ids: list[int], email: str) -> tuple[str, str, dict | None]:
+   resume_id = random.choice(resume_ids)
+   if name == "signup":
+      return "POST", "/auth/signup", {
+         "email": f"load-{uuid.uuid4().hex[:12]}@example.com",
+         "password": PASSWORD,
+      }
+   if name == "login":
+      return "POST", "/auth/login", {"email": email, "password": PASSWORD}
+   if name == "list":
+      return "GET", "/resumes/?limit=20&fields=id,title,created_at", None
+   if name == "get":
+      return "GET", f"/resumes/{resume_id}", None
+   if name == "search":
+      return "GET", f"/resumes/search?q={random.choice(['python', 'docker', 'fastapi aws'])}", None
+   if name == "analyze_fast":
+      return "POST", f"/resumes/{resume_id}/analyze?mode=fast", None
+   if name == "analyze":
+      return "POST", f"/resumes/{resume_id}/analyze?force=true", None
+   if name == "analyze_stream":
+      return "POST", f"/resumes/{resume_id}/analyze/stream?force=true", None
+   if name == "create":
+      return "POST", "/resumes/", {"title": "Load create", "resume_text": RESUME_TEXT}
+   raise ValueError(f"Unknown operation: {name}")
+
+
+async def _send(client: httpx.AsyncClient, name: str, method: str, url: str, body, headers) -> bool:
+   if name != "analyze_stream":
+      r = await client.request(method, url, json=body, headers=headers)
+      return r.status_code < 400
+   # Latency of a stream is until the final event; an error event is a failure
+   async with client.stream(method, url, headers=headers) as r:
+      ok = r.status_code < 400
+      async for line in r.aiter_lines():
+         if line == "event: error":
+            ok = False
+      return ok
+
+
+async def run(
+   base_url: str,
+   concurrency: int,
+   duration: float,
+   n_resumes: int,
+   mix: list[tuple[str, int]] = MIX,
+) -> dict:
+   limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+   async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+      email, headers, resume_ids = await _setup(client, n_resumes)
+      names = [name for name, _ in mix]
+      weights = [weight for _, weight in mix]
+      latencies: dict[str, list[float]] = defaultdict(list)
+      errors: dict[str, int] = defaultdict(int)
+      deadline = time.perf_counter() + duration
+
+      async def user():
+         while time.perf_counter() < deadline:
+            name = random.choices(names, weights)[0]
+            method, url, body = _request(name, resume_ids, email)
+            started = time.perf_counter()
+            try:
+               ok = await _send(client, name, method, url, body, headers)
+            except httpx.HTTPError:
+               ok = False
+            if ok:
+               latencies[name].append(time.perf_counter() - started)
+            else:
+               errors[name] += 1
+
+      started = time.perf_counter()
+      await asyncio.gather(*(user() for _ in range(concurrency)))
+      elapsed = time.perf_counter() - started
+
+   everything = [sample for samples in latencies.values() for sample in samples]
+   report = {
+      "concurrency": concurrency,
+      "duration_s": round(elapsed, 2),
+      "requests": len(everything),
+      "errors": sum(errors.values()),
+      "rps": round(len(everything) / elapsed, 1),
+      **_summary(everything),
+      "endpoints": {},
+   }
+   for name in names:
+      samples = latencies.get(name, [])
+      if not samples and not errors.get(name):
+         continue
+      report["endpoints"][name] = {
+         "requests": len(samples),
+         "errors": errors.get(name, 0),
+         "rps": round(len(samples) / elapsed, 1),
+         **_summary(samples),
+      }
+   return report
+
+
+if __name__ == "__main__":
+   parser = argparse.ArgumentParser()
+   parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+   parser.add_argument("--concurrency", type=int, default=64)
+   parser.add_argument("--duration", type=float, default=20.0)
+   parser.add_argument("--resumes", type=int, default=50)
+   parser.add_argument("--mix", type=parse_mix, default=MIX, help="e.g. list=30,get=30,create=5")
+   parser.add_argument("--seed", type=int, default=None)
+   args = parser.parse_args()
+   random.seed(args.seed)
+   report = asyncio.run(
+      run(args.base_url, args.concurrency, args.duration, args.resumes, args.mix)
+   )
+   print(json.dumps(report, indent=2))
@@ -0,0 +1,128 @@
+"""In-process MongoDB stand-in for benchmarks, backed by mongomock.
+
+install() replaces pymongo.MongoClient and pymongo.AsyncMongoClient with
+clients sharing one in-memory mongomock store, so the API can be booted
+without a MongoDB server. Call it before anything imports app.core.mongo.
+An optional per-call ``latency`` approximates a network round trip. Only
+the operations the app uses are covered; pass a real --mongo-uri to the
+suite for production-like numbers.
+
+Requires ``pip install mongomock``.
+"""
+import asyncio
+
+
+def _apply_bulk(collection, requests) -> None:
+   # mongomock's bulk_write rejects newer pymongo request objects
+   for request in requests:
+      kind = type(request).__name__
+      if kind == "InsertOne":
+         collection.insert_one(request._doc)
+      elif kind == "UpdateOne":
+         collection.update_one(request._filter, request._doc, upsert=request._upsert)
+      elif kind == "UpdateMany":
+         collection.update_many(request._filter, request._doc, upsert=request._upsert)
+      elif kind == "ReplaceOne":
+         collection.replace_one(request._filter, request._doc, upsert=request._upsert)
+      elif kind == "DeleteOne":
+         collection.delete_one(request._filter)
+      elif kind == "DeleteMany":
+         collection.delete_many(request._filter)
+      else:
+         raise NotImplementedError(f"bulk_write: {kind}")
+
+
+class _AsyncCursor:
+   # find() is synchronous and aggregate() awaitable in pymongo's async API;
+   # both hand back cursors that are iterated with `async for`
+   def __init__(self, cursor):
+      self._cursor = cursor
+
+   def sort(self, *args, **kwargs):
+      self._cursor = self._cursor.sort(*args, **kwargs)
+      return self
+
+   def limit(self, count):
+      self._cursor = self._cursor.limit(count)
+      return self
+
+   def __aiter__(self):
+      return self
+
+   async def __anext__(self):
+      try:
+         return next(self._cursor)
+      except StopIteration:
+         raise StopAsyncIteration
+
+
+class _AsyncCollection:
+   def __init__(self, collection, latency: float):
+      self._collection = collection
+      self._latency = latency
+
+   async def bulk_write(self, requests, ordered=True, **kwargs):
+      if self._latency:
+         await asyncio.sleep(self._latency)
+      _apply_bulk(self._collection, requests)
+
+   def find(self, *args, **kwargs):
+      return _AsyncCursor(self._collection.find(*args, **kwargs))
+
+   async def aggregate(self, pipeline, **kwargs):
+      if self._latency:
+         await asyncio.sleep(self._latency)
+      return _AsyncCursor(iter(self._collection.aggregate(pipeline, **kwargs)))
+
+   def __getattr__(self, name):
+      attr = getattr(self._collection, name)
+      if not callable(attr):
+         return attr
+
+      async def call(*args, **kwargs):
+         if self._latency:
+            await asyncio.sleep(self._latency)
+         return attr(*args, **kwargs)
+
+      return call
+
+
+class _AsyncDatabase:
+   def __init__(self, database, latency: float):
+      self._database = database
+      self._latency = latency
+
+   def __getattr__(self, name):
+      return _AsyncCollection(self._database[name], self._latency)
+
+   __getitem__ = __getattr__
+
+
+def install(latency: float = 0.0) -> None:
+   import mongomock
+   import pymongo
+
+   store = mongomock.MongoClient()
+
+   class SyncClient:
+      def __init__(self, *args, **kwargs):
+         pass
+
+      def __getitem__(self, name):
+         return store[name]
+
+      def close(self):
+         pass
+
+   class AsyncClient:
+      def __init__(self, *args, **kwargs):
+         pass
+
+      def __getitem__(self, name):
+         return _AsyncDatabase(store[name], latency)
+
+      async def close(self):
+         pass
+
+   pymongo.MongoClient = SyncClient
+   pymongo.AsyncMongoClient = AsyncClient
@@ -0,0 +1,185 @@
+"""Reproducible benchmark suite with a regression gate.
+
+Boots the API with uvicorn in a background thread against a throwaway
+SQLite database, an in-process MongoDB stand-in (or --mongo-uri) and the
+fake Azure OpenAI server, then runs each workload scenario through
+benchmarks.load_test (a warm-up, then the median of --repeat runs) and
+prints one JSON report. With --baseline the report is compared against a
+stored run: throughput dropping, or p95/p99 latency or the error count
+growing, by more than --tolerance fails with exit code 1.
+
+Baselines are machine-specific; record one on the machine that runs the
+comparison. The LLM quota limiter is disabled unless --llm-rpm is given so
+the numbers measure the service, not the configured quota.
+
+Usage:
+   python -m benchmarks.suite --update-baseline
+   python -m benchmarks.suite --baseline benchmarks/baseline.json
+   python -m benchmarks.suite --scenarios analyze --llm-latency 2 --llm-error-rate 0.05
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks import load_test
+from benchmarks.fake_azure import FakeAzureServer
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+SCENARIOS = {
+   "auth": [("login", 4), ("signup", 1)],
+   "crud": [("create", 10), ("list", 45), ("get", 45)],
+   "mixed": load_test.MIX,
+   "analyze": [("analyze", 3), ("analyze_stream", 1)],
+}
+
+
+def _free_port() -> int:
+   with socket.socket() as s:
+      s.bind(("127.0.0.1", 0))
+      return s.getsockname()[1]
+
+
+def _configure(args, llm_url: str) -> None:
+   workdir = tempfile.mkdtemp()
+   os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+   os.environ["AZURE_OPENAI_ENDPOINT"] = llm_url
+   os.environ["AZURE_OPENAI_API_KEY"] = "bench"
+   os.environ["AZURE_OPENAI_DEPLOYMENT"] = "bench"
+   os.environ["LLM_REQUESTS_PER_MINUTE"] = str(args.llm_rpm)
+   if not args.llm_rpm:
+      os.environ["LLM_TOKENS_PER_MINUTE"] = "0"
+   os.environ["MONGO_WRITER_SPILL_PATH"] = os.path.join(workdir, "mongo-spill.jsonl")
+   if args.mongo_uri:
+      os.environ["MONGO_URI"] = args.mongo_uri
+   else:
+      from benchmarks import mongo_standin
+
+      mongo_standin.install(latency=args.mongo_latency)
+
+
+def _serve():
+   import uvicorn
+
+   from app.main import app
+
+   server = uvicorn.Server(
+      uvicorn.Config(app, host="127.0.0.1", port=_free_port(), log_level="warning")
+   )
+   thread = threading.Thread(target=server.run, daemon=True)
+   thread.start()
+   while not server.started:
+      time.sleep(0.01)
+   return server, thread, f"http://127.0.0.1:{server.config.port}"
+
+
+def _run_scenario(base_url: str, mix, args) -> dict:
+   # A short untimed warm-up, then --repeat timed runs; every metric is the
+   # median across runs so one noisy run doesn't decide the gate
+   asyncio.run(load_test.run(base_url, args.concurrency, min(2.0, args.duration), args.resumes, mix))
+   runs = [
+      asyncio.run(load_test.run(base_url, args.concurrency, args.duration, args.resumes, mix))
+      for _ in range(args.repeat)
+   ]
+   report = sorted(runs, key=lambda r: r["rps"])[len(runs) // 2]
+   for key in ("rps", "p50_ms", "p95_ms", "p99_ms", "errors"):
+      values = sorted(r[key] for r in runs if r[key] is not None)
+      if values:
+         report[key] = values[len(values) // 2]
+   report["runs_rps"] = [r["rps"] for r in runs]
+   return report
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+   regressions = []
+   for name, current in report["scenarios"].items():
+      base = baseline.get("scenarios", {}).get(name)
+      if not base:
+         continue
+      if current["rps"] < base["rps"] * (1 - tolerance):
+         regressions.append(f"{name}: throughput {current['rps']} < baseline {base['rps']} rps")
+      for key in ("p95_ms", "p99_ms"):
+         if base.get(key) and current.get(key) and current[key] > base[key] * (1 + tolerance):
+            regressions.append(f"{name}: {key} {current[key]} > baseline {base[key]}")
+      if current["errors"] > base["errors"] * (1 + tolerance):
+         regressions.append(f"{name}: {current['errors']} errors > baseline {base['errors']}")
+   return regressions
+
+
+def main(args) -> int:
+   random.seed(args.seed)
+   unknown = set(args.scenarios) - set(SCENARIOS)
+   if unknown:
+      raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+   faults = dict(error_rate=args.llm_error_rate, retry_after=1.0)
+   with FakeAzureServer(latency=args.llm_latency, **faults) as llm:
+      _configure(args, llm.url)
+      server, thread, base_url = _serve()
+      report = {
+         "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "repeat": args.repeat,
+            "llm_latency_s": args.llm_latency,
+            "llm_error_rate": args.llm_error_rate,
+            "mongo": "uri" if args.mongo_uri else "mongomock",
+         },
+         "scenarios": {},
+      }
+      try:
+         for name in args.scenarios:
+            report["scenarios"][name] = _run_scenario(base_url, SCENARIOS[name], args)
+      finally:
+         server.should_exit = True
+         thread.join()
+      report["meta"]["llm_requests"] = llm.stats["requests"]
+
+   if args.output:
+      with open(args.output, "w") as f:
+         json.dump(report, f, indent=2)
+   print(json.dumps(report, indent=2))
+
+   if args.update_baseline:
+      with open(args.baseline or DEFAULT_BASELINE, "w") as f:
+         json.dump(report, f, indent=2)
+         f.write("\n")
+      return 0
+   if args.baseline:
+      with open(args.baseline) as f:
+         regressions = compare(report, json.load(f), args.tolerance)
+      for line in regressions:
+         print(f"REGRESSION {line}", file=sys.stderr)
+      return 1 if regressions else 0
+   return 0
+
+
+if __name__ == "__main__":
+   parser = argparse.ArgumentParser()
+   parser.add_argument("--scenarios", type=lambda s: s.split(","), default=list(SCENARIOS))
+   parser.add_argument("--concurrency", type=int, default=16)
+   parser.add_argument("--duration", type=float, default=10.0)
+   parser.add_argument("--repeat", type=int, default=3)
+   parser.add_argument("--resumes", type=int, default=20)
+   parser.add_argument("--seed", type=int, default=1)
+   parser.add_argument("--llm-latency", type=float, default=0.5)
+   parser.add_argument("--llm-error-rate", type=float, default=0.0)
+   parser.add_argument("--llm-rpm", type=int, default=0)
+   parser.add_argument("--mongo-uri", default=None)
+   parser.add_argument("--mongo-latency", type=float, default=0.0)
+   parser.add_argument("--output", default=None)
+   parser.add_argument("--baseline", default=None)
+   parser.add_argument("--update-baseline", action="store_true")
+   parser.add_argument("--tolerance", type=float, default=0.25)
+   sys.exit(main(parser.parse_args()))